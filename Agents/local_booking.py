@@ -3,13 +3,52 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))  # Zum Root-Verzeichnis
 import datetime
-from Data.clients_data import clients
-from Data.stylists_data import stylists
+from api.services.client_index import ClientIndex
+from api.services.schedule import ScheduleBook, to_minutes
+from api.services.store import get_store
+
+# Service-Dauer in Minuten (für Überschneidungsprüfung)
+SERVICE_DURATIONS = {"haircut": 30, "beard": 20}
+DEFAULT_DURATION = 30
+
+# Kunden, Stylisten und Buchungen kommen aus dem gemeinsamen SQLite-Store; geladen erst
+# von init(), damit ein Import die Datenbank weder anlegt noch migriert
+store = None
+clients = []
+stylists = []
+schedules = ScheduleBook()  # Gebuchte Termine je Stylist und Tag, ab heute
+client_index = ClientIndex()  # Suchindex über die Kundenliste (Name, Telefon)
+
+
+def init():
+    """Store öffnen und Kunden, Stylisten und kommende Termine laden (nur beim ersten Aufruf)."""
+    global store, clients, stylists, schedules, client_index
+    if store is not None:
+        return store
+    opened = get_store()
+    loaded_schedules = ScheduleBook()
+    for booking in opened.bookings.upcoming(str(datetime.date.today())):
+        if booking.get("duration"):
+            date, time = booking["start"].split(" ")
+            loaded_schedules.book(booking["staff_id"], date, to_minutes(time), booking["duration"], booking.get("external_id"))
+    clients = opened.clients.all()
+    stylists = opened.stylists.all()
+    schedules = loaded_schedules
+    client_index = ClientIndex(clients)
+    store = opened
+    return store
+
+
+def find_client(query, limit=5):
+    """Kunden nach Namensanfang (Vor- und Nachname in beliebiger Reihenfolge) oder Telefonnummer suchen."""
+    init()
+    return client_index.search(query, limit)
 
 
 
 def extract_booking_request(user_input):
     # Mock parser – später mit echter Intent-Engine ersetzen
+    init()
     if "book" in user_input or "appointment" in user_input:
         return {
             "intent": "book_appointment",
@@ -39,31 +78,58 @@ def extract_time(text):
     return None
 
 
-def find_alternative(stylist_name, date):
+def day_key(date):
+    # Stylist availability is keyed by weekday name ("Monday", ...)
+    return date.strftime("%A") if hasattr(date, "strftime") else date
+
+
+def free_times(stylist, date, duration):
+    """Offered start times of a stylist on a date that fit the duration without overlap."""
+    init()
+    offered = stylist['availability'].get(day_key(date), [])
+    return [t for t in offered if schedules.is_free(stylist['id'], str(date), to_minutes(t), duration)]
+
+
+def find_alternative(stylist_name, date, duration=DEFAULT_DURATION):
+    init()
     for s in stylists:
         if s['name'] != stylist_name:
-            if date in s['availability']:
-                return s['name'], s['availability'][date][0]  # pick first free slot
+            free = free_times(s, date, duration)
+            if free:
+                return s['name'], free[0]  # pick first free slot
     return None, None
 
 
 def book_appointment(parsed):
     if not all([parsed['stylist_name'], parsed['service'], parsed['date'], parsed['time']]):
         return "Missing details. Please provide stylist, service, date and time."
+    init()
 
     stylist = next((s for s in stylists if s['name'] == parsed['stylist_name']), None)
-    if stylist and parsed['date'] in stylist['availability']:
-        if parsed['time'] in stylist['availability'][parsed['date']]:
+    if stylist and day_key(parsed['date']) in stylist['availability']:
+        duration = SERVICE_DURATIONS.get(parsed['service'], DEFAULT_DURATION)
+        free = free_times(stylist, parsed['date'], duration)
+        booking_id = f"{stylist['id']}:{parsed['date']}:{parsed['time']}"
+        if parsed['time'] in free and schedules.book(
+            stylist['id'], str(parsed['date']), to_minutes(parsed['time']), duration, booking_id
+        ):
             # Confirm booking
-            stylist['availability'][parsed['date']].remove(parsed['time'])
+            store.bookings.add({
+                "external_id": booking_id,
+                "staff_id": stylist['id'],
+                "stylist_name": stylist['name'],
+                "service": parsed['service'],
+                "start": f"{parsed['date']} {parsed['time']}",
+                "duration": duration
+            })
             return f"Appointment booked with {stylist['name']} on {parsed['date']} at {parsed['time']}."
         else:
-            alt_time = stylist['availability'][parsed['date']][0] if stylist['availability'][parsed['date']] else None
+            alt_time = free[0] if free else None
             if alt_time:
                 return f"{stylist['name']} is not free at that time. Available at {alt_time} instead."
             else:
                 # Try finding another stylist
-                alt_name, alt_time = find_alternative(stylist['name'], parsed['date'])
+                alt_name, alt_time = find_alternative(stylist['name'], parsed['date'], duration)
                 if alt_name and alt_time:
                     return f"{stylist['name']} not available. But {alt_name} is free at {alt_time}. Shall I book?"
                 else:
@@ -1,24 +1,15 @@
 import sys
 import os
-import json
-from datetime import datetime
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))  # Root directory for api.services
 from HSphere.Logs.improvement_logger import log_event
+from api.services.store import get_store
 
-INVENTORY_FILE = "HSphere/Data/inventory.json"
-
-def load_inventory():
-    try:
-        with open(INVENTORY_FILE, "r") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
-
-def save_inventory(data):
-    with open(INVENTORY_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+# Inventory lives in the shared SQLite store (imported once from Data/inventory.json).
+# get_store() opens it on first use, so importing this module does not touch the database.
 
 def view_inventory():
-    inventory = load_inventory()
+    inventory = get_store().inventory.all()
     if not inventory:
         print("Inventory is currently empty.")
     else:
@@ -26,23 +17,11 @@ def view_inventory():
             print(f"{item['name']} - {item['quantity']} units (last updated: {item['updated']})")
 
 def update_inventory():
-    inventory = load_inventory()
     name = input("Enter product/tool name: ").strip()
     quantity = input("Enter new quantity: ").strip()
 
-    for item in inventory:
-        if item["name"].lower() == name.lower():
-            item["quantity"] = quantity
-            item["updated"] = datetime.now().isoformat()
-            break
-    else:
-        inventory.append({
-            "name": name,
-            "quantity": quantity,
-            "updated": datetime.now().isoformat()
-        })
-
-    save_inventory(inventory)
+    # One row updated in place (names match case-insensitively), no full rewrite
+    get_store().inventory.set(name, quantity)
     log_event("Inventory", f"Updated {name} to {quantity} units.")
     print(f"{name} updated successfully.")
 
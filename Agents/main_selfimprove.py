@@ -1,25 +1,48 @@
 import os
 import sys
 import json
+import threading
 import openai
+from datetime import datetime
 
 # Dynamically add parent directory to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from Logs.log_rotation import RotatingFile
+
 AGENTS_PATH = os.path.join(os.path.dirname(__file__))
-LOG_PATH = os.path.join(os.path.dirname(__file__), "../Logs/improvement_log.json")
+# One JSON object per line; appending no longer re-reads the whole log
+LOG_PATH = os.path.join(os.path.dirname(__file__), "../Logs/improvement_log.jsonl")
+LEGACY_LOG_PATH = os.path.join(os.path.dirname(__file__), "../Logs/improvement_log.json")
+
+_log_file = None
+_log_lock = threading.Lock()  # RotatingFile is not thread-safe
+
+def _convert_legacy_log():
+    # Old JSON array log -> JSONL, once; the old file stays in place
+    if os.path.exists(LOG_PATH) or not os.path.exists(LEGACY_LOG_PATH):
+        return
+    with open(LEGACY_LOG_PATH, "r") as f:
+        try:
+            log = json.load(f)
+        except json.JSONDecodeError:
+            log = []
+    tmp_path = LOG_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for entry in log:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, LOG_PATH)
 
 def log_event(category, message):
-    log = []
-    if os.path.exists(LOG_PATH):
-        with open(LOG_PATH, "r") as f:
-            try:
-                log = json.load(f)
-            except json.JSONDecodeError:
-                pass
-    log.append({"category": category, "message": message})
-    with open(LOG_PATH, "w") as f:
-        json.dump(log, f, indent=2)
+    global _log_file
+    entry = {"timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "category": category, "message": message}
+    line = json.dumps(entry, ensure_ascii=False) + "\n"
+    with _log_lock:
+        if _log_file is None:
+            _convert_legacy_log()
+            _log_file = RotatingFile(LOG_PATH)
+        _log_file.write(line)
+        _log_file.flush()
 
 
 def improve_agent():
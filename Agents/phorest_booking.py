@@ -2,28 +2,60 @@
 
 """
 Wrapper-Funktionen zur Buchung von Terminen über die Phorest API
-— unterstützt echten und Fake-Modus über phorest_api.py
+— unterstützt echten und Fake-Modus über api/services/phorest_api_client.py
 """
 
-from Agents.phorest_api import (
+from datetime import datetime
+from typing import Optional
+
+from api.services.phorest_api_client import (
     get_client,
     search_clients,
-    get_client_appointments,
+    get_services,
+    get_service_duration,
     create_appointment,
     get_available_slots
 )
+from api.services.schedule import ScheduleBook
+from api.services.slot_holds import slot_holds
+
+# Dauer, falls ein Service keine Dauer liefert (Minuten)
+DEFAULT_DURATION = 30
+
+# Termine, die über diesen Agenten gebucht wurden, je Stylist und Tag
+schedules = ScheduleBook()
 
-def book_appointment(client_id: str, stylist_id: str, datetime_str: str, service_id: str):
+
+async def hold_slot(client_id: str, stylist_id: str, datetime_str: str, service_id: str,
+                    ttl_seconds: Optional[float] = None):
     """
-    Führt Buchung über die Phorest API durch, mit vorheriger Verfügbarkeitsprüfung.
+    Reserviert einen freien Slot für kurze Zeit (z. B. sobald der Kunde eine Uhrzeit wählt).
+    Andere Kunden erhalten für den Zeitraum sofort eine Absage statt erst nach
+    dem Phorest-Aufruf. Der Hold läuft automatisch ab.
     :param client_id: ID des Kunden
     :param stylist_id: ID des Stylists
-    :param datetime_str: ISO-Format (z. B. '2025-06-22T15:00:00')
+    :param datetime_str: ISO-Format (z. B. '2025-06-22T15:00:00')
     :param service_id: ID der Dienstleistung
-    :return: Erfolgs- oder Fehler-Response (dict)
+    :param ttl_seconds: Haltedauer in Sekunden (Standard: SLOT_HOLD_TTL)
+    :return: Erfolgs- oder Fehler-Response (dict), bei Erfolg mit Hold in "data"
     """
+    if ttl_seconds is not None and not ttl_seconds > 0:
+        return {
+            "success": False,
+            "message": f"Ungültige Haltedauer: {ttl_seconds} (muss größer als 0 sein)."
+        }
+
+    # Zeitpunkt prüfen, bevor Phorest abgefragt wird
+    try:
+        start = datetime.fromisoformat(datetime_str.replace("Z", ""))
+    except (ValueError, AttributeError):
+        return {
+            "success": False,
+            "message": f"Ungültiger Zeitpunkt: {datetime_str!r} (erwartet z. B. '2025-06-22T15:00:00')."
+        }
+
     # Verfügbare Slots abrufen
-    availability = get_available_slots(stylist_id, service_id, datetime_str[:10])
+    availability = await get_available_slots(stylist_id, service_id, datetime_str[:10])
     
     if not availability.get("success"):
         return {
@@ -40,14 +72,85 @@ def book_appointment(client_id: str, stylist_id: str, datetime_str: str, service
             "message": f"Kein freier Slot um {time_part} Uhr."
         }
 
+    start_minute = start.hour * 60 + start.minute
+    duration = await get_service_duration(service_id, DEFAULT_DURATION)
+    date = datetime_str[:10]
+
+    # Bereits über diesen Agenten gebuchte Termine zählen ebenfalls
+    booked = schedules.conflict(stylist_id, date, start_minute, duration)
+    if booked is not None:
+        return {
+            "success": False,
+            "message": f"Der Termin um {time_part} Uhr überschneidet sich mit {booked}."
+        }
+
+    hold, conflict = slot_holds.hold(
+        stylist_id, date, start_minute, duration, ttl=ttl_seconds,
+        clientId=client_id, serviceId=service_id, startTime=datetime_str
+    )
+    if hold is None:
+        return {
+            "success": False,
+            "message": f"Der Slot um {time_part} Uhr ist gerade reserviert ({conflict})."
+        }
+    return {
+        "success": True,
+        "data": hold,
+        "message": f"Slot um {time_part} Uhr für {int(hold['expiresIn'])} Sekunden reserviert."
+    }
+
+
+async def confirm_hold(hold_id: str):
+    """
+    Bucht einen reservierten Slot über die Phorest API.
+    :param hold_id: ID aus hold_slot
+    :return: Erfolgs- oder Fehler-Response (dict)
+    """
+    hold = slot_holds.claim(hold_id)
+    if hold is None:
+        return {
+            "success": False,
+            "message": "Die Reservierung ist abgelaufen oder wird bereits gebucht."
+        }
+
+    # Holds überschneiden sich nie, der Eintrag im Terminplan ist daher frei
+    schedules.book(hold["staffId"], hold["date"], hold["start"], hold["duration"], hold_id)
+
     # Termin erstellen
     appointment_data = {
-        "clientId": client_id,
-        "staffId": stylist_id,
-        "serviceId": service_id,
-        "startTime": datetime_str,
+        "clientId": hold["clientId"],
+        "staffId": hold["staffId"],
+        "serviceId": hold["serviceId"],
+        "startTime": hold["startTime"],
         "notes": "Gebucht via HOAI"
     }
 
-    result = create_appointment(appointment_data)
+    result = await create_appointment(appointment_data)
+
+    # Hold ist erledigt; Terminplan-Eintrag bei Fehlschlag wieder freigeben
+    slot_holds.release(hold_id, confirmed=result.get("success", False))
+    if not result.get("success"):
+        schedules.cancel(hold_id)
     return result
+
+
+async def release_hold(hold_id: str) -> bool:
+    """Gibt einen reservierten Slot wieder frei (z. B. wenn der Kunde abbricht)."""
+    return slot_holds.release(hold_id)
+
+
+async def book_appointment(client_id: str, stylist_id: str, datetime_str: str, service_id: str):
+    """
+    Führt Buchung über die Phorest API durch, mit vorheriger Verfügbarkeitsprüfung.
+    Der Slot wird zuerst reserviert (hold_slot) und dann gebucht (confirm_hold),
+    damit parallele Buchungen desselben Zeitraums sofort abgewiesen werden.
+    :param client_id: ID des Kunden
+    :param stylist_id: ID des Stylists
+    :param datetime_str: ISO-Format (z. B. '2025-06-22T15:00:00')
+    :param service_id: ID der Dienstleistung
+    :return: Erfolgs- oder Fehler-Response (dict)
+    """
+    held = await hold_slot(client_id, stylist_id, datetime_str, service_id)
+    if not held.get("success"):
+        return held
+    return await confirm_hold(held["data"]["id"])
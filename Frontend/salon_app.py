@@ -2,9 +2,12 @@ import streamlit as st
 import requests
 from datetime import datetime, timedelta
 import json
+import re
+import uuid
 
 # API Base URL
 API_BASE_URL = st.secrets.get("API_BASE_URL", "http://127.0.0.1:8000")
+PHONE_QUERY_PATTERN = re.compile(r"^[\d\s+()/.-]+$")
 
 @st.cache_data(show_spinner=False)
 def load_services_and_stylists():
@@ -56,10 +59,15 @@ if 'booking_state' not in st.session_state:
     }
 
 # API Functions
-def api_search_client(name):
-    """Search for a client by name"""
+def is_name_query(query):
+    """Names are searched typo-tolerant; phone numbers and emails exactly"""
+    return "@" not in query and not PHONE_QUERY_PATTERN.match(query.strip())
+
+def api_search_client(query):
+    """Search for a client by name (typo-tolerant, best match first), phone or email"""
     try:
-        response = requests.get(f"{API_BASE_URL}/clients/search", params={"query": name})
+        params = {"query": query, "fuzzy": "true" if is_name_query(query) else "false"}
+        response = requests.get(f"{API_BASE_URL}/clients/search", params=params)
         if response.status_code == 200:
             data = response.json()
             if data.get('success') and data.get('data', {}).get('clients'):
@@ -89,6 +97,24 @@ def api_get_availability(staff_id, service_id, date):
         st.error(f"API-Fehler: {str(e)}")
         return None
 
+def api_hold_slot(payload):
+    """Reserve a time slot until the booking is confirmed; returns (hold, error message)"""
+    try:
+        response = requests.post(f"{API_BASE_URL}/holds", json=payload, timeout=10)
+        data = response.json()
+        if response.status_code == 200 and data.get('success'):
+            return data['data'], None
+        return None, data.get('detail') or data.get('message', 'Slot konnte nicht reserviert werden')
+    except (requests.exceptions.RequestException, ValueError) as e:
+        return None, str(e)
+
+def api_release_hold(hold_id):
+    """Give a reserved time slot back"""
+    try:
+        requests.delete(f"{API_BASE_URL}/holds/{hold_id}", timeout=5)
+    except requests.exceptions.RequestException:
+        pass  # Hold läuft ohnehin automatisch ab
+
 def process_chat_input(user_input):
     """Process user input based on current booking stage"""
     state = st.session_state.booking_state
@@ -98,12 +124,16 @@ def process_chat_input(user_input):
         clients = api_search_client(user_input)
         
         if clients and len(clients) > 0:
-            # Take the first matching client
+            # Bester Treffer zuerst; bei Tippfehlern (score < 1) erst nachfragen
             client = clients[0]
             state['client_name'] = client.get('name', user_input)
             state['client_id'] = client.get('id')
-            state['stage'] = 'service'
             
+            if client.get('score', 1) < 1:
+                state['stage'] = 'confirm_name'
+                return f"Meinen Sie {state['client_name']}? Bitte antworten Sie mit 'Ja' oder 'Nein'."
+            
+            state['stage'] = 'service'
             service_list = "\n".join([f"- {service.get('name', '')}" for service in services])
             return f"Hallo {state['client_name']}! Welchen Service möchten Sie buchen?\n\n" + \
                    f"Verfügbare Services:\n{service_list}"
@@ -111,6 +141,19 @@ def process_chat_input(user_input):
             return f"Entschuldigung, ich konnte keinen Kunden mit dem Namen '{user_input}' finden. " + \
                    "Bitte versuchen Sie es erneut oder wenden Sie sich an die Rezeption."
     
+    elif state['stage'] == 'confirm_name':
+        if 'ja' in user_input.lower():
+            state['stage'] = 'service'
+            service_list = "\n".join([f"- {service.get('name', '')}" for service in services])
+            return f"Hallo {state['client_name']}! Welchen Service möchten Sie buchen?\n\n" + \
+                   f"Verfügbare Services:\n{service_list}"
+        else:
+            # Falscher Kunde erkannt: Namen erneut abfragen
+            state['client_name'] = None
+            state['client_id'] = None
+            state['stage'] = 'name'
+            return "Entschuldigung! Bitte geben Sie Ihren vollständigen Namen noch einmal ein."
+    
     elif state['stage'] == 'service':
         # Check if service exists
         service_name = None
@@ -191,14 +234,30 @@ def process_chat_input(user_input):
         )
         
         if slots and time_input in slots:
+            # Reserve the slot while the customer confirms, so nobody else can take it
+            hold, error = api_hold_slot({
+                "client_id": state['client_id'],
+                "stylist_id": state['stylist_id'],
+                "datetime_str": f"{state['date']} {time_input}",
+                "service_id": state['service_id']
+            })
+            if hold is None:
+                others = [slot for slot in slots if slot != time_input]
+                return f"Diese Zeit ist leider gerade vergeben ({error}). Bitte wählen Sie eine andere Zeit:\n" + \
+                       "\n".join([f"- {slot}" for slot in others])
+            
             state['time'] = time_input
+            state['hold_id'] = hold['id']
             state['stage'] = 'confirm'
+            # One key per booking attempt, so a resent confirmation books only once
+            state['idempotency_key'] = str(uuid.uuid4())
             
             return f"Möchten Sie folgenden Termin buchen?\n\n" + \
                    f"**Service:** {state['service']}\n" + \
                    f"**Stylist:** {state['stylist']}\n" + \
                    f"**Datum:** {state['date']}\n" + \
                    f"**Uhrzeit:** {state['time']}\n\n" + \
+                   f"Der Termin ist für {int(hold['expiresIn'] // 60)} Minuten für Sie reserviert. " + \
                    "Antworten Sie mit 'Ja' zum Bestätigen oder 'Nein' zum Abbrechen."
         else:
             # Don't show the time they entered, just show available times
@@ -222,12 +281,26 @@ def process_chat_input(user_input):
             }
             
             try:
-                # Make the actual booking request
-                resp = requests.post(
-                    f"{API_BASE_URL}/book_appointment",
-                    json=payload,
-                    timeout=10
-                )
+                # Make the actual booking request (confirm the reserved slot if there is one)
+                headers = {"Idempotency-Key": state.get('idempotency_key') or str(uuid.uuid4())}
+                if state.get('hold_id'):
+                    resp = requests.post(
+                        f"{API_BASE_URL}/holds/{state['hold_id']}/confirm",
+                        headers=headers,
+                        timeout=10
+                    )
+                else:
+                    resp = requests.post(
+                        f"{API_BASE_URL}/book_appointment",
+                        json=payload,
+                        headers=headers,
+                        timeout=10
+                    )
+                if resp.status_code == 404 and state.get('hold_id'):
+                    # Reservation expired: let the customer pick a time again
+                    state['hold_id'] = None
+                    state['stage'] = 'time'
+                    return "⏰ Ihre Reservierung ist abgelaufen. Bitte geben Sie die gewünschte Uhrzeit erneut ein."
                 resp.raise_for_status()
                 result = resp.json()
                 
@@ -266,6 +339,8 @@ def process_chat_input(user_input):
                 return f"❌ Unerwarteter Fehler: {str(e)}\n\n" + \
                        "Bitte versuchen Sie es erneut oder wenden Sie sich an die Rezeption."
         else:
+            if state.get('hold_id'):
+                api_release_hold(state['hold_id'])
             # Reset state
             st.session_state.booking_state = {
                 'stage': 'name',
@@ -0,0 +1,247 @@
+"""
+Structured improvement events.
+
+Events are JSON Lines, {"timestamp": <epoch seconds>, "category": ..., "message": ...},
+in Logs/improvement_events.jsonl. Next to it, improvement_events.jsonl.idx is a
+sparse index of native int64 pairs: a header (-1, inode of the log, bucket
+seconds, 0), then one (bucket, offset) record for the first event of every
+EVENT_INDEX_BUCKET-second time bucket. A query for a time window bisects the
+index, seeks to the bucket before the window and stops at the bucket after it,
+instead of reading the whole file.
+
+Timestamps are taken in log_event, so they increase along the file apart from
+threads racing within microseconds; the one-bucket margin on both ends covers
+that. Several processes may write one log (see log_rotation.py). A writer
+reloads the index when it follows another process into a new segment, and
+index records that go backwards are ignored when reading. A missing record
+only widens the byte range a query reads.
+"""
+
+import gzip
+import json
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from fnmatch import fnmatchcase
+
+from .log_rotation import RotatingFile, archives, rotated_at
+
+EVENT_LOG_FILE = "Logs/improvement_events.jsonl"
+EVENT_INDEX_BUCKET = int(os.getenv("EVENT_INDEX_BUCKET", "60"))
+
+_HEADER_MARK = -1
+_index_cache = {}
+
+
+class EventLogWriter:
+    """Appends events to the JSONL log and keeps its index. Not thread-safe."""
+
+    def __init__(self, path=EVENT_LOG_FILE, bucket=EVENT_INDEX_BUCKET, max_bytes=None, max_age=None):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.bucket = bucket
+        self._index = None
+        # max_bytes / max_age: rotation limits, None = the LOG_ROTATE_* defaults
+        self._file = RotatingFile(path, max_bytes=max_bytes, max_age=max_age, on_rotate=self._start_index,
+                                  on_reopen=self._load_index)
+        self._load_index()
+
+    def write(self, events):
+        """
+        Append events and index the ones that open a new time bucket.
+
+        Args:
+            events: (timestamp, category, message) tuples, oldest first
+        """
+        lines = [(json.dumps({"timestamp": ts, "category": category, "message": message},
+                             ensure_ascii=False) + "\n").encode("utf-8")
+                 for ts, category, message in events]
+        # Offsets are known after the write (it may rotate first)
+        offset = self._file.write(b"".join(lines))
+        records = array("q")
+        for (ts, _, _), line in zip(events, lines):
+            bucket = int(ts // self.bucket)
+            if self._last_bucket is None or bucket > self._last_bucket:
+                records.extend((bucket, offset))
+                self._last_bucket = bucket
+            offset += len(line)
+        # Data before index, so the index never points past the log
+        self._file.flush()
+        if records:
+            self._index.write(records.tobytes())
+            self._index.flush()
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+        if self._index is not None:
+            self._index.close()
+
+    def _load_index(self):
+        header, buckets, _ = read_index(self.index_path)
+        if header != (self._file.inode, self.bucket):
+            # No index yet, or one for another segment or bucket size
+            self._rebuild_index()
+            return
+        if self._index is not None:
+            self._index.close()
+        self._last_bucket = buckets[-1] if buckets else None
+        self._index = open(self.index_path, "ab")
+
+    def _start_index(self, rotated=None, records=None):
+        if self._index is not None:
+            self._index.close()
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            array("q", (_HEADER_MARK, self._file.inode, self.bucket, 0)).tofile(f)
+            if records:
+                records.tofile(f)
+        os.replace(tmp_path, self.index_path)
+        self._index = open(self.index_path, "ab")
+        self._last_bucket = records[-2] if records else None
+
+    def _rebuild_index(self):
+        records = array("q")
+        last_bucket = None
+        offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                event = _parse(line)
+                if event is not None:
+                    bucket = int(event["timestamp"] // self.bucket)
+                    if last_bucket is None or bucket > last_bucket:
+                        records.extend((bucket, offset))
+                        last_bucket = bucket
+                offset += len(line)
+        self._start_index(records=records)
+
+
+def read_index(index_path):
+    """
+    Returns:
+        tuple: ((inode, bucket seconds) or None, buckets, offsets)
+    """
+    values = array("q")
+    try:
+        with open(index_path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None, array("q"), array("q")
+    values.frombytes(data[:len(data) // 16 * 16])  # A torn last record is ignored
+    if len(values) < 4 or values[0] != _HEADER_MARK:
+        return None, array("q"), array("q")
+    buckets, offsets = values[4::2], values[5::2]
+    if any(b < a for a, b in zip(buckets, buckets[1:])) or any(b < a for a, b in zip(offsets, offsets[1:])):
+        # Records of several writers interleaved: keep those that go forward in both
+        records = zip(buckets, offsets)
+        buckets, offsets = array("q"), array("q")
+        for bucket, offset in records:
+            if not buckets or (bucket > buckets[-1] and offset >= offsets[-1]):
+                buckets.append(bucket)
+                offsets.append(offset)
+    return (values[1], values[2]), buckets, offsets
+
+
+def query_events(category=None, since=None, until=None, path=EVENT_LOG_FILE, include_archives=False):
+    """
+    Events of a time window, oldest first.
+
+    Args:
+        category: Category or fnmatch pattern ("Booking*"); None = all
+        since: Earliest timestamp (epoch seconds), inclusive; None = no limit
+        until: Latest timestamp, inclusive; None = no limit
+        path: JSONL event log
+        include_archives: Also read the compressed segments in Logs/backups
+            that can hold events of the window (they cannot be seeked)
+
+    Yields:
+        dict: Events with timestamp, category and message
+    """
+    def wanted(event):
+        return ((since is None or event["timestamp"] >= since)
+                and (until is None or event["timestamp"] <= until)
+                and (category is None or fnmatchcase(str(event.get("category")), category)))
+
+    if include_archives:
+        for archive in archives(path):
+            # Rotation time is truncated to seconds
+            if since is not None and rotated_at(archive) + 1 < since:
+                continue
+            with gzip.open(archive, "rb") as f:
+                for event in filter(None, map(_parse, f)):
+                    if until is not None and event["timestamp"] > until + EVENT_INDEX_BUCKET:
+                        return  # Everything after this is later still
+                    if wanted(event):
+                        yield event
+
+    if not os.path.exists(path):
+        return
+    start, stop = _window(path, since, until)
+    # A plain category is looked for in the raw line first, as EventLogWriter serializes it
+    needle = None
+    if category is not None and not any(ch in category for ch in "*?["):
+        needle = f'"category": {json.dumps(category, ensure_ascii=False)}'.encode("utf-8")
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        for line in f:
+            if offset >= stop:
+                break
+            offset += len(line)
+            if needle is not None and needle not in line:
+                continue
+            event = _parse(line)
+            if event is not None and wanted(event):
+                yield event
+
+
+def format_event(event):
+    """Event as a line of the text log."""
+    when = datetime.fromtimestamp(event["timestamp"]).strftime("%Y-%m-%d %H:%M:%S")
+    return f"[{when}] [{event['category']}] {event['message']}"
+
+
+def _window(path, since, until):
+    # Byte range that holds every event between since and until
+    size = os.path.getsize(path)
+    header, buckets, offsets = _cached_index(f"{path}.idx")
+    if header is None or header[0] != os.stat(path).st_ino:
+        return 0, size
+    bucket = header[1]
+    start, stop = 0, size
+    if since is not None:
+        i = bisect_right(buckets, int(since // bucket) - 1) - 1
+        if i >= 0:
+            start = offsets[i]
+    if until is not None:
+        j = bisect_left(buckets, int(until // bucket) + 2)
+        if j < len(buckets):
+            stop = offsets[j]
+    return start, stop
+
+
+def _cached_index(index_path):
+    # Re-read once the index is appended to (size) or replaced (inode)
+    try:
+        stat = os.stat(index_path)
+    except FileNotFoundError:
+        return None, array("q"), array("q")
+    key = (stat.st_ino, stat.st_size)
+    cached = _index_cache.get(index_path)
+    if cached is None or cached[0] != key:
+        cached = _index_cache[index_path] = (key, read_index(index_path))
+    return cached[1]
+
+
+def _parse(line):
+    # None for a line that is torn (still being written) or not an event
+    if not line.endswith(b"\n"):
+        return None
+    try:
+        event = json.loads(line)
+    except ValueError:
+        return None
+    return event if isinstance(event, dict) and "timestamp" in event else None
@@ -1,16 +1,120 @@
+import atexit
 import os
+import queue
+import threading
+import time
 from datetime import datetime
 
+from .event_log import EVENT_LOG_FILE, EventLogWriter
+from .log_rotation import RotatingFile
+
 LOG_FILE = "Logs/improvement_log.txt"
+LOG_HEADER = "=== Improvement Log Start ===\n"
+# "text" (LOG_FILE), "jsonl" (EVENT_LOG_FILE, queryable by time, see event_log.py) or "both"
+LOG_FORMAT = os.getenv("IMPROVEMENT_LOG_FORMAT", "both")
+
+# Background writer: lines are written in batches of up to LOG_FLUSH_BATCH,
+# at the latest LOG_FLUSH_INTERVAL seconds after the first queued line.
+# A full queue blocks the caller instead of dropping lines. A batch that cannot
+# be written is reported and dropped, so the writer keeps draining the queue.
+LOG_FLUSH_BATCH = int(os.getenv("LOG_FLUSH_BATCH", "256"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1.0"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "100000"))
+
+_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_writer = None
+_writer_lock = threading.Lock()
+_STOP = object()
 
 def ensure_log_file():
     os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
     if not os.path.exists(LOG_FILE):
         with open(LOG_FILE, "w") as f:
-            f.write("=== Improvement Log Start ===\n")
+            f.write(LOG_HEADER)
 
 def log_event(category, message):
-    ensure_log_file()
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(LOG_FILE, "a") as f:
-        f.write(f"[{timestamp}] [{category}] {message}\n")
+    # Only enqueues; formatting and writing happen in the background thread
+    if _writer is None or not _writer.is_alive():
+        _start_writer()
+    _queue.put((time.time(), category, message))
+
+def flush(timeout=None):
+    """Wait until every event logged so far is written to the file."""
+    if _writer is None or not _writer.is_alive():
+        return True
+    done = threading.Event()
+    _queue.put(done)
+    return done.wait(timeout)
+
+def _start_writer():
+    # Also restarts a writer that died, so a full queue cannot block log_event forever
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            if _writer is None:
+                atexit.register(_shutdown)
+            _writer = threading.Thread(target=_write_loop, name="improvement-log-writer", daemon=True)
+            _writer.start()
+
+def _write_loop():
+    outputs = {}  # Opened on first use and again after a failed write
+    batch = []
+    deadline = 0.0
+    try:
+        while True:
+            try:
+                item = _queue.get(timeout=max(0.0, deadline - time.monotonic()) if batch else None)
+            except queue.Empty:
+                item = None  # Interval is up
+            if isinstance(item, tuple):
+                batch.append(item)
+                if len(batch) == 1:
+                    deadline = time.monotonic() + LOG_FLUSH_INTERVAL
+                if len(batch) < LOG_FLUSH_BATCH:
+                    continue
+            if batch:
+                _write_batch(outputs, batch)
+                batch.clear()
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is _STOP:
+                return
+    finally:
+        for name in list(outputs):
+            _close_output(outputs, name)
+
+def _write_batch(outputs, batch):
+    for name in ("text", "jsonl"):
+        if LOG_FORMAT not in (name, "both"):
+            continue
+        try:
+            if name not in outputs:
+                # Every text segment starts with the header; full segments go to Logs/backups
+                outputs[name] = (RotatingFile(LOG_FILE, header=LOG_HEADER) if name == "text"
+                                 else EventLogWriter(EVENT_LOG_FILE))
+            if name == "text":
+                outputs[name].write("".join(
+                    f"[{datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')}] [{category}] {message}\n"
+                    for ts, category, message in batch
+                ))
+                outputs[name].flush()
+            else:
+                outputs[name].write(batch)
+        except Exception as e:
+            # Any error (disk full, permissions, an unserializable message) only costs this batch
+            print(f"[improvement_logger] {len(batch)} events not written to the {name} log: {e}")
+            _close_output(outputs, name)
+
+def _close_output(outputs, name):
+    f = outputs.pop(name, None)
+    if f is not None:
+        try:
+            f.close()
+        except Exception:
+            pass
+
+def _shutdown():
+    # Runs at interpreter exit: write whatever is still queued
+    if _writer is not None and _writer.is_alive():
+        _queue.put(_STOP)
+        _writer.join(timeout=10)
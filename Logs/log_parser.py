@@ -1,9 +1,26 @@
+import argparse
+import hashlib
+import json
 import os
+import re
+import sys
 import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
 
 LOGS_DIR = "Logs"
 KEYWORDS = ["Improvement", "Booking", "Prompt", "Client", "SelfImprove", "Inventory"]
 
+# Incremental mode: per-file offsets and counters from the previous run
+STATE_FILE = os.getenv("LOG_PARSER_STATE", os.path.join(LOGS_DIR, ".log_parser_state.json"))
+FINGERPRINT_BYTES = 1024  # Start of the file, to notice a replaced file with a reused inode
+READ_BLOCK = 4 * 1024 * 1024
+
+# Parallel mode: files and ranges of large files are counted in a process pool
+LOG_PARSER_WORKERS = int(os.getenv("LOG_PARSER_WORKERS", "1"))  # 0 = one per CPU
+CHUNK_BYTES = int(os.getenv("LOG_PARSER_CHUNK_MB", "64")) * 1024 * 1024
+
 def parse_log_file(filepath):
     summary = {
         "lines": 0,
@@ -14,26 +31,220 @@ def parse_log_file(filepath):
     for key in KEYWORDS:
         summary["matches"][key] = 0
 
-    with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
-        for line in f:
-            summary["lines"] += 1
-            for key in KEYWORDS:
-                if key.lower() in line.lower():
-                    summary["matches"][key] += 1
+    with open(filepath, "rb") as f:
+        _, tail = _scan(f, 0, os.fstat(f.fileno()).st_size, summary)
+    if tail:
+        _count(tail + b"\n", summary)
+
+    return summary
+
+def parse_log_file_incremental(filepath, state):
+    """
+    Same summary as parse_log_file, reading only what was appended since the
+    last run. ``state`` is the dict from load_state() and is updated in place.
+
+    A different inode, a file shorter than the stored offset or a changed
+    start of the file means it was rotated or truncated: it is read again
+    from byte 0. Only complete lines are stored; a trailing line without
+    newline is counted for this summary and read again next time.
+    """
+    stat = os.stat(filepath)
+    with open(filepath, "rb") as f:
+        entry = _resume(f, stat, state, filepath)
+        offset, tail = _scan(f, entry["offset"], stat.st_size, entry)
+        _commit(f, entry, offset, stat.st_size)
+    return _summary(entry, tail, stat)
+
+def parse_log_files(paths, workers=None, state=None):
+    """
+    Summaries of several files, the same as parse_log_file (or, with
+    ``state``, parse_log_file_incremental) gives for each of them.
+
+    With more than one worker the files, and large files in ranges of about
+    CHUNK_BYTES cut after a newline, are counted in a process pool and the
+    counts added up per file.
+
+    Args:
+        paths: Log files
+        workers: Processes; None = LOG_PARSER_WORKERS, 0 = one per CPU
+        state: Dict from load_state() for the incremental mode, updated in place
+
+    Returns:
+        Dict: Summary per path, in the order of ``paths``
+    """
+    workers = LOG_PARSER_WORKERS if workers is None else workers
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        if state is None:
+            return {path: parse_log_file(path) for path in paths}
+        return {path: parse_log_file_incremental(path, state) for path in paths}
+
+    jobs = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path in paths:
+            stat = os.stat(path)
+            with open(path, "rb") as f:
+                entry = _resume(f, stat, state, path)
+                ranges = _split(f, entry["offset"], stat.st_size)
+            keywords = list(entry["matches"])
+            futures = [pool.submit(_count_range, path, start, end, keywords) for start, end in ranges]
+            jobs.append((path, stat, entry, futures))
+
+        summaries = {}
+        for path, stat, entry, futures in jobs:
+            tail = b""
+            for future in futures:
+                counts, tail = future.result()  # Only the last range can end without newline
+                entry["lines"] += counts["lines"]
+                for key, count in counts["matches"].items():
+                    entry["matches"][key] += count
+            if state is not None:
+                with open(path, "rb") as f:
+                    _commit(f, entry, stat.st_size - len(tail), stat.st_size)
+            summaries[path] = _summary(entry, tail, stat)
+    return summaries
+
+def load_state(path=STATE_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        state = {}
+    # Counters for another keyword list are useless, start over
+    if state.get("keywords") != KEYWORDS:
+        state = {"keywords": list(KEYWORDS), "files": {}}
+    return state
+
+def save_state(state, path=STATE_FILE):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def _resume(f, stat, state, filepath):
+    # Stored counters to continue from, or zeros from byte 0
+    entry = state["files"].get(os.path.abspath(filepath)) if state is not None else None
+    if entry is None or _replaced(f, stat, entry):
+        entry = {"inode": stat.st_ino, "offset": 0, "fingerprint": "", "fingerprint_bytes": 0,
+                 "lines": 0, "matches": {k: 0 for k in KEYWORDS}}
+        if state is not None:
+            state["files"][os.path.abspath(filepath)] = entry
+    return entry
+
+def _commit(f, entry, offset, size):
+    entry["offset"] = offset
+    entry["size"] = size
+    if entry["fingerprint_bytes"] < min(offset, FINGERPRINT_BYTES):
+        f.seek(0)
+        head = f.read(min(offset, FINGERPRINT_BYTES))
+        entry["fingerprint"], entry["fingerprint_bytes"] = hashlib.sha1(head).hexdigest(), len(head)
 
+def _summary(entry, tail, stat):
+    summary = {
+        "lines": entry["lines"],
+        "matches": dict(entry["matches"]),
+        "last_modified": time.ctime(stat.st_mtime)
+    }
+    if tail:
+        _count(tail + b"\n", summary)
     return summary
 
-def summarize_logs():
+def _replaced(f, stat, entry):
+    if stat.st_ino != entry["inode"] or stat.st_size < entry["offset"]:
+        return True
+    f.seek(0)
+    return hashlib.sha1(f.read(entry["fingerprint_bytes"])).hexdigest() != entry["fingerprint"]
+
+def _split(f, start, end):
+    # Ranges of about CHUNK_BYTES, each cut right after a newline; the last one ends at ``end``
+    ranges = []
+    while end - start > CHUNK_BYTES:
+        f.seek(start + CHUNK_BYTES - 1)
+        f.readline()
+        cut = f.tell()
+        if cut >= end:
+            break
+        ranges.append((start, cut))
+        start = cut
+    if start < end:
+        ranges.append((start, end))
+    return ranges
+
+def _count_range(path, start, end, keywords):
+    # Runs in a pool worker
+    summary = {"lines": 0, "matches": {key: 0 for key in keywords}}
+    with open(path, "rb") as f:
+        _, tail = _scan(f, start, end, summary)
+    return summary, tail
+
+def _scan(f, start, end, summary):
+    # Counts the complete lines in [start, end); returns the offset after the last one and the rest
+    f.seek(start)
+    pos = start
+    carry = b""
+    while pos < end:
+        block = f.read(min(READ_BLOCK, end - pos))
+        if not block:
+            break
+        pos += len(block)
+        block = carry + block
+        cut = block.rfind(b"\n") + 1
+        carry = block[cut:]
+        if cut:
+            _count(block[:cut], summary)
+    return pos - len(carry), carry
+
+def _count(data, summary):
+    # data ends with a newline. Lowercased once per block, then one C-level scan per keyword
+    summary["lines"] += data.count(b"\n")
+    lowered_bytes = data.lower() if _bytes_match_text(data) else None
+    lowered_text = None
+    for key in summary["matches"]:
+        needle = key.lower()
+        if lowered_bytes is not None and needle.isascii():
+            summary["matches"][key] += _lines_containing(lowered_bytes, needle.encode("ascii"))
+            continue
+        if lowered_text is None:
+            lowered_text = data.decode("utf-8", errors="ignore").lower()
+        summary["matches"][key] += _lines_containing(lowered_text, needle)
+
+def _bytes_match_text(data):
+    # bytes.lower() finds the same ASCII keywords as str.lower() on the decoded text, unless
+    # invalid UTF-8 gets dropped (which could join a keyword) or the text holds one of the
+    # two non-ASCII letters that lowercase to ASCII
+    if data.isascii():
+        return True
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return False
+    return "\u0130" not in text and "\u212a" not in text
+
+def _lines_containing(text, needle):
+    newline = b"\n" if isinstance(text, bytes) else "\n"
+    if not needle:
+        return text.count(newline)
+    # Each match runs from the first occurrence to the end of its line
+    return len(_line_pattern(needle).findall(text))
+
+@lru_cache(maxsize=256)
+def _line_pattern(needle):
+    return re.compile(re.escape(needle) + (b"[^\n]*" if isinstance(needle, bytes) else "[^\n]*"))
+
+def summarize_logs(incremental=False, workers=None):
     print("\n🧾 Log Summary Report\n")
     files = [f for f in os.listdir(LOGS_DIR) if f.endswith(".log") or f.endswith(".txt")]
-    
+    state = load_state() if incremental else None
+
     if not files:
         print("No log files found.")
-        return
+        return {}
 
-    for file in files:
-        path = os.path.join(LOGS_DIR, file)
-        data = parse_log_file(path)
+    paths = [os.path.join(LOGS_DIR, file) for file in files]
+    results = parse_log_files(paths, workers, state)
+    summaries = {}
+    for file, path in zip(files, paths):
+        data = summaries[file] = results[path]
         print(f"📄 {file}")
         print(f"   🕒 Last Modified: {data['last_modified']}")
         print(f"   🧾 Total Lines: {data['lines']}")
@@ -42,6 +253,60 @@ def summarize_logs():
                 print(f"   🔍 {key}: {count}")
         print("")
 
-if __name__ == "__main__":
-    summarize_logs()
+    if incremental:
+        # Forget files that no longer exist
+        seen = {os.path.abspath(path) for path in paths}
+        state["files"] = {path: entry for path, entry in state["files"].items() if path in seen}
+        save_state(state)
+    return summaries
 
+def print_events(category=None, since=None, until=None, path=None, include_archives=False, as_json=False):
+    """Print the structured events of a category in a time window (see event_log.py)."""
+    event_log = _event_log()
+    count = 0
+    for event in event_log.query_events(category, since, until, path or event_log.EVENT_LOG_FILE, include_archives):
+        print(json.dumps(event, ensure_ascii=False) if as_json else event_log.format_event(event))
+        count += 1
+    return count
+
+def _event_log():
+    # Also works when run as a script from Logs/
+    try:
+        from . import event_log
+    except ImportError:
+        sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from Logs import event_log
+    return event_log
+
+def _parse_time(value):
+    # "2026-10-18 12:00[:00]", epoch seconds, or an age such as "90m", "1h", "2d"
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", value)
+    if match:
+        return time.time() - float(match.group(1)) * units[match.group(2)]
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time: {value!r}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize the HSphere log files")
+    parser.add_argument("--incremental", action="store_true", help="Only read what was appended since the last run")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default LOG_PARSER_WORKERS, 0 = one per CPU)")
+    commands = parser.add_subparsers(dest="command")
+    events = commands.add_parser("events", help="Structured improvement events of a category in a time window")
+    events.add_argument("--category", help="Category or pattern, e.g. 'Booking*'")
+    events.add_argument("--since", type=_parse_time, help="'YYYY-MM-DD HH:MM[:SS]', epoch seconds or an age like 1h")
+    events.add_argument("--until", type=_parse_time, help="Same formats as --since")
+    events.add_argument("--file", help="JSONL event log (default Logs/improvement_events.jsonl)")
+    events.add_argument("--archives", action="store_true", help="Also read the compressed segments in Logs/backups")
+    events.add_argument("--json", action="store_true", help="Print the events as JSON lines")
+    args = parser.parse_args()
+    if args.command == "events":
+        print_events(args.category, args.since, args.until, args.file, args.archives, args.json)
+    else:
+        summarize_logs(incremental=args.incremental, workers=args.workers)
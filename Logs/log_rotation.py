@@ -0,0 +1,276 @@
+"""
+Rotation for the HSphere log files.
+
+A RotatingFile appends to a log and starts a new segment once the current one
+would grow past LOG_ROTATE_MAX_BYTES or is older than LOG_ROTATE_MAX_AGE
+seconds. The full segment is renamed into the backup directory (Logs/backups
+next to the log) and gzipped there by a background thread, so a write never
+costs more than a rename. Retention keeps the newest LOG_BACKUP_KEEP archives
+per log and drops archives older than LOG_BACKUP_MAX_AGE_DAYS.
+
+Several processes may append to one log. Each write goes out in a single
+O_APPEND write call, so whole lines never interleave. Writes hold a shared
+lock on <log>.lock and rotation holds it exclusively, so no line lands in a
+segment that is being moved away. A writer whose segment another process
+rotated notices the new inode and reopens the log.
+"""
+
+import gzip
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no lock between processes, the inode check still applies
+    fcntl = None
+
+LOG_ROTATE_MAX_BYTES = int(os.getenv("LOG_ROTATE_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_ROTATE_MAX_AGE = float(os.getenv("LOG_ROTATE_MAX_AGE", str(7 * 86400)))  # 0 = size only
+LOG_BACKUP_DIR = os.getenv("LOG_BACKUP_DIR", "")  # Empty = "backups" next to the log
+LOG_BACKUP_KEEP = int(os.getenv("LOG_BACKUP_KEEP", "30"))  # 0 = no limit
+LOG_BACKUP_MAX_AGE_DAYS = float(os.getenv("LOG_BACKUP_MAX_AGE_DAYS", "90"))  # 0 = no limit
+
+SEGMENT_TIME_FORMAT = "%Y%m%d-%H%M%S"
+
+_archive_queue = queue.Queue()
+_archiver = None
+_archiver_lock = threading.Lock()
+
+
+def backup_dir_for(path):
+    return LOG_BACKUP_DIR or os.path.join(os.path.dirname(os.path.abspath(path)), "backups")
+
+
+def archives(path, backup_dir=None):
+    """Compressed segments of ``path``, oldest first."""
+    backup_dir = backup_dir or backup_dir_for(path)
+    if not os.path.isdir(backup_dir):
+        return []
+    pattern = _segment_pattern(os.path.basename(path))
+    matches = [m for m in map(pattern.match, os.listdir(backup_dir)) if m and m.group(3)]
+    matches.sort(key=_segment_order)
+    return [os.path.join(backup_dir, m.group(0)) for m in matches]
+
+
+def rotated_at(archive):
+    """Time a segment was rotated (its newest event is not later), from its name."""
+    stamp = re.search(r"\.(\d{8}-\d{6})(?:-\d+)?(?:\.gz)?$", archive).group(1)
+    return time.mktime(time.strptime(stamp, SEGMENT_TIME_FORMAT))
+
+
+def wait_for_archiver():
+    """Block until every rotated segment so far is compressed and pruned."""
+    if _archiver is not None:
+        _archive_queue.join()
+
+
+class RotatingFile:
+    """Append-only log file that rotates into compressed backups. Not thread-safe."""
+
+    def __init__(self, path, header="", max_bytes=None, max_age=None, backup_dir=None, on_rotate=None,
+                 on_reopen=None):
+        self.path = path
+        self.header = header.encode("utf-8")
+        self.max_bytes = LOG_ROTATE_MAX_BYTES if max_bytes is None else max_bytes
+        self.max_age = LOG_ROTATE_MAX_AGE if max_age is None else max_age
+        self.backup_dir = backup_dir or backup_dir_for(path)
+        self.on_rotate = on_rotate  # Called with the rotated segment's path, after the new one is open
+        self.on_reopen = on_reopen  # Called after switching to a segment another process started
+        self._file = None
+        self._last_rotation = ("", 0)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Writers hold it shared, rotation exclusively
+        self._lock = open(f"{path}.lock", "ab") if fcntl is not None else None
+        with self._locked():
+            self._open()
+        # Segments left uncompressed by an earlier process
+        _submit(("sweep", self.path, self.backup_dir))
+
+    def write(self, data):
+        """
+        Append ``data`` (str or bytes), rotating first if it is due.
+
+        Returns:
+            int: Offset of ``data`` in the current segment
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        # Common case: our segment is still the log and not due; a rotation cannot start meanwhile
+        with self._locked(shared=True):
+            if self._current() and not (self.size > len(self.header) and self._due(len(data))):
+                return self._append(data)
+        with self._locked():
+            if not self._current():
+                self._reopen()  # Another process rotated the log
+            if self.size > len(self.header) and self._due(len(data)):
+                self._rotate()
+            return self._append(data)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    def rotate(self):
+        """Move the current segment to the backup directory and start a new one."""
+        with self._locked():
+            if not self._current():
+                # Another process rotated it meanwhile; its new segment is ours too
+                self._reopen()
+                return
+            self._rotate()
+
+    def _rotate(self):
+        # Called with the exclusive lock held
+        self._file.close()
+        os.makedirs(self.backup_dir, exist_ok=True)
+        stamp = time.strftime(SEGMENT_TIME_FORMAT)
+        # Counting on from our last rotation keeps names ordered even after pruning
+        n = self._last_rotation[1] + 1 if self._last_rotation[0] == stamp else 0
+        base = os.path.join(self.backup_dir, f"{os.path.basename(self.path)}.{stamp}")
+        while os.path.exists(_segment_name(base, n)) or os.path.exists(_segment_name(base, n) + ".gz"):
+            n += 1
+        self._last_rotation = (stamp, n)
+        target = _segment_name(base, n)
+        os.replace(self.path, target)
+        self._open()
+        if self.on_rotate is not None:
+            self.on_rotate(target)
+        _submit(("archive", target, self.path, self.backup_dir))
+
+    def _append(self, data):
+        offset = self.size
+        view = memoryview(data)
+        while view:
+            view = view[self._file.write(view):]
+        self.size += len(data)
+        return offset
+
+    def _due(self, incoming):
+        if self.max_bytes and self.size + incoming > self.max_bytes:
+            return True
+        return bool(self.max_age) and time.time() - self.started >= self.max_age
+
+    def _current(self):
+        # True while the path still names our segment; its size then includes other writers' lines
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        if stat.st_ino != self.inode:
+            return False
+        self.size = stat.st_size
+        return True
+
+    def _reopen(self):
+        self._file.close()
+        self._open()
+        if self.on_reopen is not None:
+            self.on_reopen()
+
+    @contextmanager
+    def _locked(self, shared=False):
+        if self._lock is None:
+            yield
+            return
+        fcntl.flock(self._lock.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock.fileno(), fcntl.LOCK_UN)
+
+    def _open(self):
+        # Called with the exclusive lock held, so only one process writes the header of a new segment
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Unbuffered: every write is one O_APPEND write call
+        self._file = open(self.path, "ab", buffering=0)
+        stat = os.fstat(self._file.fileno())
+        self.inode = stat.st_ino
+        self.size = stat.st_size
+        # A segment's age counts from its last write before we opened it
+        self.started = stat.st_mtime if self.size else time.time()
+        if not self.size and self.header:
+            self._file.write(self.header)
+            self.size = len(self.header)
+
+
+def _segment_pattern(basename):
+    # name.<rotated at>[-<n>][.gz]; n counts segments rotated within the same second
+    return re.compile(re.escape(basename) + r"\.(\d{8}-\d{6})(?:-(\d+))?(\.gz)?$")
+
+
+def _segment_name(base, n):
+    return f"{base}-{n}" if n else base
+
+
+def _segment_order(match):
+    return match.group(1), int(match.group(2) or 0)
+
+
+def _submit(task):
+    global _archiver
+    with _archiver_lock:
+        if _archiver is None:
+            _archiver = threading.Thread(target=_archive_loop, name="log-archiver", daemon=True)
+            _archiver.start()
+    _archive_queue.put(task)
+
+
+def _archive_loop():
+    while True:
+        task = _archive_queue.get()
+        try:
+            if task[0] == "archive":
+                _compress(task[1])
+                _prune(task[2], task[3])
+            else:
+                _sweep(task[1], task[2])
+        except OSError as e:
+            print(f"[log_rotation] {task[0]} failed: {e}")
+        finally:
+            _archive_queue.task_done()
+
+
+def _compress(segment):
+    # A crash leaves at most the raw segment and a .tmp, both redone by the next sweep
+    if not os.path.exists(segment):
+        return  # Already picked up by a sweep
+    tmp_path = f"{segment}.gz.tmp"
+    with open(segment, "rb") as src, gzip.open(tmp_path, "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.replace(tmp_path, f"{segment}.gz")
+    os.remove(segment)
+
+
+def _sweep(path, backup_dir):
+    if not os.path.isdir(backup_dir):
+        return
+    pattern = _segment_pattern(os.path.basename(path))
+    for match in filter(None, map(pattern.match, os.listdir(backup_dir))):
+        if not match.group(3):
+            _compress(os.path.join(backup_dir, match.group(0)))
+    _prune(path, backup_dir)
+
+
+def _prune(path, backup_dir):
+    kept = archives(path, backup_dir)
+    if LOG_BACKUP_KEEP and len(kept) > LOG_BACKUP_KEEP:
+        for archive in kept[:-LOG_BACKUP_KEEP]:
+            os.remove(archive)
+        kept = kept[-LOG_BACKUP_KEEP:]
+    if LOG_BACKUP_MAX_AGE_DAYS:
+        cutoff = time.time() - LOG_BACKUP_MAX_AGE_DAYS * 86400
+        for archive in kept:
+            if os.path.getmtime(archive) < cutoff:
+                os.remove(archive)
@@ -1,14 +1,22 @@
+import heapq
 import json
 import os
+import sys
 import time
+from itertools import islice
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))  # Root directory for api.services
 from monitor import generate_report
 from log_parser import summarize_logs  # Optional call
+from api.services.memory_log import MemoryIndex, event_timestamp, get_memory_log
 
 class CoreBrain:
     def __init__(self):
         self.system_map = {}
         self.short_term_memory = []
-        self.long_term_memory_path = "Data/memory_long.json"
+        self.short_term_index = MemoryIndex()  # Positions in short_term_memory by time and event type
+        self._committed = set()  # Short-term positions that are also in long-term memory
+        self.long_term_memory = get_memory_log()  # Append-only Data/memory_long.jsonl
 
     def perceive_system(self):
         generate_report()  # Ask monitor for status
@@ -23,24 +31,29 @@ class CoreBrain:
             return {}
 
     def remember(self, event, important=False):
+        self.short_term_index.add(event, len(self.short_term_memory))
         self.short_term_memory.append(event)
-        if important:
-            self._commit_to_longterm(event)
+        if important and self._commit_to_longterm(event):
+            self._committed.add(len(self.short_term_memory) - 1)
+
+    def recall(self, event=None, since=None, until=None, limit=None, newest_first=True):
+        # Events from long-term memory and this session, e.g. recall("BookingTest*", since=time.time() - 3600)
+        # or recall("Startup", limit=5); event is a type or fnmatch pattern, both memories are queried via their indexes
+        long_term = self.long_term_memory.query(event, since, until, limit, newest_first)
+        positions = self.short_term_index.select(event, since, until, None, newest_first)
+        short_term = [self.short_term_memory[p] for p in positions if p not in self._committed]
+        merged = heapq.merge(long_term, short_term, key=event_timestamp, reverse=newest_first)
+        return list(islice(merged, limit))
 
     def _commit_to_longterm(self, event):
         try:
-            if os.path.exists(self.long_term_memory_path):
-                with open(self.long_term_memory_path, "r") as f:
-                    memory = json.load(f)
-            else:
-                memory = []
-
-            memory.append(event)
-            with open(self.long_term_memory_path, "w") as f:
-                json.dump(memory, f, indent=2)
+            # One appended line instead of reading and rewriting the whole memory file
+            self.long_term_memory.append(event)
             print("[CoreBrain] Event committed to long-term memory.")
+            return True
         except Exception as e:
             print(f"[CoreBrain] Memory error: {e}")
+            return False
 
     def act_on_trigger(self, trigger):
         print(f"[CoreBrain] Reacting to trigger: {trigger}")
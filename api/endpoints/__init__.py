@@ -2,3 +2,5 @@ from .booking      import router as booking
 from .clients      import router as clients
 from .availability import router as availability
 from .services     import router as services
+from .metrics      import router as metrics
+from .holds        import router as holds
@@ -1,8 +1,22 @@
-from fastapi import APIRouter, Query
-from api.services.phorest_api_client import get_available_slots
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+from api.services.phorest_api_client import get_available_slots, get_available_slots_batch
 
 router = APIRouter()
 
+# Obergrenzen für Batch-Anfragen (Tage und Zellen = Staff x Services x Tage)
+MAX_BATCH_DAYS = 31
+MAX_BATCH_CELLS = 500
+
+class BatchAvailabilityRequest(BaseModel):
+    staff_ids: List[str]
+    service_ids: List[str]
+    date_from: str
+    date_to: str
+
 @router.get("/")
 async def check_availability(
     staff_id: str = Query(..., description="Staff member ID"),
@@ -10,4 +24,33 @@ async def check_availability(
     date: str = Query(..., description="Date in YYYY-MM-DD format")
 ):
     """Check available time slots"""
-    return get_available_slots(staff_id, service_id, date)
\ No newline at end of file
+    return await get_available_slots(staff_id, service_id, date)
+
+@router.post("/batch")
+async def check_availability_batch(req: BatchAvailabilityRequest):
+    """Check available time slots for several staff members, services and days at once"""
+    try:
+        start = datetime.strptime(req.date_from, "%Y-%m-%d")
+        end = datetime.strptime(req.date_to, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+    
+    num_days = (end - start).days + 1
+    if num_days < 1:
+        raise HTTPException(status_code=400, detail="date_to must not be before date_from")
+    if num_days > MAX_BATCH_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_BATCH_DAYS} days")
+    
+    num_cells = len(req.staff_ids) * len(req.service_ids) * num_days
+    if num_cells > MAX_BATCH_CELLS:
+        raise HTTPException(status_code=400, detail=f"Batch is limited to {MAX_BATCH_CELLS} cells, got {num_cells}")
+    
+    dates = [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(num_days)]
+    cells = await get_available_slots_batch(req.staff_ids, req.service_ids, dates)
+    failed = sum(1 for cell in cells if not cell["success"])
+    
+    return {
+        "success": True,
+        "data": {"cells": cells, "failed": failed},
+        "message": f"Checked {len(cells)} cells, {failed} failed"
+    }
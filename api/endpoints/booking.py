@@ -1,6 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Response
 from pydantic import BaseModel
-from api.services.phorest_api_client import create_appointment
+from api.services.phorest_api_client import create_appointment, get_service_duration
+from api.services.idempotency import IdempotencyKeyMismatch, fingerprint, idempotency_store
+from api.services.slot_holds import slot_holds
 
 router = APIRouter()
 
@@ -11,8 +16,12 @@ class BookingRequest(BaseModel):
     service_id: str
 
 @router.post("/book_appointment")
-async def make_booking(req: BookingRequest):
-    """Book an appointment using the Phorest API"""
+async def make_booking(
+    req: BookingRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """Book an appointment using the Phorest API (retries with the same Idempotency-Key book only once)"""
     # Transform to Phorest format
     phorest_payload = {
         "clientId": req.client_id,
@@ -21,8 +30,30 @@ async def make_booking(req: BookingRequest):
         "serviceId": req.service_id
     }
     
-    # Call Phorest API
-    result = await create_appointment(phorest_payload)
+    # Slots held by someone else (see /holds) must not be booked directly
+    try:
+        start = datetime.fromisoformat(req.datetime_str.replace("Z", ""))
+    except ValueError:
+        start = None
+    if start is not None:
+        duration = await get_service_duration(req.service_id)
+        held_by = slot_holds.conflict(req.stylist_id, start.strftime("%Y-%m-%d"),
+                                      start.hour * 60 + start.minute, duration)
+        if held_by is not None:
+            raise HTTPException(status_code=409, detail=f"Booking failed: time slot is currently held ({held_by})")
+    
+    # Call Phorest API, at most once per Idempotency-Key
+    if idempotency_key:
+        try:
+            result, replayed = await idempotency_store.run(
+                idempotency_key, fingerprint(phorest_payload), lambda: create_appointment(phorest_payload)
+            )
+        except IdempotencyKeyMismatch as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+    else:
+        result = await create_appointment(phorest_payload)
     
     # Handle error
     if not result.get("success", False):
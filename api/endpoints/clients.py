@@ -1,20 +1,56 @@
-from fastapi import APIRouter, HTTPException, Query
-from api.services.phorest_api_client import search_clients, get_client
+import json
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from api.services.phorest_api_client import (
+    search_clients, get_client, CLIENT_STREAM_FIRST_PAGE, CLIENT_STREAM_PAGE_SIZE
+)
 
 router = APIRouter(tags=["clients"])
 
+NDJSON = "application/x-ndjson"
+
 @router.get("/search")
-def clients_search(query: str = Query(..., description="Suchbegriff für Name, Telefon, Email")):
-    """GET /clients/search?query=..."""
-    result = search_clients(query)
+async def clients_search(
+    request: Request,
+    query: str = Query(..., description="Suchbegriff für Name, Telefon, Email"),
+    limit: int = Query(10, ge=1, le=1000, description="Seitengrösse"),
+    cursor: Optional[str] = Query(None, description="nextCursor der vorherigen Seite"),
+    fuzzy: bool = Query(False, description="Tippfehler im Namen tolerieren, Treffer nach Ähnlichkeit sortiert"),
+    min_score: Optional[float] = Query(None, ge=0, le=1, description="Mindest-Ähnlichkeit für fuzzy=true"),
+    stream: bool = Query(False, description="Alle Treffer als NDJSON streamen (auch per Accept: application/x-ndjson)")
+):
+    """GET /clients/search?query=...&cursor=...&fuzzy=true&stream=true"""
+    stream = stream or NDJSON in request.headers.get("accept", "")
+    # Beim Streamen erst eine kleine Seite holen: Fehler gibt es noch als Statuscode, das erste Byte kommt schnell
+    page_size = CLIENT_STREAM_FIRST_PAGE if stream else limit
+    result = await search_clients(query, page_size, fuzzy=fuzzy, min_score=min_score, cursor=cursor)
     if not result.get("success"):
-        raise HTTPException(502, detail=result.get("message", "Phorest-API Fehler"))
-    return result
+        raise HTTPException(result.get("status_code", 502), detail=result.get("message", "Phorest-API Fehler"))
+    if not stream:
+        return result
+
+    async def lines():
+        page = result
+        while True:
+            # Eine Seite pro Chunk, nie mehr als eine Seite im Speicher
+            yield "".join(json.dumps(client, ensure_ascii=False) + "\n" for client in page["data"]["clients"])
+            next_cursor = page["data"]["nextCursor"]
+            if not next_cursor:
+                return
+            page = await search_clients(query, CLIENT_STREAM_PAGE_SIZE, fuzzy=fuzzy, min_score=min_score, cursor=next_cursor)
+            if not page.get("success"):
+                # Status ist schon gesendet: Fehler als letzte Zeile, mit Cursor zum Fortsetzen
+                yield json.dumps({"error": page.get("message", "Phorest-API Fehler"), "nextCursor": next_cursor}) + "\n"
+                return
+
+    return StreamingResponse(lines(), media_type=NDJSON)
 
 @router.get("/{client_id}")
-def clients_get(client_id: str):
+async def clients_get(client_id: str):
     """GET /clients/{client_id}"""
-    result = get_client(client_id)
+    result = await get_client(client_id)
     if not result.get("success"):
         raise HTTPException(404, detail=result.get("message", "Client nicht gefunden"))
     return result
\ No newline at end of file
@@ -0,0 +1,108 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Response
+from pydantic import BaseModel, Field
+from api.services.phorest_api_client import create_appointment, get_available_slots, get_service_duration
+from api.services.idempotency import IdempotencyKeyMismatch, fingerprint, idempotency_store
+from api.services.slot_holds import slot_holds
+
+router = APIRouter()
+
+class HoldRequest(BaseModel):
+    client_id: str
+    stylist_id: str
+    datetime_str: str
+    service_id: str
+    ttl_seconds: Optional[float] = Field(None, gt=0)
+
+def parse_start(datetime_str: str):
+    """'2025-07-15 14:30' oder ISO-Format -> (Datum, Minuten seit Mitternacht)"""
+    try:
+        start = datetime.fromisoformat(datetime_str.replace("Z", ""))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid datetime_str '{datetime_str}'")
+    return start.strftime("%Y-%m-%d"), start.hour * 60 + start.minute
+
+@router.post("/holds")
+async def create_hold(req: HoldRequest):
+    """Reserve a free slot for a few minutes until it is confirmed or released"""
+    date, start = parse_start(req.datetime_str)
+
+    # Nur Slots halten, die Phorest als frei meldet
+    availability = await get_available_slots(req.stylist_id, req.service_id, date)
+    if not availability.get("success"):
+        raise HTTPException(status_code=502, detail=availability.get("message", "Availability check failed"))
+    time_part = f"{start // 60:02d}:{start % 60:02d}"
+    if time_part not in availability["data"].get("availableSlots", []):
+        raise HTTPException(status_code=409, detail=f"No free slot at {time_part}")
+
+    duration = await get_service_duration(req.service_id)
+    hold, conflict = slot_holds.hold(
+        req.stylist_id, date, start, duration, ttl=req.ttl_seconds,
+        clientId=req.client_id, serviceId=req.service_id, startTime=req.datetime_str
+    )
+    if hold is None:
+        raise HTTPException(status_code=409, detail=f"Slot at {time_part} is currently held ({conflict})")
+
+    return {
+        "success": True,
+        "data": hold,
+        "message": f"Slot held for {int(hold['expiresIn'])} seconds"
+    }
+
+@router.get("/holds/{hold_id}")
+async def get_hold(hold_id: str):
+    """Look up an active hold"""
+    hold = slot_holds.get(hold_id)
+    if hold is None:
+        raise HTTPException(status_code=404, detail=f"Hold '{hold_id}' not found or expired")
+    return {"success": True, "data": hold, "message": "Hold is active"}
+
+@router.delete("/holds/{hold_id}")
+async def release_hold(hold_id: str):
+    """Give a held slot back"""
+    if not slot_holds.release(hold_id):
+        raise HTTPException(status_code=404, detail=f"Hold '{hold_id}' not found or expired")
+    return {"success": True, "data": {"id": hold_id}, "message": "Hold released"}
+
+@router.post("/holds/{hold_id}/confirm")
+async def confirm_hold(
+    hold_id: str,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """Book a held slot in Phorest (retries with the same Idempotency-Key book only once)"""
+    async def book():
+        hold = slot_holds.claim(hold_id)
+        if hold is None:
+            return {"success": False, "status_code": 404, "message": f"Hold '{hold_id}' not found, expired or already being confirmed"}
+        result = await create_appointment({
+            "clientId": hold["clientId"],
+            "staffId": hold["staffId"],
+            "startTime": hold["startTime"],
+            "serviceId": hold["serviceId"]
+        })
+        # Bei Erfolg belegt der Termin den Slot, bei Fehler ist er ohnehin verloren
+        slot_holds.release(hold_id, confirmed=result.get("success", False))
+        return result
+
+    if idempotency_key:
+        try:
+            result, replayed = await idempotency_store.run(idempotency_key, fingerprint({"holdId": hold_id}), book)
+        except IdempotencyKeyMismatch as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+    else:
+        result = await book()
+
+    if not result.get("success", False):
+        error_message = result.get("message", "Unknown error occurred")
+        raise HTTPException(status_code=result.get("status_code", 502), detail=f"Booking failed: {error_message}")
+
+    return {
+        "success": True,
+        "message": result.get("message", "Appointment booked successfully"),
+        "data": result.get("data", {})
+    }
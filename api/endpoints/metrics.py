@@ -0,0 +1,45 @@
+import asyncio
+
+from fastapi import APIRouter
+from api.services.phorest_api_client import (
+    catalog_cache, availability_cache, single_flight, circuit_breakers, retry_budget, rate_limiter
+)
+from api.services.idempotency import idempotency_store
+from api.services.slot_holds import slot_holds
+from api.services.store import get_store
+
+router = APIRouter()
+
+@router.get("/metrics")
+async def get_metrics():
+    """Cache, coalescing, resilience, rate limit and slot hold counters of the Phorest client layer, plus store row counts"""
+    return {
+        "success": True,
+        "data": {
+            "catalog_cache": catalog_cache.snapshot(),
+            "availability_cache": availability_cache.snapshot(),
+            "single_flight": single_flight.snapshot(),
+            "circuit_breakers": {name: breaker.snapshot() for name, breaker in circuit_breakers.items()},
+            "retry_budget": retry_budget.snapshot(),
+            "rate_limiter": rate_limiter.snapshot(),
+            "idempotency": idempotency_store.snapshot(),
+            "slot_holds": slot_holds.snapshot(),
+            "store": await asyncio.to_thread(_store_counts)
+        },
+        "message": "Metrics retrieved successfully"
+    }
+
+def _store_counts():
+    # Im Worker-Thread: SQLite blockiert, der erste Aufruf öffnet und migriert die Datenbank
+    return get_store().counts()
+
+@router.get("/circuit_breakers")
+async def get_circuit_breakers():
+    """State of the per-endpoint Phorest circuit breakers"""
+    breakers = {name: breaker.snapshot() for name, breaker in circuit_breakers.items()}
+    open_circuits = [name for name, state in breakers.items() if state["state"] != "closed"]
+    return {
+        "success": True,
+        "data": {"circuit_breakers": breakers, "retry_budget": retry_budget.snapshot()},
+        "message": f"{len(open_circuits)} of {len(breakers)} circuits not closed"
+    }
\ No newline at end of file
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 # Wir importieren hier direkt die APIRouter-Instanzen
@@ -5,8 +7,23 @@ from api.endpoints.clients import router as clients_router
 from api.endpoints.availability import router as availability_router
 from api.endpoints.booking import router as booking_router
 from api.endpoints.services import router as services_router
+from api.endpoints.metrics import router as metrics_router
+from api.endpoints.holds import router as holds_router
+from api.services.phorest_api_client import start_http_client, close_http_client, catalog_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Gemeinsamer HTTP-Client (Connection-Pool) für alle Phorest-Aufrufe
+    await start_http_client()
+    # Services/Staff im Hintergrund vorladen und regelmässig auffrischen
+    catalog_cache.start()
+    yield
+    await catalog_cache.stop()
+    await close_http_client()
+
 
-app = FastAPI(title="HSphere Salon API")
+app = FastAPI(title="HSphere Salon API", lifespan=lifespan)
 
 @app.get("/", tags=["root"])
 def read_root():
@@ -20,4 +37,6 @@ def test():
 app.include_router(clients_router, prefix="/clients", tags=["clients"])
 app.include_router(availability_router, prefix="/availability", tags=["availability"])
 app.include_router(booking_router, prefix="", tags=["booking"])
-app.include_router(services_router, prefix="", tags=["services"])
\ No newline at end of file
+app.include_router(holds_router, prefix="", tags=["booking"])
+app.include_router(services_router, prefix="", tags=["services"])
+app.include_router(metrics_router, prefix="", tags=["metrics"])
\ No newline at end of file
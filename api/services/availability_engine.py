@@ -0,0 +1,161 @@
+"""
+Vectorized Availability Engine
+Represents every stylist-day as a minute-granularity occupancy bitmap
+(NumPy bool array of 1440 minutes) and computes free start times for a
+service duration across all requested stylists and dates in one pass,
+instead of scanning each stylist-day's appointments separately.
+"""
+
+from datetime import datetime
+from itertools import compress
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from api.services.schedule import DEFAULT_OPENING_BLOCKS, DEFAULT_SLOT_STEP, format_minutes
+
+MINUTES_PER_DAY = 24 * 60
+MAX_DATES = 366  # Date columns kept before the earliest one is evicted
+
+
+class AvailabilityEngine:
+    """
+    Occupancy bitmaps for all stylists and dates.
+
+    ``busy`` has shape (1440, stylists, dates): minute-major, so the minutes
+    of one window are contiguous planes covering every stylist-day. Rows and
+    columns are added on first use and the array grows by doubling.
+
+    Only stylists of the ``staff_ids`` catalog (if given) and zero-padded
+    YYYY-MM-DD dates are accepted. At most ``max_dates`` date columns are
+    kept: a new date beyond that takes over the column of the earliest one,
+    whose bookings are dropped and reported to ``on_evict``.
+
+    A service of ``duration`` minutes fits at a grid start if the start lies
+    in opening hours and no minute of [start, start + duration) is busy.
+    Opening hours are checked once per candidate start (they are the same
+    for every stylist-day); the busy check is one ``any`` reduction over the
+    window's minute planes for all requested stylists and dates at once.
+    """
+
+    def __init__(self, opening_blocks: Iterable[Tuple[int, int]] = DEFAULT_OPENING_BLOCKS,
+                 step: int = DEFAULT_SLOT_STEP, staff_ids: Optional[Iterable[str]] = None,
+                 max_dates: int = MAX_DATES, on_evict: Optional[Callable[[str], None]] = None):
+        self.step = step
+        self.catalog = frozenset(staff_ids) if staff_ids is not None else None
+        self.max_dates = max_dates
+        self.on_evict = on_evict
+        self.closed = np.ones(MINUTES_PER_DAY, dtype=bool)
+        for block_start, block_end in opening_blocks:
+            self.closed[block_start:block_end] = False
+        self.candidates = np.arange(0, MINUTES_PER_DAY, step)
+        self.labels = [format_minutes(int(start)) for start in self.candidates]
+        self.staff_index: Dict[str, int] = {}
+        self.date_index: Dict[str, int] = {}
+        self.busy = np.zeros((MINUTES_PER_DAY, 4, 8), dtype=bool)
+
+    def validate(self, staff_id: str, date: str) -> None:
+        """Raise ValueError for a stylist outside the catalog or a malformed date."""
+        if self.catalog is not None and staff_id not in self.catalog:
+            raise ValueError(f"Unknown staff ID: {staff_id!r}")
+        try:
+            canonical = datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%d") == date
+        except (TypeError, ValueError):
+            canonical = False
+        # strptime also takes "2025-7-15", which would index and cache the same day twice
+        if not canonical:
+            raise ValueError(f"Invalid date (expected YYYY-MM-DD): {date!r}")
+
+    def _index(self, staff_id: str, date: str, keep: Iterable[str] = ()) -> Tuple[int, int]:
+        """Row and column of a stylist-day, growing the bitmap if needed.
+
+        ``keep`` are dates of the same request that must not be evicted.
+        """
+        i = self.staff_index.get(staff_id)
+        j = self.date_index.get(date)
+        if i is None or j is None:
+            self.validate(staff_id, date)
+        if i is None:
+            i = self.staff_index[staff_id] = len(self.staff_index)
+        if j is None:
+            if len(self.date_index) >= self.max_dates:
+                j = self.date_index[date] = self._evict(keep)
+            else:
+                j = self.date_index[date] = len(self.date_index)
+
+        _, rows, cols = self.busy.shape
+        if i >= rows or j >= cols:
+            new_rows = rows if i < rows else max(rows * 2, i + 1)
+            new_cols = cols if j < cols else max(cols * 2, j + 1)
+            grown = np.zeros((MINUTES_PER_DAY, new_rows, new_cols), dtype=bool)
+            grown[:, :rows, :cols] = self.busy
+            self.busy = grown
+        return i, j
+
+    def _evict(self, keep: Iterable[str]) -> int:
+        # Dates are YYYY-MM-DD, so the smallest string is the earliest day
+        keep = set(keep)
+        oldest = min((date for date in self.date_index if date not in keep), default=None)
+        if oldest is None:
+            raise ValueError(f"More than {self.max_dates} dates in one request")
+        j = self.date_index.pop(oldest)
+        self.busy[:, :, j] = False
+        if self.on_evict is not None:
+            self.on_evict(oldest)
+        return j
+
+    def is_free(self, staff_id: str, date: str, start: int, duration: int) -> bool:
+        """True if [start, start + duration) is within opening hours and unbooked."""
+        i, j = self._index(staff_id, date)
+        end = start + duration
+        if start < 0 or end > MINUTES_PER_DAY or end <= start:
+            return False
+        return not (self.busy[start:end, i, j].any() or self.closed[start:end].any())
+
+    def mark_busy(self, staff_id: str, date: str, start: int, duration: int) -> None:
+        i, j = self._index(staff_id, date)
+        self.busy[start:start + duration, i, j] = True
+
+    def release(self, staff_id: str, date: str, start: int, duration: int) -> None:
+        i, j = self._index(staff_id, date)
+        self.busy[start:start + duration, i, j] = False
+
+    def free_mask(self, staff_ids: List[str], dates: List[str], duration: int) -> np.ndarray:
+        """
+        Boolean array (stylists, dates, candidate starts): True where the service fits.
+
+        Candidate starts are ``self.candidates`` (the slot grid).
+        """
+        if len(set(dates)) > self.max_dates:
+            raise ValueError(f"More than {self.max_dates} dates in one request")
+        for staff_id in staff_ids:
+            for date in dates:
+                self._index(staff_id, date, keep=dates)
+        shape = (len(staff_ids), len(dates))
+        mask = np.zeros(shape + (len(self.candidates),), dtype=bool)
+
+        open_starts = [
+            k for k, start in enumerate(self.candidates)
+            if 0 < duration <= MINUTES_PER_DAY - start and not self.closed[start:start + duration].any()
+        ]
+        if not open_starts or not staff_ids or not dates:
+            return mask
+
+        # Gather only the minutes any open candidate window touches; the grid
+        # is a cross product, so stylists and dates can be taken axis by axis
+        first = int(self.candidates[open_starts[0]])
+        last = int(self.candidates[open_starts[-1]]) + duration
+        rows = np.array([self.staff_index[staff_id] for staff_id in staff_ids], dtype=np.intp)
+        cols = np.array([self.date_index[date] for date in dates], dtype=np.intp)
+        occupied = self.busy[first:last].take(rows, axis=1).take(cols, axis=2)
+        for k in open_starts:
+            offset = int(self.candidates[k]) - first
+            mask[..., k] = ~occupied[offset:offset + duration].any(axis=0)
+        return mask
+
+    def free_slots(self, staff_ids: List[str], dates: List[str], duration: int) -> Dict[Tuple[str, str], List[str]]:
+        """Free "HH:MM" start times for every (staff_id, date) in one vectorized pass."""
+        mask = self.free_mask(staff_ids, dates, duration)
+        cells = mask.reshape(-1, mask.shape[-1]).tolist()
+        keys = [(staff_id, date) for staff_id in staff_ids for date in dates]
+        return {key: list(compress(self.labels, cell)) for key, cell in zip(keys, cells)}
@@ -0,0 +1,286 @@
+"""
+In-memory caches for the Phorest client layer.
+Keeps hot upstream data (services, staff, availability) in process memory
+so that reads do not need a round trip to Phorest.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterator, Optional, Set, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[Dict]]
+
+
+class CatalogCache:
+    """
+    TTL cache with stale-while-revalidate and scheduled refresh-ahead.
+
+    Entries younger than ``ttl`` are served directly. Older entries are still
+    served (up to ``max_stale`` seconds) while exactly one background refresh
+    per key reloads them. A refresher task can additionally reload all
+    registered keys every ``refresh_interval`` seconds so that entries never
+    expire under normal operation.
+
+    Only successful loader results (``success: True``) are stored; failed
+    refreshes keep serving the previous value.
+    """
+
+    def __init__(self, ttl: float, max_stale: float, refresh_interval: Optional[float] = None):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.refresh_interval = refresh_interval if refresh_interval is not None else ttl * 0.8
+        self._entries: Dict[str, Tuple[Dict, float]] = {}
+        self._loaders: Dict[str, Loader] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._refresher: Optional[asyncio.Task] = None
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+
+    def register(self, key: str, loader: Loader) -> None:
+        """Register the loader used for a key (needed for scheduled refresh)."""
+        self._loaders[key] = loader
+
+    async def get(self, key: str) -> Dict:
+        """
+        Return the cached value for a key, loading it on a cold miss.
+
+        Args:
+            key: Cache key registered via ``register``
+
+        Returns:
+            Dict: The loader result (cached or fresh)
+        """
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is not None:
+            value, loaded_at = entry
+            age = now - loaded_at
+            if age < self.ttl:
+                self.stats["hits"] += 1
+                return value
+            if age < self.ttl + self.max_stale:
+                self.stats["stale_hits"] += 1
+                self._schedule_refresh(key)
+                return value
+
+        self.stats["misses"] += 1
+        return await self.refresh(key)
+
+    async def refresh(self, key: str) -> Dict:
+        """
+        Load a key through its loader and store the result if successful.
+
+        Args:
+            key: Cache key registered via ``register``
+
+        Returns:
+            Dict: The loader result
+        """
+        result = await self._loaders[key]()
+        self.stats["refreshes"] += 1
+        if result.get("success"):
+            self._entries[key] = (result, time.monotonic())
+        else:
+            self.stats["refresh_errors"] += 1
+        return result
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop one key, or every entry when no key is given."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def snapshot(self) -> Dict:
+        """Return counters plus the age of every cached key."""
+        now = time.monotonic()
+        return {
+            **self.stats,
+            "ttl": self.ttl,
+            "entries": {key: round(now - loaded_at, 3) for key, (_, loaded_at) in self._entries.items()}
+        }
+
+    def _schedule_refresh(self, key: str) -> None:
+        """Start a background refresh for a key unless one is already running."""
+        task = self._refreshing.get(key)
+        if task is not None and not task.done():
+            return
+        task = asyncio.get_running_loop().create_task(self._background_refresh(key))
+        self._refreshing[key] = task
+
+    async def _background_refresh(self, key: str) -> None:
+        try:
+            await self.refresh(key)
+        except Exception as e:
+            self.stats["refresh_errors"] += 1
+            logger.error(f"Background refresh of '{key}' failed: {str(e)}")
+        finally:
+            self._refreshing.pop(key, None)
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            for key in list(self._loaders):
+                try:
+                    await self.refresh(key)
+                except Exception as e:
+                    self.stats["refresh_errors"] += 1
+                    logger.error(f"Scheduled refresh of '{key}' failed: {str(e)}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        """Start the refresh-ahead task (first run warms every registered key)."""
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        """Cancel the refresh-ahead task and any running background refresh."""
+        tasks = list(self._refreshing.values())
+        if self._refresher is not None:
+            tasks.append(self._refresher)
+            self._refresher = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refreshing.clear()
+
+
+class AvailabilityCache:
+    """
+    Bounded LRU cache with TTL for availability lookups.
+
+    Entries are keyed by ``(staff_id, service_id, date)``. A secondary index
+    by ``(staff_id, date)`` lets a booking evict every cached service for
+    that stylist and day in one step, so a taken slot is never served again.
+
+    Fetches run inside ``fetching``, which hands out the stylist/day's
+    invalidation counter. A counter is only kept while cached entries or
+    running fetches of that stylist and day exist, so days booked once do
+    not accumulate.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[Dict, float]]" = OrderedDict()
+        self._by_staff_date: Dict[Tuple[str, str], Set[Tuple[str, str, str]]] = {}
+        self._generations: Dict[Tuple[str, str], int] = {}
+        self._in_flight: Dict[Tuple[str, str], int] = {}
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, staff_id: str, service_id: str, date: str) -> Optional[Dict]:
+        """
+        Look up a cached availability response.
+
+        Returns:
+            Optional[Dict]: The cached response, or None on a miss
+        """
+        key = (staff_id, service_id, date)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        value, stored_at = entry
+        if time.monotonic() - stored_at >= self.ttl:
+            self._remove(key)
+            self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return value
+
+    def generation(self, staff_id: str, date: str) -> int:
+        """Return the invalidation counter for a stylist and day (taken before fetching)."""
+        return self._generations.get((staff_id, date), 0)
+
+    @contextmanager
+    def fetching(self, staff_id: str, date: str) -> Iterator[int]:
+        """
+        Mark a fetch for a stylist and day as running.
+
+        Yields:
+            int: The invalidation counter to pass to ``put``
+        """
+        day = (staff_id, date)
+        self._in_flight[day] = self._in_flight.get(day, 0) + 1
+        try:
+            yield self.generation(staff_id, date)
+        finally:
+            self._in_flight[day] -= 1
+            if not self._in_flight[day]:
+                del self._in_flight[day]
+                self._forget_generation(day)
+
+    def put(self, staff_id: str, service_id: str, date: str, value: Dict,
+            generation: Optional[int] = None) -> None:
+        """
+        Store an availability response, evicting the least recently used entry if full.
+
+        If ``generation`` is given and the stylist/day was invalidated since it
+        was taken, the response may predate a booking and is not stored.
+        """
+        if generation is not None and generation != self.generation(staff_id, date):
+            return
+        key = (staff_id, service_id, date)
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        self._by_staff_date.setdefault((staff_id, date), set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats["evictions"] += 1
+
+    def invalidate(self, staff_id: str, date: str) -> int:
+        """
+        Drop all cached services for a stylist on a given day.
+
+        Returns:
+            int: Number of entries removed
+        """
+        self._generations[(staff_id, date)] = self.generation(staff_id, date) + 1
+        keys = self._by_staff_date.pop((staff_id, date), set())
+        for key in keys:
+            self._entries.pop(key, None)
+        self._forget_generation((staff_id, date))
+        self.stats["invalidations"] += len(keys)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_staff_date.clear()
+        # Running fetches still hold a counter and must not store their result
+        self._generations = {day: self.generation(*day) + 1 for day in self._in_flight}
+
+    def snapshot(self) -> Dict:
+        """Return counters plus current size and hit ratio."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_ratio": round(self.stats["hits"] / lookups, 4) if lookups else 0.0
+        }
+
+    def _remove(self, key: Tuple[str, str, str]) -> None:
+        self._entries.pop(key, None)
+        staff_id, _, date = key
+        keys = self._by_staff_date.get((staff_id, date))
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_staff_date[(staff_id, date)]
+                self._forget_generation((staff_id, date))
+
+    def _forget_generation(self, day: Tuple[str, str]) -> None:
+        # Nothing holds the counter any more: a new fetch may start again from 0
+        if day not in self._by_staff_date and day not in self._in_flight:
+            self._generations.pop(day, None)
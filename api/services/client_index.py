@@ -0,0 +1,616 @@
+"""
+Client Search Index
+In-memory index over client records for the search endpoints: prefix
+search on name tokens (first and last name in any order), normalized
+exact lookups on email and phone, and typo-tolerant fuzzy search over
+name trigrams. Built once from a client list and updated incrementally,
+so searches do not scan every client.
+"""
+
+import heapq
+import math
+import os
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Phone numbers match on their last digits, so "+41 79 123 45 67",
+# "0041791234567" and "079 123 45 67" are the same number
+PHONE_MATCH_DIGITS = 9
+MIN_PHONE_QUERY_DIGITS = 6
+
+# Fuzzy search: minimum score (0..1, see ClientIndex) and how many of the
+# closest name tokens are considered per query token
+FUZZY_MIN_SCORE = float(os.getenv("CLIENT_SEARCH_FUZZY_MIN_SCORE", "0.3"))
+FUZZY_MAX_TERMS = int(os.getenv("CLIENT_SEARCH_FUZZY_MAX_TERMS", "32"))
+# Similar-term lists of recent query tokens (cleared when new names add terms)
+FUZZY_CACHE_SIZE = 4096
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_PHONE_QUERY_PATTERN = re.compile(r"^[\d\s+()/.-]+$")
+
+
+def normalize_text(text: str) -> str:
+    """Case- and accent-insensitive form: 'Müller' -> 'muller', 'Strauß' -> 'strauss'."""
+    text = text or ""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    """'Lena Müller-Roth' -> ['lena', 'muller', 'roth']"""
+    return _TOKEN_PATTERN.findall(normalize_text(text))
+
+
+def trigrams(token: str) -> frozenset:
+    """Padded trigrams as in PostgreSQL pg_trgm: 'anna' -> {'  a', ' an', 'ann', 'nna', 'na '}"""
+    padded = f"  {token} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a: str, b: str) -> float:
+    """Trigram similarity (shared / all trigrams) of two tokens."""
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+def is_phone_query(query: str) -> bool:
+    """Digits and phone punctuation only, with enough digits to identify a number."""
+    return bool(_PHONE_QUERY_PATTERN.match(query)) and len(re.sub(r"\D", "", query)) >= MIN_PHONE_QUERY_DIGITS
+
+
+def normalize_email(email: str) -> str:
+    return (email or "").strip().casefold()
+
+
+def normalize_phone(phone: str) -> str:
+    """Last PHONE_MATCH_DIGITS digits of a phone number, ignoring formatting and prefixes."""
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-PHONE_MATCH_DIGITS:]
+
+
+class ClientIndex:
+    """
+    Search index over client dicts (``name`` and optionally ``email``/``phone``).
+
+    Every name token is stored as a (token, doc) pair, sorted by token, in
+    two parallel lists; all tokens starting with a prefix form a contiguous
+    range found with two bisections. A query with several tokens walks the
+    smallest of its ranges. Small ranges are checked against each client's
+    own tokens; if that keeps failing (e.g. "le lu", where every range is
+    large but few clients match all tokens), the other ranges are turned
+    into doc sets once and intersected instead. Either way the walk stops
+    once ``limit`` clients are found. Emails and phone numbers are
+    exact lookups in dicts keyed by their normalized form.
+
+    Fuzzy search works on the vocabulary of distinct name tokens rather than
+    on clients: each token's trigrams point to the vocabulary terms that
+    contain them, so a misspelled query token is compared with a few similar
+    terms only. Each matching term's clients are then looked up via the
+    sorted token entries. A client's score is the average over query tokens
+    of the best similarity to one of its name tokens, counting only
+    similarities of at least ``min_score`` to one of the query token's
+    FUZZY_MAX_TERMS closest terms; a query token without such a name token
+    adds 0. So "anna schmidt roth" scores (1 + 0 + 1) / 3 against "Anna
+    Schulz Roth" at min_score 0.3, as schmidt/schulz is only 0.25 similar.
+
+    Clients with an ``id`` are replaced when added again; clients without one
+    (e.g. Data/clients_data.py) are simply appended.
+    """
+
+    # Range entries checked per client before switching to intersecting doc sets
+    SET_INTERSECTION_THRESHOLD = 256
+
+    def __init__(self, clients: Iterable[Dict] = ()):
+        self._clients: List[Optional[Dict]] = []
+        self._sort_ids: List[str] = []  # Client ID per doc ("" without one), for fuzzy pages
+        self._tokens: List[Tuple[str, ...]] = []
+        self._doc_by_id: Dict[str, int] = {}
+        self._entry_tokens: List[str] = []
+        self._entry_docs: List[int] = []
+        self._by_email: Dict[str, List[int]] = {}
+        self._by_phone: Dict[str, List[int]] = {}
+        self._count = 0
+        # Vocabulary for fuzzy search; terms stay after their clients are removed
+        self._term_ids: Dict[str, int] = {}
+        self._term_sizes: List[int] = []
+        self._terms: List[str] = []
+        self._gram_terms: Dict[str, List[int]] = {}
+        self._similar_cache: Dict[Tuple[str, float], List[Tuple[str, float]]] = {}
+        # Docs per (token, token) pair of their names, for two-token fuzzy queries
+        self._pair_docs: Dict[Tuple[str, str], List[int]] = {}
+
+        # Bulk build: index all clients, then sort the token entries once
+        for client in clients:
+            self._add(client, bulk=True)
+        pairs = sorted(
+            (token, doc) for doc, tokens in enumerate(self._tokens) for token in set(tokens)
+        )
+        self._entry_tokens = [token for token, _ in pairs]
+        self._entry_docs = [doc for _, doc in pairs]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, client: Dict) -> None:
+        """Index a new client, or re-index an existing one with the same ``id``."""
+        self._add(client, bulk=False)
+
+    def remove(self, client_id: str) -> bool:
+        """Drop a client by ``id``; returns False if it is not indexed."""
+        doc = self._doc_by_id.pop(client_id, None)
+        if doc is None:
+            return False
+        client = self._clients[doc]
+        for token in set(self._tokens[doc]):
+            i = self._entry_position(token, doc)
+            if i < len(self._entry_docs) and self._entry_docs[i] == doc and self._entry_tokens[i] == token:
+                del self._entry_tokens[i]
+                del self._entry_docs[i]
+        self._unlink(self._by_email, normalize_email(client.get("email")), doc)
+        self._unlink(self._by_phone, normalize_phone(client.get("phone")), doc)
+        for pair in self._token_pairs(self._tokens[doc]):
+            self._unlink(self._pair_docs, pair, doc)
+        self._clients[doc] = None
+        self._tokens[doc] = ()
+        self._count -= 1
+        return True
+
+    def get(self, client_id: str) -> Optional[Dict]:
+        doc = self._doc_by_id.get(client_id)
+        return self._clients[doc] if doc is not None else None
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        Clients matching a name prefix query, an email or a phone number.
+
+        Args:
+            query: Name tokens in any order ("meier lu"), an email address or a phone number
+            limit: Maximum number of clients to return
+
+        Returns:
+            List[Dict]: Matching clients, name matches ordered by the rarest query token
+        """
+        query = (query or "").strip()
+        if not query or limit <= 0:
+            return []
+        if "@" in query:
+            return self._lookup(self._by_email, normalize_email(query), limit)
+        if is_phone_query(query):
+            return self._lookup(self._by_phone, normalize_phone(query), limit)
+        return self._search_names(tokenize(query), limit)
+
+    def search_page(self, query: str, limit: int = 10, after: Optional[list] = None) -> Tuple[List[Dict], Optional[list]]:
+        """
+        One page of ``search`` results in a stable order, for cursor pagination.
+
+        Name matches follow the sorted entries of one query token (the rarest
+        one on the first page, kept for later pages), so a page resumes with a
+        bisection after the last (token, doc) entry instead of skipping over
+        earlier results. Clients added or removed between pages do not shift
+        the others.
+
+        Args:
+            query: As for ``search``
+            limit: Page size
+            after: Position returned with the previous page (None for the first page)
+
+        Returns:
+            (clients, position after this page, or None if it was the last page)
+
+        Raises:
+            ValueError: If ``after`` does not belong to this query
+        """
+        query = (query or "").strip()
+        if not query or limit <= 0:
+            return [], None
+        if "@" in query:
+            return self._lookup_page(self._by_email, normalize_email(query), limit, after)
+        if is_phone_query(query):
+            return self._lookup_page(self._by_phone, normalize_phone(query), limit, after)
+        return self._names_page(list(dict.fromkeys(tokenize(query))), limit, after)
+
+    def fuzzy_search(self, query: str, limit: int = 10, min_score: float = FUZZY_MIN_SCORE) -> List[Dict]:
+        """
+        Clients whose names are similar to the query, best matches first.
+
+        Args:
+            query: Name tokens in any order, possibly misspelled ("lucas maier")
+            limit: Maximum number of clients to return
+            min_score: Minimum score (0..1) a client needs to be returned, and the
+                minimum similarity a query token's match needs to count
+
+        Returns:
+            List[Dict]: Copies of the matching clients with an added "score" (1.0 = exact tokens)
+        """
+        query_tokens = list(dict.fromkeys(tokenize(query)))
+        if not query_tokens or limit <= 0:
+            return []
+        levels = self._fuzzy_levels(query_tokens, min_score, limit)
+
+        needed = min_score * len(query_tokens)
+        results = []
+        seen = set()
+        for total, docs in sorted(levels, key=itemgetter(0), reverse=True):
+            if total < needed:
+                break
+            for doc in docs:
+                if doc in seen:
+                    continue
+                seen.add(doc)
+                results.append({**self._clients[doc], "score": round(total / len(query_tokens), 3)})
+                if len(results) >= limit:
+                    return results
+        return results
+
+    def fuzzy_search_page(self, query: str, limit: int = 10, min_score: float = FUZZY_MIN_SCORE,
+                          after: Optional[list] = None) -> Tuple[List[Dict], Optional[list]]:
+        """
+        One page of ``fuzzy_search`` results, for cursor pagination.
+
+        Results are ordered by score, then client ID (the doc number for
+        clients without one), and a page resumes after the (score, ID) of the
+        previous page's last client. Levels scoring above that key are only
+        marked as seen, so earlier results are neither copied nor re-ranked.
+
+        Args:
+            query: As for ``fuzzy_search``
+            limit: Page size
+            min_score: As for ``fuzzy_search``
+            after: Position returned with the previous page (None for the first page)
+
+        Returns:
+            (clients with "score", position after this page, or None if it was the last page)
+
+        Raises:
+            ValueError: If ``after`` is not a fuzzy search position
+        """
+        if after is not None and (len(after) != 3 or not isinstance(after[0], (int, float))
+                                  or not isinstance(after[1], str) or not isinstance(after[2], int)):
+            raise ValueError("Cursor does not belong to this query")
+        query_tokens = list(dict.fromkeys(tokenize(query)))
+        if not query_tokens or limit <= 0:
+            return [], None
+        # The first page starts before every (-score, ID, doc) key
+        after_key = (-after[0], after[1], after[2]) if after is not None else (-math.inf, "", -1)
+        levels = self._fuzzy_levels(query_tokens, min_score, limit + 1, after_key)
+
+        needed = min_score * len(query_tokens)
+        results = []
+        last = None
+        seen = set()
+        for total, group in groupby(sorted(levels, key=itemgetter(0), reverse=True), key=itemgetter(0)):
+            if total < needed:
+                break
+            docs = set()
+            for _, level_docs in group:
+                docs.update(level_docs)
+            fresh = docs - seen
+            seen |= docs
+            if -total < after_key[0]:
+                continue  # All on earlier pages
+            # (ID, doc) order without a Python key per doc: by doc, then stably by ID
+            order = sorted(fresh)
+            order.sort(key=self._sort_ids.__getitem__)
+            start = 0
+            if -total == after_key[0]:
+                ids = list(map(self._sort_ids.__getitem__, order))
+                lo, hi = bisect_left(ids, after_key[1]), bisect_right(ids, after_key[1])
+                start = bisect_right(order, after_key[2], lo, hi)
+            for doc in order[start:start + limit + 1 - len(results)]:
+                if len(results) >= limit:
+                    return results, last
+                results.append({**self._clients[doc], "score": round(total / len(query_tokens), 3)})
+                last = [total, self._sort_ids[doc], doc]
+        return results, None
+
+    def _fuzzy_levels(self, query_tokens: List[str], min_score: float, limit: int,
+                      after_key: Optional[Tuple[float, str, int]] = None) -> List[Tuple[float, List[int]]]:
+        """
+        Candidates in levels of (summed similarity, docs). A doc's first
+        (highest) level is its exact score: docs matching several query tokens
+        are scored exactly before the single-token levels they also appear in.
+        """
+        term_sims = [dict(self._similar_terms(token, min_score)) for token in query_tokens]
+        if len(query_tokens) == 1:
+            return self._term_levels(term_sims[0])
+        if len(query_tokens) == 2:
+            return self._pair_levels(*term_sims) + self._term_levels(term_sims[0]) + self._term_levels(term_sims[1])
+        return self._multi_token_levels(term_sims, limit, after_key)
+
+    def _term_levels(self, sims: Dict[str, float]) -> List[Tuple[float, List[int]]]:
+        """One level per similar term: its similarity and the docs having that name token."""
+        levels = []
+        for term, term_similarity in sims.items():
+            start, end = self._term_range(term)
+            if start < end:
+                levels.append((term_similarity, self._entry_docs[start:end]))
+        return levels
+
+    def _pair_levels(self, first: Dict[str, float], second: Dict[str, float]) -> List[Tuple[float, List[int]]]:
+        """Docs matching both tokens of a "first last" query, one pair index lookup per term pair."""
+        levels = []
+        for term_a, similarity_a in first.items():
+            for term_b, similarity_b in second.items():
+                if term_a == term_b:
+                    # Both query tokens closest to the same name token ("maier maer")
+                    start, end = self._term_range(term_a)
+                    docs = self._entry_docs[start:end]
+                else:
+                    key = (term_a, term_b) if term_a < term_b else (term_b, term_a)
+                    docs = self._pair_docs.get(key)
+                if docs:
+                    levels.append((similarity_a + similarity_b, docs))
+        return levels
+
+    def _multi_token_levels(self, term_sims: List[Dict[str, float]], limit: int,
+                            after_key: Optional[Tuple[float, str, int]] = None) -> List[Tuple[float, List[int]]]:
+        """
+        Levels for queries with three or more tokens.
+
+        Docs are scored exactly token by token, starting with the token whose
+        similar terms cover the fewest clients. A doc not scored yet matches
+        none of the processed tokens, so once ``limit`` scored docs reach the
+        sum of the remaining tokens' best similarities, the rest is skipped;
+        otherwise the last token contributes plain term levels. With
+        ``after_key`` only docs after that page position count towards ``limit``,
+        and they must beat the remaining bound: a tie could sort an unscored doc
+        before them.
+        """
+        term_levels = [self._term_levels(sims) for sims in term_sims]
+        sizes = [sum(len(docs) for _, docs in levels) for levels in term_levels]
+        order = sorted(range(len(term_sims)), key=sizes.__getitem__)
+        best = [max(sims.values(), default=0.0) for sims in term_sims]
+        remaining = set(range(len(term_sims)))
+        scores: Dict[int, float] = {}
+        for q in order[:-1]:
+            remaining.discard(q)
+            # Summed in query order like the scores, so a tie with an unscored doc compares equal
+            bound = sum(best[r] for r in sorted(remaining))
+            for _, docs in term_levels[q]:
+                for doc in docs:
+                    if doc not in scores:
+                        tokens = self._tokens[doc]
+                        scores[doc] = sum(max([sims.get(t, 0.0) for t in tokens], default=0.0) for sims in term_sims)
+            if after_key is None:
+                ranked = heapq.nlargest(limit, scores.values())
+                if len(ranked) == limit and ranked[-1] >= bound:
+                    break
+            else:
+                ranked = heapq.nlargest(limit, (total for doc, total in scores.items()
+                                                if (-total, self._sort_ids[doc], doc) > after_key))
+                if len(ranked) == limit and ranked[-1] > bound:
+                    break
+        else:
+            return [(total, [doc]) for doc, total in scores.items()] + term_levels[order[-1]]
+        return [(total, [doc]) for doc, total in scores.items()]
+
+    def _term_range(self, term: str) -> Tuple[int, int]:
+        start = bisect_left(self._entry_tokens, term)
+        return start, bisect_right(self._entry_tokens, term, start)
+
+    def _similar_terms(self, token: str, min_score: float) -> List[Tuple[str, float]]:
+        """Vocabulary terms with a trigram similarity of at least ``min_score``, most similar first."""
+        key = (token, min_score)
+        cached = self._similar_cache.get(key)
+        if cached is not None:
+            return cached
+
+        grams = trigrams(token)
+        counts = Counter()
+        for gram in grams:
+            counts.update(self._gram_terms.get(gram, ()))
+
+        # Walk terms by shared trigrams, most first. Similarity is at most
+        # shared / len(grams), so the walk ends once that bound drops below
+        # min_score or below the worst of FUZZY_MAX_TERMS terms already found.
+        closest: List[Tuple[float, int]] = []
+        for term_id, shared in sorted(counts.items(), key=itemgetter(1), reverse=True):
+            upper = shared / len(grams)
+            if upper < min_score or (len(closest) == FUZZY_MAX_TERMS and upper <= closest[0][0]):
+                break
+            term_similarity = shared / (len(grams) + self._term_sizes[term_id] - shared)
+            if term_similarity < min_score:
+                continue
+            if len(closest) < FUZZY_MAX_TERMS:
+                heapq.heappush(closest, (term_similarity, term_id))
+            elif term_similarity > closest[0][0]:
+                heapq.heapreplace(closest, (term_similarity, term_id))
+        result = [(self._terms[term_id], term_similarity) for term_similarity, term_id in sorted(closest, reverse=True)]
+
+        if len(self._similar_cache) >= FUZZY_CACHE_SIZE:
+            self._similar_cache.clear()
+        self._similar_cache[key] = result
+        return result
+
+    def _add_term(self, token: str) -> None:
+        if token in self._term_ids:
+            return
+        # A new term can be closer than cached ones
+        self._similar_cache.clear()
+        term_id = self._term_ids[token] = len(self._terms)
+        grams = trigrams(token)
+        self._terms.append(token)
+        self._term_sizes.append(len(grams))
+        for gram in grams:
+            self._gram_terms.setdefault(gram, []).append(term_id)
+
+    def _search_names(self, query_tokens: List[str], limit: int) -> List[Dict]:
+        if not query_tokens:
+            return []
+        ranges = [(self._prefix_range(token), token) for token in dict.fromkeys(query_tokens)]
+        ranges.sort(key=lambda item: item[0][1] - item[0][0])
+        (start, end), _ = ranges[0]
+        if start == end:
+            return []
+
+        others = [token for _, token in ranges[1:]]
+        results = []
+        seen = set()
+        position = start
+        for position in range(start, min(end, start + self.SET_INTERSECTION_THRESHOLD)):
+            doc = self._entry_docs[position]
+            if doc in seen:
+                continue
+            seen.add(doc)
+            tokens = self._tokens[doc]
+            if all(any(t.startswith(q) for t in tokens) for q in others):
+                results.append(self._clients[doc])
+                if len(results) >= limit:
+                    return results
+        position += 1
+        if position >= end:
+            return results
+
+        # Few matches so far: intersect the other ranges' doc sets once and
+        # filter the rest of the range against them at C speed
+        remaining = self._entry_docs[position:end]
+        if others:
+            allowed = self._intersect(ranges[1:])
+            remaining = filter(allowed.__contains__, remaining)
+        for doc in remaining:
+            if doc in seen:
+                continue
+            seen.add(doc)
+            results.append(self._clients[doc])
+            if len(results) >= limit:
+                break
+        return results
+
+    def _names_page(self, query_tokens: List[str], limit: int, after: Optional[list]) -> Tuple[List[Dict], Optional[list]]:
+        if not query_tokens:
+            return [], None
+        if after is None:
+            ranges = {token: self._prefix_range(token) for token in query_tokens}
+            driver = min(query_tokens, key=lambda token: ranges[token][1] - ranges[token][0])
+            position, end = ranges[driver]
+        else:
+            if len(after) != 3 or after[0] not in query_tokens or not isinstance(after[2], int):
+                raise ValueError("Cursor does not belong to this query")
+            driver, last_token, last_doc = after
+            start, end = self._prefix_range(driver)
+            position = self._entry_position(last_token, last_doc)
+            if (position < len(self._entry_docs) and self._entry_docs[position] == last_doc
+                    and self._entry_tokens[position] == last_token):
+                position += 1
+            position = max(position, start)
+
+        others = [token for token in query_tokens if token != driver]
+        allowed = None
+        if others and end - position > self.SET_INTERSECTION_THRESHOLD:
+            allowed = self._intersect([(self._prefix_range(token), token) for token in others])
+
+        results = []
+        last = None
+        for position in range(position, end):
+            doc = self._entry_docs[position]
+            token = self._entry_tokens[position]
+            tokens = self._tokens[doc]
+            # A client has one entry per name token with the prefix; count the first
+            if any(t < token and t.startswith(driver) for t in tokens):
+                continue
+            if allowed is not None:
+                if doc not in allowed:
+                    continue
+            elif not all(any(t.startswith(q) for t in tokens) for q in others):
+                continue
+            if len(results) >= limit:
+                return results, last
+            results.append(self._clients[doc])
+            last = [driver, token, doc]
+        return results, None
+
+    def _lookup_page(self, index: Dict[str, List[int]], key: str, limit: int,
+                     after: Optional[list]) -> Tuple[List[Dict], Optional[list]]:
+        if after is not None and (len(after) != 1 or not isinstance(after[0], int) or after[0] < 0):
+            raise ValueError("Cursor does not belong to this query")
+        offset = after[0] if after else 0
+        docs = index.get(key, []) if key else []
+        page = [self._clients[doc] for doc in docs[offset:offset + limit]]
+        return page, [offset + limit] if offset + limit < len(docs) else None
+
+    def _intersect(self, ranges: List[Tuple[Tuple[int, int], str]]) -> set:
+        """Docs present in every given prefix range."""
+        allowed = None
+        for (start, end), _ in ranges:
+            docs = set(self._entry_docs[start:end])
+            allowed = docs if allowed is None else allowed & docs
+            if not allowed:
+                break
+        return allowed
+
+    def _prefix_range(self, prefix: str) -> Tuple[int, int]:
+        start = bisect_left(self._entry_tokens, prefix)
+        end = bisect_left(self._entry_tokens, prefix + "\uffff", start)
+        return start, end
+
+    def _entry_position(self, token: str, doc: int) -> int:
+        """Position of (token, doc) in the sorted entries (or where it would go)."""
+        lo = bisect_left(self._entry_tokens, token)
+        hi = bisect_right(self._entry_tokens, token, lo)
+        return bisect_left(self._entry_docs, doc, lo, hi)
+
+    def _lookup(self, index: Dict[str, List[int]], key: str, limit: int) -> List[Dict]:
+        return [self._clients[doc] for doc in index.get(key, [])[:limit]] if key else []
+
+    def _add(self, client: Dict, bulk: bool) -> None:
+        client_id = client.get("id")
+        if client_id is not None and client_id in self._doc_by_id:
+            if bulk:
+                # Duplicate ID in the initial list: the later record wins
+                doc = self._doc_by_id.pop(client_id)
+                old = self._clients[doc]
+                self._unlink(self._by_email, normalize_email(old.get("email")), doc)
+                self._unlink(self._by_phone, normalize_phone(old.get("phone")), doc)
+                for pair in self._token_pairs(self._tokens[doc]):
+                    self._unlink(self._pair_docs, pair, doc)
+                self._clients[doc] = None
+                self._tokens[doc] = ()
+                self._count -= 1
+            else:
+                self.remove(client_id)
+
+        doc = len(self._clients)
+        tokens = tuple(tokenize(client.get("name", "")))
+        self._clients.append(client)
+        self._sort_ids.append("" if client_id is None else str(client_id))
+        self._tokens.append(tokens)
+        self._count += 1
+        if client_id is not None:
+            self._doc_by_id[client_id] = doc
+
+        for token in tokens:
+            self._add_term(token)
+        for pair in self._token_pairs(tokens):
+            self._pair_docs.setdefault(pair, []).append(doc)
+        if not bulk:
+            for token in set(tokens):
+                i = self._entry_position(token, doc)
+                self._entry_tokens.insert(i, token)
+                self._entry_docs.insert(i, doc)
+        email = normalize_email(client.get("email"))
+        if email:
+            self._by_email.setdefault(email, []).append(doc)
+        phone = normalize_phone(client.get("phone"))
+        if phone:
+            self._by_phone.setdefault(phone, []).append(doc)
+
+    @staticmethod
+    def _token_pairs(tokens: Tuple[str, ...]) -> List[Tuple[str, str]]:
+        """Sorted pairs of distinct name tokens: ('lena', 'muller', 'roth') -> 3 pairs."""
+        distinct = sorted(set(tokens))
+        return [(a, b) for i, a in enumerate(distinct) for b in distinct[i + 1:]]
+
+    @staticmethod
+    def _unlink(index: Dict, key, doc: int) -> None:
+        docs = index.get(key)
+        if docs and doc in docs:
+            docs.remove(doc)
+            if not docs:
+                del index[key]
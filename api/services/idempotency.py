@@ -0,0 +1,110 @@
+"""
+Idempotency key support for non-idempotent API calls (appointment booking).
+A repeated key returns the stored result instead of calling Phorest again;
+concurrent duplicates wait for the first request instead of racing it.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Store configuration (number of keys, retention in seconds)
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+
+
+class IdempotencyKeyMismatch(Exception):
+    """Raised when a key is reused with a different request payload."""
+
+
+def fingerprint(payload: Dict) -> str:
+    """Stable representation of a request payload for key reuse checks."""
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"))
+
+
+class IdempotencyStore:
+    """
+    Bounded LRU+TTL store of results per idempotency key.
+
+    Only successful results are kept, so a client may retry a failed booking
+    with the same key. Callers that arrive while the first request for a key
+    is still running share its outcome, whether it succeeds or fails.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._results: "OrderedDict[str, Tuple[str, Dict, float]]" = OrderedDict()
+        self._in_flight: Dict[str, Tuple[str, asyncio.Task]] = {}
+        self.stats = {"executed": 0, "replayed": 0, "joined": 0, "mismatches": 0, "evictions": 0}
+
+    async def run(self, key: str, request_fingerprint: str,
+                  fn: Callable[[], Awaitable[Dict]]) -> Tuple[Dict, bool]:
+        """
+        Execute ``fn`` at most once per key.
+
+        Args:
+            key: Client supplied Idempotency-Key
+            request_fingerprint: Fingerprint of the request payload
+            fn: Coroutine factory performing the operation
+
+        Returns:
+            (result, replayed): replayed is True if the result was not produced by this call
+
+        Raises:
+            IdempotencyKeyMismatch: The key was used before with a different payload
+        """
+        stored = self._results.get(key)
+        if stored is not None:
+            stored_fingerprint, result, stored_at = stored
+            if time.monotonic() - stored_at < self.ttl:
+                self._check(key, stored_fingerprint, request_fingerprint)
+                self._results.move_to_end(key)
+                self.stats["replayed"] += 1
+                return result, True
+            del self._results[key]
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            in_flight_fingerprint, task = in_flight
+            self._check(key, in_flight_fingerprint, request_fingerprint)
+            self.stats["joined"] += 1
+            return await asyncio.shield(task), True
+
+        async def execute() -> Dict:
+            result = await fn()
+            if result.get("success"):
+                self._store(key, request_fingerprint, result)
+            return result
+
+        self.stats["executed"] += 1
+        task = asyncio.get_running_loop().create_task(execute())
+        self._in_flight[key] = (request_fingerprint, task)
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shielded so that a disconnecting client does not abort a booking others wait on
+        return await asyncio.shield(task), False
+
+    def _check(self, key: str, expected: str, actual: str) -> None:
+        if expected != actual:
+            self.stats["mismatches"] += 1
+            raise IdempotencyKeyMismatch(f"Idempotency-Key '{key}' was already used with a different request")
+
+    def _store(self, key: str, request_fingerprint: str, result: Dict) -> None:
+        self._results[key] = (request_fingerprint, result, time.monotonic())
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def snapshot(self) -> Dict:
+        return {**self.stats, "stored": len(self._results), "in_flight": len(self._in_flight)}
+
+
+idempotency_store = IdempotencyStore(max_entries=IDEMPOTENCY_MAX_KEYS, ttl=IDEMPOTENCY_TTL)
@@ -0,0 +1,545 @@
+"""
+Memory Log
+CoreBrain's long-term memory as an append-only JSON Lines file. Committing
+an event writes one line instead of reading and rewriting a JSON array, and
+a crash can at worst leave a torn last line, which readers skip. Durability
+is batched: lines reach the OS on every append and are fsynced in groups.
+A background compactor writes a snapshot of the derived state (counts per
+event type, recent events, the time/type index) together with the log
+offset it covers, so opening the log only replays the lines appended after
+the snapshot. Queries by time range and event type use the index and read
+only the matching lines.
+"""
+
+import atexit
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, deque
+from datetime import datetime
+from fnmatch import fnmatchcase
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_DATA_DIR = Path(__file__).resolve().parents[2] / "Data"
+
+# Memory log configuration
+MEMORY_LOG_PATH = os.getenv("MEMORY_LOG_PATH", str(_DATA_DIR / "memory_long.jsonl"))
+MEMORY_SNAPSHOT_PATH = os.getenv("MEMORY_SNAPSHOT_PATH", str(_DATA_DIR / "memory_snapshot.json"))
+# Former JSON array memory, converted once when the log does not exist yet
+MEMORY_LEGACY_PATH = str(_DATA_DIR / "memory_long.json")
+# fsync at most this many seconds after an append, or right away after this many appends
+MEMORY_FSYNC_INTERVAL = float(os.getenv("MEMORY_FSYNC_INTERVAL", "1"))
+MEMORY_FSYNC_BATCH = int(os.getenv("MEMORY_FSYNC_BATCH", "256"))
+# Snapshot every interval seconds if at least this many events were appended since the last one
+MEMORY_COMPACT_INTERVAL = float(os.getenv("MEMORY_COMPACT_INTERVAL", "60"))
+MEMORY_COMPACT_MIN_EVENTS = int(os.getenv("MEMORY_COMPACT_MIN_EVENTS", "1000"))
+# Newest events kept in the state (and snapshot)
+MEMORY_RECENT_EVENTS = int(os.getenv("MEMORY_RECENT_EVENTS", "100"))
+
+
+_GLOB_CHARS = set("*?[")
+
+
+def event_timestamp(event: Dict) -> float:
+    """Event time in epoch seconds (numeric or ISO ``timestamp``; 0 if missing)."""
+    timestamp = event.get("timestamp")
+    if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+        return float(timestamp)
+    if isinstance(timestamp, str):
+        try:
+            return datetime.fromisoformat(timestamp).timestamp()
+        except ValueError:
+            pass
+    return 0.0
+
+
+class _Series:
+    """Parallel arrays of timestamps and keys, sorted by timestamp."""
+
+    __slots__ = ("timestamps", "keys")
+
+    def __init__(self, timestamps: Optional[array] = None, keys: Optional[array] = None):
+        self.timestamps = timestamps if timestamps is not None else array("d")
+        self.keys = keys if keys is not None else array("q")
+
+    def add(self, timestamp: float, key: int) -> None:
+        if not self.timestamps or timestamp >= self.timestamps[-1]:
+            self.timestamps.append(timestamp)
+            self.keys.append(key)
+        else:
+            # Out-of-order timestamp (clock change, imported history): insert in place
+            i = bisect_right(self.timestamps, timestamp)
+            self.timestamps.insert(i, timestamp)
+            self.keys.insert(i, key)
+
+    def bounds(self, since: Optional[float], until: Optional[float]) -> Tuple[int, int]:
+        """Positions of the events with since <= timestamp < until."""
+        lo = bisect_left(self.timestamps, since) if since is not None else 0
+        hi = bisect_left(self.timestamps, until, lo) if until is not None else len(self.timestamps)
+        return lo, hi
+
+    def copy(self) -> "_Series":
+        return _Series(array("d", self.timestamps), array("q", self.keys))
+
+
+class MemoryIndex:
+    """
+    Time-sorted (timestamp, key) arrays over all events and per event type.
+
+    ``key`` locates an event for the owner of the index: the byte offset of
+    its line in a MemoryLog, or the list position in CoreBrain's short-term
+    memory. Time ranges are two bisections. Type patterns ("BookingTest*",
+    fnmatch syntax) are matched against the distinct type names, never
+    against the events themselves. Newest-first queries take their slice
+    from the end of the arrays, so "last N of type X" costs O(log n + N).
+    """
+
+    def __init__(self):
+        self._all = _Series()
+        self._by_event: Dict[str, _Series] = {}
+
+    def __len__(self) -> int:
+        return len(self._all.keys)
+
+    def add(self, event: Dict, key: int) -> None:
+        timestamp = event_timestamp(event)
+        self._all.add(timestamp, key)
+        name = str(event.get("event") or "")
+        series = self._by_event.get(name)
+        if series is None:
+            series = self._by_event[name] = _Series()
+        series.add(timestamp, key)
+
+    def select(self, event: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+               limit: Optional[int] = None, newest_first: bool = False) -> List[int]:
+        """
+        Keys of the matching events in time order.
+
+        Args:
+            event: Event type or fnmatch pattern ("BookingTest*"); None for all types
+            since: Earliest timestamp (inclusive)
+            until: Latest timestamp (exclusive)
+            limit: Maximum number of keys
+            newest_first: Return the newest events first (and keep the newest when limiting)
+
+        Returns:
+            List[int]: Keys of the matching events
+        """
+        ranges = [(series, *series.bounds(since, until)) for series in self._matching(event)]
+        ranges = [(series, lo, hi) for series, lo, hi in ranges if hi > lo]
+        if limit is not None:
+            # No type can contribute more than ``limit`` events from its end of the range
+            ranges = [
+                (series, max(lo, hi - limit), hi) if newest_first else (series, lo, min(hi, lo + limit))
+                for series, lo, hi in ranges
+            ]
+        if len(ranges) == 1:
+            series, lo, hi = ranges[0]
+            keys = series.keys[lo:hi]
+            return list(reversed(keys)) if newest_first else list(keys)
+
+        def entries(series: _Series, lo: int, hi: int):
+            pairs = zip(series.timestamps[lo:hi], series.keys[lo:hi])
+            return reversed(list(pairs)) if newest_first else pairs
+
+        merged = heapq.merge(*(entries(*r) for r in ranges), reverse=newest_first)
+        return [key for _, key in islice(merged, limit)]
+
+    def count(self, event: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None) -> int:
+        """Number of matching events (no events are read)."""
+        return sum(hi - lo for lo, hi in (series.bounds(since, until) for series in self._matching(event)))
+
+    def event_types(self) -> Dict[str, int]:
+        return {name: len(series.keys) for name, series in self._by_event.items()}
+
+    def copy(self) -> "MemoryIndex":
+        index = MemoryIndex()
+        index._all = self._all.copy()
+        index._by_event = {name: series.copy() for name, series in self._by_event.items()}
+        return index
+
+    def dump(self, f: BinaryIO, header: Dict) -> None:
+        """Write the index: a JSON header line, then the raw arrays."""
+        types = [[name, len(series.keys)] for name, series in self._by_event.items()]
+        f.write((json.dumps({**header, "count": len(self), "types": types}) + "\n").encode("utf-8"))
+        for series in [self._all, *self._by_event.values()]:
+            series.timestamps.tofile(f)
+            series.keys.tofile(f)
+
+    @classmethod
+    def load(cls, f: BinaryIO) -> Tuple["MemoryIndex", Dict]:
+        """Read an index written by ``dump``; returns (index, header)."""
+        header = json.loads(f.readline())
+
+        def read_series(n: int) -> _Series:
+            series = _Series()
+            series.timestamps.fromfile(f, n)
+            series.keys.fromfile(f, n)
+            return series
+
+        index = cls()
+        index._all = read_series(header["count"])
+        index._by_event = {name: read_series(n) for name, n in header["types"]}
+        return index, header
+
+    def _matching(self, event: Optional[str]) -> List[_Series]:
+        if event is None:
+            return [self._all]
+        if _GLOB_CHARS.isdisjoint(event):
+            series = self._by_event.get(event)
+            return [series] if series is not None else []
+        return [series for name, series in self._by_event.items() if fnmatchcase(name, event)]
+
+
+class MemoryState:
+    """Summary of the log that is cheap to keep up to date and to snapshot."""
+
+    def __init__(self, recent_size: int = MEMORY_RECENT_EVENTS):
+        self.count = 0
+        self.by_event: Counter = Counter()
+        self.first_timestamp: Optional[float] = None
+        self.last_timestamp: Optional[float] = None
+        self.recent: deque = deque(maxlen=recent_size)
+
+    def apply(self, event: Dict) -> None:
+        self.count += 1
+        self.by_event[event.get("event")] += 1
+        timestamp = event.get("timestamp")
+        if isinstance(timestamp, (int, float)):
+            if self.first_timestamp is None:
+                self.first_timestamp = timestamp
+            self.last_timestamp = timestamp
+        self.recent.append(event)
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            # JSON object keys must be strings; events without a type are stored under ""
+            "by_event": {str(name or ""): n for name, n in self.by_event.items()},
+            "first_timestamp": self.first_timestamp,
+            "last_timestamp": self.last_timestamp,
+            "recent": list(self.recent)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, recent_size: int = MEMORY_RECENT_EVENTS) -> "MemoryState":
+        state = cls(recent_size)
+        state.count = data["count"]
+        state.by_event = Counter({name or None: n for name, n in data["by_event"].items()})
+        state.first_timestamp = data.get("first_timestamp")
+        state.last_timestamp = data.get("last_timestamp")
+        state.recent.extend(data.get("recent", []))
+        return state
+
+
+class MemoryLog:
+    """
+    Append-only event log with group fsync and snapshot-based recovery.
+
+    Appends use an O_APPEND file descriptor without user-space buffering, so
+    every event is in the OS page cache as soon as ``append`` returns and
+    survives a process crash. Power loss is covered by fsync, which runs for
+    a whole group of appends: when MEMORY_FSYNC_BATCH lines are pending, or
+    at the latest MEMORY_FSYNC_INTERVAL seconds after an append (background
+    flusher), and on ``flush()``/``close()``.
+
+    A torn last line from a crash is closed with a newline on open, and
+    readers skip lines that are not valid JSON, so later appends are not
+    glued to it.
+    """
+
+    def __init__(self, path: str = MEMORY_LOG_PATH, snapshot_path: Optional[str] = MEMORY_SNAPSHOT_PATH,
+                 fsync_interval: float = MEMORY_FSYNC_INTERVAL, fsync_batch: int = MEMORY_FSYNC_BATCH,
+                 legacy_path: Optional[str] = None, recent_size: int = MEMORY_RECENT_EVENTS):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self.recent_size = recent_size
+        self.stats = {"appended": 0, "fsyncs": 0, "snapshots": 0, "replayed": 0, "skipped_lines": 0}
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending = 0
+        self._first_pending_at = 0.0
+        self._closed = False
+        self._flusher: Optional[threading.Thread] = None
+        self._compactor: Optional[threading.Thread] = None
+        self._snapshot_count = 0
+        self.index = MemoryIndex()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if legacy_path and not os.path.exists(path) and os.path.exists(legacy_path):
+            self._convert_legacy(legacy_path)
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._size = os.fstat(self._fd).st_size
+        if self._size and not self._ends_with_newline():
+            self._size += os.write(self._fd, b"\n")
+        self.state = self._recover()
+
+    def append(self, event: Dict) -> int:
+        """
+        Append one event.
+
+        Returns:
+            int: Byte offset of the event's line in the log
+        """
+        data = (json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            if self._closed:
+                raise ValueError("Memory log is closed")
+            offset = self._size
+            os.write(self._fd, data)
+            self._size += len(data)
+            self.state.apply(event)
+            self.index.add(event, offset)
+            self.stats["appended"] += 1
+            self._pending += 1
+            if self._pending == 1:
+                self._first_pending_at = time.monotonic()
+                self._start_flusher()
+            if self._pending >= self.fsync_batch:
+                self._fsync()
+        return offset
+
+    def flush(self) -> None:
+        """fsync all appended events now."""
+        with self._lock:
+            if self._pending and not self._closed:
+                self._fsync()
+
+    def read(self, start: int = 0) -> Iterator[Tuple[int, Dict]]:
+        """
+        Stream (offset, event) pairs from ``start`` on, one line at a time.
+
+        Lines that are still being written (no newline yet) end the stream;
+        lines that are not valid JSON (torn by a crash) are skipped.
+        """
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    event = None
+                if isinstance(event, dict):
+                    yield offset, event
+                elif line.strip():
+                    self.stats["skipped_lines"] += 1
+                offset += len(line)
+
+    def events(self, start: int = 0) -> Iterator[Dict]:
+        for _, event in self.read(start):
+            yield event
+
+    def query(self, event: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+              limit: Optional[int] = None, newest_first: bool = False) -> List[Dict]:
+        """
+        Events by type and time range, found via the index (see MemoryIndex.select).
+
+        Example: ``query("BookingTest*", since=time.time() - 3600)``
+        """
+        with self._lock:
+            offsets = self.index.select(event, since, until, limit, newest_first)
+        return self._read_at(offsets)
+
+    def last(self, n: int, event: Optional[str] = None) -> List[Dict]:
+        """The ``n`` newest events (of a type or pattern), newest first."""
+        return self.query(event, limit=n, newest_first=True)
+
+    def count(self, event: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None) -> int:
+        with self._lock:
+            return self.index.count(event, since, until)
+
+    def compact(self) -> bool:
+        """
+        Write a snapshot of the current state and the log offset it covers.
+        Returns False without writing if nothing was appended since the last one.
+        """
+        if not self.snapshot_path:
+            return False
+        with self._compact_lock:
+            return self._write_snapshot()
+
+    def _write_snapshot(self) -> bool:
+        with self._lock:
+            if self.state.count == self._snapshot_count:
+                return False
+            if self._pending:
+                self._fsync()  # The snapshot must never cover lines that are not durable
+            covered = {"offset": self._size, "inode": os.fstat(self._fd).st_ino}
+            snapshot = {**covered, "state": self.state.to_dict()}
+            index = self.index.copy()
+            count = self.state.count
+        # Serialized outside the lock; tmp + fsync + rename keeps the old files until the new ones are complete.
+        # Both files name the offset they cover, so a crash between the two renames is detected on open.
+        tmp_path = f"{self._index_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            index.dump(f, covered)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._index_path)
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        self._snapshot_count = count
+        self.stats["snapshots"] += 1
+        return True
+
+    def start_compactor(self, interval: float = MEMORY_COMPACT_INTERVAL,
+                        min_events: int = MEMORY_COMPACT_MIN_EVENTS) -> None:
+        """Snapshot in a background thread every ``interval`` seconds once ``min_events`` accumulated."""
+        def run():
+            with self._lock:
+                while not self._closed:
+                    self._wakeup.wait(interval)
+                    if self._closed or self.state.count - self._snapshot_count < min_events:
+                        continue
+                    self._lock.release()
+                    try:
+                        self.compact()
+                    except OSError as e:
+                        logger.error(f"Memory snapshot failed: {str(e)}")
+                    finally:
+                        self._lock.acquire()
+
+        if self._compactor is None:
+            self._compactor = threading.Thread(target=run, name="memory-compactor", daemon=True)
+            self._compactor.start()
+
+    def close(self) -> None:
+        """fsync, write a final snapshot and stop the background threads."""
+        with self._lock:
+            if self._closed:
+                return
+            if self._pending:
+                self._fsync()
+        try:
+            self.compact()
+        except OSError as e:
+            logger.error(f"Memory snapshot failed: {str(e)}")
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify_all()
+            os.close(self._fd)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {**self.stats, "events": self.state.count, "bytes": self._size, "pending_fsync": self._pending}
+
+    @property
+    def _index_path(self) -> str:
+        return f"{self.snapshot_path}.index"
+
+    def _read_at(self, offsets: List[int]) -> List[Dict]:
+        events = []
+        with open(self.path, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                events.append(json.loads(f.readline()))
+        return events
+
+    def _fsync(self) -> None:
+        # Caller holds the lock
+        os.fsync(self._fd)
+        self._pending = 0
+        self.stats["fsyncs"] += 1
+
+    def _start_flusher(self) -> None:
+        def run():
+            with self._lock:
+                while not self._closed:
+                    if not self._pending:
+                        self._wakeup.wait()
+                        continue
+                    due = self._first_pending_at + self.fsync_interval - time.monotonic()
+                    if due > 0:
+                        self._wakeup.wait(due)
+                    elif self._pending:
+                        self._fsync()
+
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=run, name="memory-fsync", daemon=True)
+            self._flusher.start()
+        else:
+            self._wakeup.notify_all()
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _recover(self) -> MemoryState:
+        """State and index from the snapshot (if it matches this log) plus the lines appended after it."""
+        state, start = None, 0
+        if self.snapshot_path and os.path.exists(self.snapshot_path) and os.path.exists(self._index_path):
+            try:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+                with open(self._index_path, "rb") as f:
+                    index, header = MemoryIndex.load(f)
+                inode = os.fstat(self._fd).st_ino
+                if (snapshot["inode"] == header["inode"] == inode
+                        and snapshot["offset"] == header["offset"] <= self._size):
+                    state = MemoryState.from_dict(snapshot["state"], self.recent_size)
+                    self.index = index
+                    start = snapshot["offset"]
+                    self._snapshot_count = state.count
+            except (OSError, EOFError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Ignoring unreadable memory snapshot: {str(e)}")
+        if state is None:
+            state = MemoryState(self.recent_size)
+            self.index = MemoryIndex()
+        for offset, event in self.read(start):
+            state.apply(event)
+            self.index.add(event, offset)
+            self.stats["replayed"] += 1
+        return state
+
+    def _convert_legacy(self, legacy_path: str) -> None:
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            events: List[Dict] = json.load(f)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        logger.info(f"Converted {len(events)} events from {legacy_path} to {self.path}")
+
+
+_default_log: Optional[MemoryLog] = None
+_default_log_lock = threading.Lock()
+
+
+def get_memory_log() -> MemoryLog:
+    """
+    The shared memory log at MEMORY_LOG_PATH, opened on first use with the
+    background compactor running. It is flushed and snapshotted at exit.
+    """
+    global _default_log
+    if _default_log is None:
+        with _default_log_lock:
+            if _default_log is None:
+                memory_log = MemoryLog(MEMORY_LOG_PATH, MEMORY_SNAPSHOT_PATH, legacy_path=MEMORY_LEGACY_PATH)
+                memory_log.start_compactor()
+                atexit.register(memory_log.close)
+                _default_log = memory_log
+    return _default_log
@@ -6,12 +6,25 @@ Supports both real API calls and fake mode for testing.
 
 import os
 import json
+import base64
 import random
-import requests
+import httpx
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import asyncio
 import logging
+import uuid
+
+from api.services.availability_engine import AvailabilityEngine
+from api.services.cache import AvailabilityCache, CatalogCache
+from api.services.client_index import FUZZY_MIN_SCORE, ClientIndex, is_phone_query, tokenize
+from api.services.rate_limiter import (
+    PRIORITY_BACKGROUND, PRIORITY_BOOKING, PRIORITY_INTERACTIVE, RateLimiter
+)
+from api.services.resilience import CircuitBreaker, RetryBudget, UpstreamUnavailableError, backoff_delay
+from api.services.schedule import to_minutes
+from api.services.single_flight import SingleFlight
+from api.services.store import get_store
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -22,6 +35,59 @@ PHOREST_API_BASE_URL = os.getenv("PHOREST_API_BASE_URL", "https://api.phorest.co
 PHOREST_API_KEY = os.getenv("PHOREST_API_KEY", "your-api-key-here")
 PHOREST_BUSINESS_ID = os.getenv("PHOREST_BUSINESS_ID", "your-business-id-here")
 
+# HTTP transport configuration (connection pool and timeouts, in seconds)
+PHOREST_HTTP_TIMEOUT = float(os.getenv("PHOREST_HTTP_TIMEOUT", "10"))
+PHOREST_HTTP_CONNECT_TIMEOUT = float(os.getenv("PHOREST_HTTP_CONNECT_TIMEOUT", "5"))
+PHOREST_HTTP_MAX_CONNECTIONS = int(os.getenv("PHOREST_HTTP_MAX_CONNECTIONS", "20"))
+PHOREST_HTTP_MAX_KEEPALIVE = int(os.getenv("PHOREST_HTTP_MAX_KEEPALIVE", "10"))
+PHOREST_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("PHOREST_HTTP_KEEPALIVE_EXPIRY", "30"))
+
+# Catalog cache configuration (services/staff, in seconds)
+PHOREST_CATALOG_TTL = float(os.getenv("PHOREST_CATALOG_TTL", "300"))
+PHOREST_CATALOG_MAX_STALE = float(os.getenv("PHOREST_CATALOG_MAX_STALE", "3600"))
+PHOREST_CATALOG_REFRESH_INTERVAL = float(
+    os.getenv("PHOREST_CATALOG_REFRESH_INTERVAL", str(PHOREST_CATALOG_TTL * 0.8))
+)
+
+# Availability cache configuration (LRU size, TTL in seconds)
+PHOREST_AVAILABILITY_CACHE_SIZE = int(os.getenv("PHOREST_AVAILABILITY_CACHE_SIZE", "5000"))
+PHOREST_AVAILABILITY_TTL = float(os.getenv("PHOREST_AVAILABILITY_TTL", "60"))
+
+# Maximum concurrent upstream calls for batch availability requests
+PHOREST_BATCH_CONCURRENCY = int(os.getenv("PHOREST_BATCH_CONCURRENCY", "8"))
+
+# Circuit breaker and retry configuration (delays and windows in seconds)
+PHOREST_BREAKER_FAILURE_THRESHOLD = int(os.getenv("PHOREST_BREAKER_FAILURE_THRESHOLD", "5"))
+PHOREST_BREAKER_RESET_TIMEOUT = float(os.getenv("PHOREST_BREAKER_RESET_TIMEOUT", "30"))
+PHOREST_MAX_RETRIES = int(os.getenv("PHOREST_MAX_RETRIES", "2"))
+PHOREST_RETRY_BASE_DELAY = float(os.getenv("PHOREST_RETRY_BASE_DELAY", "0.2"))
+PHOREST_RETRY_MAX_DELAY = float(os.getenv("PHOREST_RETRY_MAX_DELAY", "2"))
+PHOREST_RETRY_BUDGET_RATIO = float(os.getenv("PHOREST_RETRY_BUDGET_RATIO", "0.1"))
+PHOREST_RETRY_BUDGET_MIN = int(os.getenv("PHOREST_RETRY_BUDGET_MIN", "10"))
+PHOREST_RETRY_BUDGET_WINDOW = float(os.getenv("PHOREST_RETRY_BUDGET_WINDOW", "10"))
+
+# Client-side rate limit towards Phorest (requests per second, 0 disables it)
+PHOREST_RATE_LIMIT = float(os.getenv("PHOREST_RATE_LIMIT", "10"))
+PHOREST_RATE_BURST = int(os.getenv("PHOREST_RATE_BURST", "20"))
+
+# Fuzzy client search against the real API: candidates fetched by token prefix
+FUZZY_CANDIDATE_PREFIX = int(os.getenv("CLIENT_SEARCH_FUZZY_PREFIX", "3"))
+FUZZY_CANDIDATE_LIMIT = int(os.getenv("CLIENT_SEARCH_FUZZY_CANDIDATES", "200"))
+
+# Streamed client searches: a small first page for a fast first byte, then larger pages
+CLIENT_STREAM_FIRST_PAGE = int(os.getenv("CLIENT_STREAM_FIRST_PAGE", "50"))
+CLIENT_STREAM_PAGE_SIZE = int(os.getenv("CLIENT_STREAM_PAGE_SIZE", "500"))
+
+# Maximum seconds a request may wait for a rate limit token, per priority class
+PHOREST_QUEUE_DEADLINES = {
+    PRIORITY_BOOKING: float(os.getenv("PHOREST_QUEUE_DEADLINE_BOOKING", "10")),
+    PRIORITY_INTERACTIVE: float(os.getenv("PHOREST_QUEUE_DEADLINE_INTERACTIVE", "5")),
+    PRIORITY_BACKGROUND: float(os.getenv("PHOREST_QUEUE_DEADLINE_BACKGROUND", "30"))
+}
+
+# Upstream answers that count as failures and may be retried
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
 # Headers for API requests
 HEADERS = {
     "Authorization": f"Bearer {PHOREST_API_KEY}",
@@ -29,6 +95,23 @@ HEADERS = {
     "Accept": "application/json"
 }
 
+# Shared pooled client, opened and closed by the FastAPI lifespan (api/main.py)
+_http_client: Optional[httpx.AsyncClient] = None
+
+# Concurrent identical reads share one upstream call
+single_flight = SingleFlight()
+
+# One breaker per Phorest endpoint, one retry budget shared by all of them
+circuit_breakers: Dict[str, CircuitBreaker] = {}
+retry_budget = RetryBudget(
+    ratio=PHOREST_RETRY_BUDGET_RATIO,
+    min_retries=PHOREST_RETRY_BUDGET_MIN,
+    window=PHOREST_RETRY_BUDGET_WINDOW
+)
+
+# Bookings go ahead of interactive reads, which go ahead of catalog refreshes
+rate_limiter = RateLimiter(rate=PHOREST_RATE_LIMIT, burst=PHOREST_RATE_BURST)
+
 # Fake data for testing
 FAKE_SERVICES = [
     {"id": "srv_001", "name": "Haarschnitt", "duration": 30, "price": 45.00},
@@ -48,8 +131,184 @@ FAKE_CLIENT_NAMES = [
     "Sarah Becker", "Klaus Hoffmann", "Anna Schulz"
 ]
 
+FAKE_BASE_TIMES = ["09:00", "09:30", "10:00", "10:30", "11:00", "11:30", 
+                   "13:00", "13:30", "14:00", "14:30", "15:00", "15:30", 
+                   "16:00", "16:30", "17:00", "17:30"]
+
+# Fake mode keeps minute occupancy bitmaps, so fake bookings remove their slots.
+# Only the fake stylists are accepted; an evicted day is seeded again on next use.
+_fake_seeded_days = set()
+fake_engine = AvailabilityEngine(
+    staff_ids=[staff["id"] for staff in FAKE_STAFF],
+    on_evict=lambda date: _fake_seeded_days.difference_update({(staff["id"], date) for staff in FAKE_STAFF})
+)
+
+
+def _build_fake_clients() -> List[Dict]:
+    """Test clients that always match certain names, plus one client per fake name."""
+    clients = [
+        {"id": "cli_001", "name": "Pascal Erni", "email": "pascal.erni@email.com", "phone": "+49 123 45678"},
+        {"id": "cli_002", "name": "Max Mustermann", "email": "max.mustermann@email.com", "phone": "+49 234 56789"},
+        {"id": "cli_003", "name": "Erika Musterfrau", "email": "erika.musterfrau@email.com", "phone": "+49 345 67890"},
+    ]
+    for i, name in enumerate(FAKE_CLIENT_NAMES):
+        rng = random.Random(i)
+        clients.append({
+            "id": f"cli_{i+100:03d}",
+            "name": name,
+            "email": f"{name.lower().replace(' ', '.')}@email.com",
+            "phone": f"+49 {rng.randint(100, 999)} {rng.randint(10000, 99999)}"
+        })
+    return clients
+
+
+# Fake clients are indexed once instead of scanned on every search
+fake_client_index = ClientIndex(_build_fake_clients())
+
+
+async def start_http_client() -> httpx.AsyncClient:
+    """
+    Open the shared keep-alive client used for all Phorest calls.
+    
+    Returns:
+        httpx.AsyncClient: The pooled client (existing one if already open)
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            base_url=f"{PHOREST_API_BASE_URL}/business/{PHOREST_BUSINESS_ID}",
+            headers=HEADERS,
+            timeout=httpx.Timeout(PHOREST_HTTP_TIMEOUT, connect=PHOREST_HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=PHOREST_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=PHOREST_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=PHOREST_HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+        logger.info(
+            f"Phorest HTTP client started (max_connections={PHOREST_HTTP_MAX_CONNECTIONS}, "
+            f"timeout={PHOREST_HTTP_TIMEOUT}s)"
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared client and release its pooled connections."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+        logger.info("Phorest HTTP client closed")
+
+
+def get_circuit_breaker(endpoint: str) -> CircuitBreaker:
+    """Return the circuit breaker for an endpoint, creating it on first use."""
+    breaker = circuit_breakers.get(endpoint)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            endpoint,
+            failure_threshold=PHOREST_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=PHOREST_BREAKER_RESET_TIMEOUT
+        )
+        circuit_breakers[endpoint] = breaker
+    return breaker
+
+
+async def _phorest_request(method: str, path: str, endpoint: str,
+                           priority: int = PRIORITY_INTERACTIVE, **kwargs) -> httpx.Response:
+    """
+    Send a request to the Phorest API over the shared client.
+    
+    Every attempt (including retries) takes a token from the rate limiter,
+    queueing by priority up to the class deadline, and goes through the
+    endpoint's circuit breaker. Network errors and
+    429/5xx gateway answers are retried with jittered exponential backoff,
+    up to PHOREST_MAX_RETRIES times and only while the global retry budget
+    allows. Non-GET requests are only retried when the connection could not
+    be established, so an appointment is never sent twice.
+    
+    Falls back to opening the client lazily when used outside the app
+    lifespan (e.g. when this module is run directly).
+    
+    Args:
+        method: HTTP method
+        path: Path relative to the business base URL (e.g. "/services")
+        endpoint: Breaker name for this Phorest endpoint (e.g. "services")
+        priority: Rate limiter class (PRIORITY_BOOKING/INTERACTIVE/BACKGROUND)
+        **kwargs: Passed through to httpx (params, json, ...)
+        
+    Returns:
+        httpx.Response: The raw upstream response
+        
+    Raises:
+        CircuitOpenError: The endpoint's circuit is open
+        RateLimitTimeout: No rate limit token within the queue deadline
+        httpx.HTTPError: Network error after all retries
+    """
+    client = await start_http_client()
+    breaker = get_circuit_breaker(endpoint)
+    retry_budget.record_request()
+    attempt = 0
+    
+    while True:
+        breaker.before_call()
+        try:
+            await rate_limiter.acquire(priority, PHOREST_QUEUE_DEADLINES[priority])
+            response = await client.request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            breaker.record_failure()
+            safe_to_retry = method == "GET" or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+            if not safe_to_retry or attempt >= PHOREST_MAX_RETRIES or not retry_budget.try_acquire():
+                raise
+            error = f"{type(e).__name__}: {str(e)}"
+        except BaseException:
+            breaker.release()
+            raise
+        else:
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            if method != "GET" or attempt >= PHOREST_MAX_RETRIES or not retry_budget.try_acquire():
+                return response
+            error = f"HTTP {response.status_code}"
+        
+        delay = backoff_delay(attempt, PHOREST_RETRY_BASE_DELAY, PHOREST_RETRY_MAX_DELAY)
+        attempt += 1
+        logger.warning(f"Retrying Phorest {endpoint} ({attempt}/{PHOREST_MAX_RETRIES}) in {delay:.2f}s after {error}")
+        await asyncio.sleep(delay)
+
 
 async def get_services() -> Dict:
+    """
+    Return available services from the catalog cache.
+    
+    Returns:
+        Dict: Response containing success status, data, and message
+    """
+    return await catalog_cache.get("services")
+
+
+async def get_service_duration(service_id: str, default: int = 30) -> int:
+    """
+    Duration of a service in minutes, from the catalog cache.
+    
+    Args:
+        service_id: ID of the service
+        default: Duration used if the service is unknown or has none
+        
+    Returns:
+        int: Duration in minutes
+    """
+    services = await get_services()
+    if services.get("success"):
+        for service in services["data"].get("services", []):
+            if service.get("id") == service_id:
+                return int(service.get("duration") or default)
+    return default
+
+
+async def _fetch_services() -> Dict:
     """
     Fetch available services from Phorest API or return fake data.
     
@@ -66,8 +325,7 @@ async def get_services() -> Dict:
             }
         
         # Real API call
-        url = f"{PHOREST_API_BASE_URL}/business/{PHOREST_BUSINESS_ID}/services"
-        response = requests.get(url, headers=HEADERS, timeout=10)
+        response = await _phorest_request("GET", "/services", endpoint="services", priority=PRIORITY_BACKGROUND)
         
         if response.status_code == 200:
             data = response.json()
@@ -83,7 +341,14 @@ async def get_services() -> Dict:
                 "data": None
             }
             
-    except requests.exceptions.RequestException as e:
+    except UpstreamUnavailableError as e:
+        logger.warning(f"Phorest call rejected while fetching services: {str(e)}")
+        return {
+            "success": False,
+            "message": f"Phorest temporarily unavailable while fetching services: {str(e)}",
+            "data": None
+        }
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching services: {str(e)}")
         return {
             "success": False,
@@ -100,6 +365,16 @@ async def get_services() -> Dict:
 
 
 async def get_staff() -> Dict:
+    """
+    Return staff members from the catalog cache.
+    
+    Returns:
+        Dict: Response containing success status, data, and message
+    """
+    return await catalog_cache.get("staff")
+
+
+async def _fetch_staff() -> Dict:
     """
     Fetch staff members from Phorest API or return fake data.
     
@@ -116,8 +391,7 @@ async def get_staff() -> Dict:
             }
         
         # Real API call
-        url = f"{PHOREST_API_BASE_URL}/business/{PHOREST_BUSINESS_ID}/staff"
-        response = requests.get(url, headers=HEADERS, timeout=10)
+        response = await _phorest_request("GET", "/staff", endpoint="staff", priority=PRIORITY_BACKGROUND)
         
         if response.status_code == 200:
             data = response.json()
@@ -133,7 +407,14 @@ async def get_staff() -> Dict:
                 "data": None
             }
             
-    except requests.exceptions.RequestException as e:
+    except UpstreamUnavailableError as e:
+        logger.warning(f"Phorest call rejected while fetching staff: {str(e)}")
+        return {
+            "success": False,
+            "message": f"Phorest temporarily unavailable while fetching staff: {str(e)}",
+            "data": None
+        }
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching staff: {str(e)}")
         return {
             "success": False,
@@ -149,62 +430,135 @@ async def get_staff() -> Dict:
         }
 
 
-def search_clients(query: str, limit: int = 10) -> Dict:
+# Services and staff change rarely; serve them from memory and refresh ahead
+catalog_cache = CatalogCache(
+    ttl=PHOREST_CATALOG_TTL,
+    max_stale=PHOREST_CATALOG_MAX_STALE,
+    refresh_interval=PHOREST_CATALOG_REFRESH_INTERVAL
+)
+catalog_cache.register("services", lambda: single_flight.do(("services",), _fetch_services))
+catalog_cache.register("staff", lambda: single_flight.do(("staff",), _fetch_staff))
+
+
+async def _rank_fuzzy_candidates(query: str, clients: List[Dict], limit: int, min_score: float,
+                                 after: Optional[list] = None) -> Tuple[List[Dict], Optional[list]]:
+    """
+    Fuzzy ranking for the real API, which only matches exactly.
+
+    Phorest's search misses misspelled names, so the candidates are widened with
+    one extra search for the first letters of the longest query token and then
+    ranked by a throwaway ClientIndex. Every page ranks the same candidates and
+    resumes after the (score, ID) position of the previous one.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return clients[:limit], None
+    stem = max(tokens, key=len)[:FUZZY_CANDIDATE_PREFIX]
+    params = {"query": stem, "limit": FUZZY_CANDIDATE_LIMIT}
+    response = await _phorest_request("GET", "/clients/search", endpoint="clients_search", params=params)
+    if response.status_code == 200:
+        clients = clients + response.json().get("clients", [])
+    return ClientIndex(clients).fuzzy_search_page(query, limit, min_score, after)
+
+
+def _encode_cursor(query: str, fuzzy: bool, position: list) -> str:
+    """Opaque pagination cursor: the position plus the query it belongs to."""
+    payload = json.dumps({"q": query.strip().casefold(), "f": fuzzy, "p": position}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(query: str, fuzzy: bool, cursor: str) -> list:
+    """Position stored in a cursor; ValueError if it is malformed or from another search."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        position = payload["p"]
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Malformed cursor")
+    if payload.get("q") != query.strip().casefold() or payload.get("f") != fuzzy or not isinstance(position, list):
+        raise ValueError("Cursor does not belong to this search")
+    return position
+
+
+async def search_clients(query: str, limit: int = 10, fuzzy: bool = False,
+                         min_score: Optional[float] = None, cursor: Optional[str] = None) -> Dict:
     """
     Search for clients by name or other criteria.
     
     Args:
         query: Search query string
-        limit: Maximum number of results to return
+        limit: Maximum number of results to return (page size)
+        fuzzy: Tolerate typos in names; results are ranked and carry a "score".
+            Phone numbers and emails are always looked up exactly
+        min_score: Lowest accepted fuzzy score (default CLIENT_SEARCH_FUZZY_MIN_SCORE)
+        cursor: "nextCursor" of the previous page to continue a search
         
     Returns:
-        Dict: Response containing success status, data, and message
+        Dict: Response containing success status, data (clients and nextCursor,
+        None on the last page), and message
     """
     try:
+        if fuzzy and (is_phone_query(query) or "@" in query):
+            # Fuzzy search only scores name tokens
+            fuzzy = False
+        min_score = FUZZY_MIN_SCORE if min_score is None else min_score
+        position = _decode_cursor(query, fuzzy, cursor) if cursor else None
+        offset = 0
+        if not fuzzy and not USE_FAKE_API:
+            # Upstream results are paged by offset; positions also carry the ID
+            # of the previous page's last client
+            if position is not None and (len(position) not in (1, 2) or not isinstance(position[0], int)
+                                         or position[0] < 0):
+                raise ValueError("Malformed cursor")
+            offset = position[0] if position else 0
+
         if USE_FAKE_API:
-            logger.info(f"Using fake API for search_clients: query='{query}'")
-            # Generate fake clients based on query
-            fake_clients = []
-            
-            # Add some test clients that will always match certain names
-            test_clients = [
-                {"id": "cli_001", "name": "Pascal Erni", "email": "pascal.erni@email.com", "phone": "+49 123 45678"},
-                {"id": "cli_002", "name": "Max Mustermann", "email": "max.mustermann@email.com", "phone": "+49 234 56789"},
-                {"id": "cli_003", "name": "Erika Musterfrau", "email": "erika.musterfrau@email.com", "phone": "+49 345 67890"},
-            ]
-            
-            # Search in test clients first
-            for client in test_clients:
-                if query.lower() in client["name"].lower():
-                    fake_clients.append(client)
-            
-            # Then search in random names
-            for i, name in enumerate(FAKE_CLIENT_NAMES):
-                if query.lower() in name.lower() and len(fake_clients) < limit:
-                    fake_clients.append({
-                        "id": f"cli_{i+100:03d}",
-                        "name": name,
-                        "email": f"{name.lower().replace(' ', '.')}@email.com",
-                        "phone": f"+49 {random.randint(100, 999)} {random.randint(10000, 99999)}"
-                    })
+            logger.info(f"Using fake API for search_clients: query='{query}', fuzzy={fuzzy}")
+            if fuzzy:
+                # Ranked results are paged by (score, ID), see ClientIndex.fuzzy_search_page
+                fake_clients, position = fake_client_index.fuzzy_search_page(query, limit, min_score, position)
+            else:
+                fake_clients, position = fake_client_index.search_page(query, limit, position)
             
             return {
                 "success": True,
-                "data": {"clients": fake_clients[:limit]},
+                "data": {
+                    "clients": fake_clients,
+                    "nextCursor": _encode_cursor(query, fuzzy, position) if position else None
+                },
                 "message": f"Found {len(fake_clients)} clients (fake mode)"
             }
         
-        # Real API call
-        url = f"{PHOREST_API_BASE_URL}/business/{PHOREST_BUSINESS_ID}/clients/search"
-        params = {"query": query, "limit": limit}
-        response = requests.get(url, headers=HEADERS, params=params, timeout=10)
+        # Real API call (one extra result tells whether another page exists)
+        params = {"query": query, "limit": limit + 1, "offset": offset}
+        if fuzzy:
+            # The same candidates for every page, ranked and paged by (score, ID)
+            params.update(limit=FUZZY_CANDIDATE_LIMIT, offset=0)
+        response = await _phorest_request("GET", "/clients/search", endpoint="clients_search", params=params)
         
         if response.status_code == 200:
             data = response.json()
+            clients = data.get("clients", [])
+            if fuzzy:
+                clients, position = await _rank_fuzzy_candidates(query, clients, limit, min_score, position)
+            else:
+                previous_last = position[1] if position and len(position) == 2 else None
+                ids = [client.get("id") for client in clients]
+                if previous_last is not None and previous_last in ids:
+                    # Upstream ignored the offset and returned earlier results again: end the stream
+                    logger.warning(f"Client search for '{query}' repeated results at offset {offset}, stopping")
+                    clients, position = clients[ids.index(previous_last) + 1:][:limit], None
+                else:
+                    # A short page (no extra result) is the last one
+                    more = len(clients) > limit
+                    clients = clients[:limit]
+                    position = [offset + limit, clients[-1].get("id")] if more and clients else None
             return {
                 "success": True,
-                "data": {"clients": data.get("clients", [])},
-                "message": f"Found {len(data.get('clients', []))} clients"
+                "data": {
+                    "clients": clients,
+                    "nextCursor": _encode_cursor(query, fuzzy, position) if position else None
+                },
+                "message": f"Found {len(clients)} clients"
             }
         else:
             return {
@@ -213,7 +567,21 @@ def search_clients(query: str, limit: int = 10) -> Dict:
                 "data": None
             }
             
-    except requests.exceptions.RequestException as e:
+    except ValueError as e:
+        return {
+            "success": False,
+            "status_code": 400,
+            "message": str(e),
+            "data": None
+        }
+    except UpstreamUnavailableError as e:
+        logger.warning(f"Phorest call rejected while searching clients: {str(e)}")
+        return {
+            "success": False,
+            "message": f"Phorest temporarily unavailable while searching clients: {str(e)}",
+            "data": None
+        }
+    except httpx.HTTPError as e:
         logger.error(f"Error searching clients: {str(e)}")
         return {
             "success": False,
@@ -229,7 +597,7 @@ def search_clients(query: str, limit: int = 10) -> Dict:
         }
 
 
-def get_client(client_id: str) -> Dict:
+async def get_client(client_id: str) -> Dict:
     """
     Fetch a specific client by ID.
     
@@ -242,6 +610,14 @@ def get_client(client_id: str) -> Dict:
     try:
         if USE_FAKE_API:
             logger.info(f"Using fake API for get_client: id='{client_id}'")
+            indexed_client = fake_client_index.get(client_id)
+            if indexed_client is not None:
+                return {
+                    "success": True,
+                    "data": {"client": indexed_client},
+                    "message": "Client retrieved successfully (fake mode)"
+                }
+            
             # Generate a fake client
             fake_client = {
                 "id": client_id,
@@ -259,8 +635,7 @@ def get_client(client_id: str) -> Dict:
             }
         
         # Real API call
-        url = f"{PHOREST_API_BASE_URL}/business/{PHOREST_BUSINESS_ID}/clients/{client_id}"
-        response = requests.get(url, headers=HEADERS, timeout=10)
+        response = await _phorest_request("GET", f"/clients/{client_id}", endpoint="clients_get")
         
         if response.status_code == 200:
             data = response.json()
@@ -282,7 +657,14 @@ def get_client(client_id: str) -> Dict:
                 "data": None
             }
             
-    except requests.exceptions.RequestException as e:
+    except UpstreamUnavailableError as e:
+        logger.warning(f"Phorest call rejected while fetching client: {str(e)}")
+        return {
+            "success": False,
+            "message": f"Phorest temporarily unavailable while fetching client: {str(e)}",
+            "data": None
+        }
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching client: {str(e)}")
         return {
             "success": False,
@@ -298,7 +680,143 @@ def get_client(client_id: str) -> Dict:
         }
 
 
-def get_available_slots(staff_id: str, service_id: str, date: str) -> Dict:
+# Availability per (staff, service, date); bookings invalidate the (staff, date) entries
+availability_cache = AvailabilityCache(
+    max_entries=PHOREST_AVAILABILITY_CACHE_SIZE,
+    ttl=PHOREST_AVAILABILITY_TTL
+)
+
+
+async def get_available_slots(staff_id: str, service_id: str, date: str) -> Dict:
+    """
+    Get available appointment slots, served from the availability cache when possible.
+    
+    Args:
+        staff_id: The staff member's ID
+        service_id: The service ID
+        date: Date in YYYY-MM-DD format
+        
+    Returns:
+        Dict: Response containing success status, data, and message
+    """
+    cached = availability_cache.get(staff_id, service_id, date)
+    if cached is not None:
+        return cached
+    
+    # The generation is part of the key: a caller arriving after a booking invalidated
+    # (staff, date) must not join a fetch that started before it
+    with availability_cache.fetching(staff_id, date) as generation:
+        result = await single_flight.do(
+            ("availability", staff_id, service_id, date, generation),
+            lambda: _fetch_available_slots(staff_id, service_id, date)
+        )
+        if result.get("success"):
+            availability_cache.put(staff_id, service_id, date, result, generation=generation)
+    return result
+
+
+async def get_available_slots_batch(staff_ids: List[str], service_ids: List[str],
+                                    dates: List[str], concurrency: Optional[int] = None) -> List[Dict]:
+    """
+    Fetch availability for every (staff, service, date) combination concurrently.
+    
+    Upstream calls run under a semaphore so that at most ``concurrency`` are
+    in flight at once. A failing cell does not fail the batch; it is reported
+    with ``success: False`` and its error message.
+    
+    Args:
+        staff_ids: Staff member IDs
+        service_ids: Service IDs
+        dates: Dates in YYYY-MM-DD format
+        concurrency: Maximum parallel upstream calls (default PHOREST_BATCH_CONCURRENCY)
+        
+    Returns:
+        List[Dict]: One result per cell, in staff/service/date order
+    """
+    if USE_FAKE_API:
+        # One vectorized engine pass per service instead of one call per cell;
+        # unknown stylists and malformed dates are reported per cell
+        errors = {}
+        for staff_id in staff_ids:
+            for date in dates:
+                try:
+                    fake_engine.validate(staff_id, date)
+                except ValueError as e:
+                    errors[(staff_id, date)] = str(e)
+        # A cell fails for a bad stylist or a bad date, so the valid cells form a cross product
+        valid_staff = [s for s in dict.fromkeys(staff_ids) if any((s, d) not in errors for d in dates)]
+        valid_dates = [d for d in dict.fromkeys(dates) if any((s, d) not in errors for s in staff_ids)]
+        grids = {service_id: _fake_free_slots(valid_staff, service_id, valid_dates) for service_id in service_ids}
+        return [
+            {"staffId": staff_id, "serviceId": service_id, "date": date,
+             "success": False, "availableSlots": [], "message": errors[(staff_id, date)]}
+            if (staff_id, date) in errors else
+            {"staffId": staff_id, "serviceId": service_id, "date": date,
+             "success": True, "availableSlots": grids[service_id][(staff_id, date)]}
+            for staff_id in staff_ids for service_id in service_ids for date in dates
+        ]
+    
+    semaphore = asyncio.Semaphore(concurrency or PHOREST_BATCH_CONCURRENCY)
+    cells = [(staff_id, service_id, date) for staff_id in staff_ids
+             for service_id in service_ids for date in dates]
+    
+    async def fetch_cell(staff_id: str, service_id: str, date: str) -> Dict:
+        async with semaphore:
+            return await get_available_slots(staff_id, service_id, date)
+    
+    results = await asyncio.gather(*(fetch_cell(*cell) for cell in cells), return_exceptions=True)
+    
+    merged = []
+    for (staff_id, service_id, date), result in zip(cells, results):
+        cell = {"staffId": staff_id, "serviceId": service_id, "date": date}
+        if isinstance(result, Exception):
+            logger.error(f"Unexpected error in availability batch cell {cell}: {str(result)}")
+            cell.update({"success": False, "availableSlots": [], "message": f"Unexpected error: {str(result)}"})
+        elif result.get("success"):
+            cell.update({"success": True, "availableSlots": result["data"]["availableSlots"]})
+        else:
+            cell.update({"success": False, "availableSlots": [], "message": result.get("message", "Unknown error")})
+        merged.append(cell)
+    return merged
+
+
+def _fake_service_duration(service_id: str) -> int:
+    """Duration of a fake service in minutes (30 for unknown IDs)."""
+    for service in FAKE_SERVICES:
+        if service["id"] == service_id:
+            return service["duration"]
+    return 30
+
+
+def _seed_fake_day(staff_id: str, date: str) -> None:
+    """
+    Mark some base slots of a stylist-day as already booked, once per day.
+    
+    Uses a deterministic seed based on staff and date so the same day
+    always starts out the same. A local generator keeps the global random
+    module untouched.
+    """
+    if (staff_id, date) in _fake_seeded_days:
+        return
+    _fake_seeded_days.add((staff_id, date))
+    
+    seed_string = f"{staff_id}-{date}"
+    rng = random.Random(sum(ord(c) for c in seed_string))
+    open_times = set(rng.sample(FAKE_BASE_TIMES, k=rng.randint(6, 12)))
+    for slot in FAKE_BASE_TIMES:
+        if slot not in open_times:
+            fake_engine.mark_busy(staff_id, date, to_minutes(slot), 30)
+
+
+def _fake_free_slots(staff_ids: List[str], service_id: str, dates: List[str]) -> Dict:
+    """Free slots for a service for all stylists and dates in one vectorized engine pass."""
+    for staff_id in staff_ids:
+        for date in dates:
+            _seed_fake_day(staff_id, date)
+    return fake_engine.free_slots(staff_ids, dates, _fake_service_duration(service_id))
+
+
+async def _fetch_available_slots(staff_id: str, service_id: str, date: str) -> Dict:
     """
     Get available appointment slots for a specific staff member and service on a given date.
     
@@ -314,30 +832,11 @@ def get_available_slots(staff_id: str, service_id: str, date: str) -> Dict:
         if USE_FAKE_API:
             logger.info(f"Using fake API for get_available_slots: staff={staff_id}, service={service_id}, date={date}")
             
-            # Use a deterministic seed based on the input parameters
-            # This ensures the same slots are returned for the same query
-            seed_string = f"{staff_id}-{service_id}-{date}"
-            seed_value = sum(ord(c) for c in seed_string)
-            random.seed(seed_value)
-            
-            # Generate fake time slots
-            base_times = ["09:00", "09:30", "10:00", "10:30", "11:00", "11:30", 
-                         "13:00", "13:30", "14:00", "14:30", "15:00", "15:30", 
-                         "16:00", "16:30", "17:00", "17:30"]
-            
-            # Remove some slots to simulate bookings (but consistently)
-            num_available = random.randint(6, 12)
-            available_slots = random.sample(base_times, k=num_available)
-            available_slots.sort()
-            
-            # Reset random seed to avoid affecting other random operations
-            random.seed()
-            
-            return {
-                "success": True,
-                "data": {"availableSlots": available_slots},
-                "message": f"Found {len(available_slots)} available slots (fake mode)"
-            }
+            try:
+                fake_engine.validate(staff_id, date)
+            except ValueError as e:
+                return {"success": False, "message": str(e), "data": None}
+            available_slots = _fake_free_slots([staff_id], service_id, [date])[(staff_id, date)]
             
             return {
                 "success": True,
@@ -346,13 +845,12 @@ def get_available_slots(staff_id: str, service_id: str, date: str) -> Dict:
             }
         
         # Real API call
-        url = f"{PHOREST_API_BASE_URL}/business/{PHOREST_BUSINESS_ID}/availability"
         params = {
             "staff_id": staff_id,
             "service_id": service_id,
             "date": date
         }
-        response = requests.get(url, headers=HEADERS, params=params, timeout=10)
+        response = await _phorest_request("GET", "/availability", endpoint="availability", params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -369,7 +867,14 @@ def get_available_slots(staff_id: str, service_id: str, date: str) -> Dict:
                 "data": None
             }
             
-    except requests.exceptions.RequestException as e:
+    except UpstreamUnavailableError as e:
+        logger.warning(f"Phorest call rejected while fetching availability: {str(e)}")
+        return {
+            "success": False,
+            "message": f"Phorest temporarily unavailable while fetching availability: {str(e)}",
+            "data": None
+        }
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching availability: {str(e)}")
         return {
             "success": False,
@@ -386,6 +891,51 @@ def get_available_slots(staff_id: str, service_id: str, date: str) -> Dict:
 
 
 async def create_appointment(appointment_data: Dict) -> Dict:
+    """
+    Create a new appointment and evict the cached availability it affects.
+    
+    Args:
+        appointment_data: See _create_appointment
+            
+    Returns:
+        Dict: Response containing success status, data, and message
+    """
+    result = await _create_appointment(appointment_data)
+    
+    # Booked, conflicting (409) or timed out: the cached view of that day may be outdated
+    staff_id = appointment_data.get("staffId")
+    start_time = appointment_data.get("startTime") or ""
+    if staff_id and start_time:
+        availability_cache.invalidate(staff_id, start_time[:10])
+    if result.get("success"):
+        await _record_booking(appointment_data, result["data"].get("appointment") or {})
+    return result
+
+
+async def _record_booking(appointment_data: Dict, appointment: Dict) -> None:
+    """Mirror a booked appointment into the shared store (agents and CoreBrain read it there)."""
+    start_time = (appointment_data.get("startTime") or "").replace("Z", "")
+    try:
+        start = datetime.fromisoformat(start_time).strftime("%Y-%m-%d %H:%M")
+    except ValueError:
+        start = start_time or None
+    booking = {
+        "external_id": appointment.get("id"),
+        "client_id": appointment_data.get("clientId"),
+        "staff_id": appointment_data.get("staffId"),
+        "service": appointment_data.get("serviceId"),
+        "start": start,
+        "source": "api"
+    }
+    try:
+        # Off the event loop: a write may wait for another process's write lock
+        await asyncio.to_thread(get_store().bookings.add, booking)
+    except Exception as e:
+        # The appointment exists in Phorest either way
+        logger.error(f"Could not record booking {appointment.get('id')} in the store: {str(e)}")
+
+
+async def _create_appointment(appointment_data: Dict) -> Dict:
     """
     Create a new appointment.
     
@@ -402,8 +952,34 @@ async def create_appointment(appointment_data: Dict) -> Dict:
     try:
         if USE_FAKE_API:
             logger.info(f"Using fake API for create_appointment: {appointment_data}")
-            # Simulate appointment creation
-            appointment_id = f"apt_{random.randint(1000, 9999)}"
+            
+            # Occupy the service duration in the fake bitmap, reject overlaps
+            staff_id = appointment_data.get("staffId")
+            start_time = appointment_data.get("startTime") or ""
+            try:
+                start = datetime.fromisoformat(start_time.replace("Z", ""))
+            except ValueError:
+                start = None
+            if staff_id and start is not None:
+                date = start.strftime("%Y-%m-%d")
+                try:
+                    fake_engine.validate(staff_id, date)
+                except ValueError as e:
+                    return {"success": False, "message": str(e), "data": None}
+                start_minute = start.hour * 60 + start.minute
+                duration = _fake_service_duration(appointment_data.get("serviceId"))
+                _seed_fake_day(staff_id, date)
+                if not fake_engine.is_free(staff_id, date, start_minute, duration):
+                    return {
+                        "success": False,
+                        "message": "Time slot is no longer available",
+                        "data": None
+                    }
+                fake_engine.mark_busy(staff_id, date, start_minute, duration)
+            
+            # Simulate appointment creation; the ID becomes the stored booking's
+            # external_id, so it must stay unique across restarts
+            appointment_id = f"apt_{uuid.uuid4().hex[:16]}"
             fake_appointment = {
                 "id": appointment_id,
                 "clientId": appointment_data.get("clientId"),
@@ -421,8 +997,9 @@ async def create_appointment(appointment_data: Dict) -> Dict:
             }
         
         # Real API call
-        url = f"{PHOREST_API_BASE_URL}/business/{PHOREST_BUSINESS_ID}/appointments"
-        response = requests.post(url, headers=HEADERS, json=appointment_data, timeout=10)
+        response = await _phorest_request(
+            "POST", "/appointments", endpoint="appointments", priority=PRIORITY_BOOKING, json=appointment_data
+        )
         
         if response.status_code in [200, 201]:
             data = response.json()
@@ -446,7 +1023,14 @@ async def create_appointment(appointment_data: Dict) -> Dict:
                 "data": None
             }
             
-    except requests.exceptions.RequestException as e:
+    except UpstreamUnavailableError as e:
+        logger.warning(f"Phorest call rejected while creating appointment: {str(e)}")
+        return {
+            "success": False,
+            "message": f"Phorest temporarily unavailable while creating appointment: {str(e)}",
+            "data": None
+        }
+    except httpx.HTTPError as e:
         logger.error(f"Error creating appointment: {str(e)}")
         return {
             "success": False,
@@ -476,12 +1060,14 @@ async def test_client():
     print(f"\nStaff: {json.dumps(staff, indent=2)}")
     
     # Test search_clients
-    clients = search_clients("Max", limit=5)
+    clients = await search_clients("Max", limit=5)
     print(f"\nClient Search: {json.dumps(clients, indent=2)}")
     
     # Test get_available_slots
-    slots = get_available_slots("stf_001", "srv_001", "2025-07-15")
+    slots = await get_available_slots("stf_001", "srv_001", "2025-07-15")
     print(f"\nAvailable Slots: {json.dumps(slots, indent=2)}")
+    
+    await close_http_client()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,168 @@
+"""
+Client-side rate limiting for Phorest upstream calls.
+A token bucket keeps us within the per-business request quota; when it runs
+dry, requests queue by priority so bookings go ahead of background reads.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from api.services.resilience import UpstreamUnavailableError
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Priority classes, lower value is served first
+PRIORITY_BOOKING = 0
+PRIORITY_INTERACTIVE = 1
+PRIORITY_BACKGROUND = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_BOOKING: "booking",
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_BACKGROUND: "background"
+}
+
+# Recent wait times kept per priority for percentiles
+WAIT_SAMPLES = 1000
+
+
+class RateLimitTimeout(UpstreamUnavailableError):
+    """Raised when a queued request passes its deadline before getting a token."""
+
+    def __init__(self, priority: int, waited: float):
+        super().__init__(
+            f"Rate limit queue deadline exceeded for {PRIORITY_NAMES.get(priority, priority)} "
+            f"request after {waited:.2f}s"
+        )
+        self.priority = priority
+        self.waited = waited
+
+
+class RateLimiter:
+    """
+    Token bucket with a priority queue of waiters.
+
+    Tokens refill at ``rate`` per second up to ``burst``. A request takes a
+    token at once if one is free and nobody is queued; otherwise it waits in
+    a heap ordered by (priority, arrival). Each waiter has a deadline and
+    raises RateLimitTimeout when it passes. A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+        self._queue: List[list] = []
+        self._counter = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._depth = {priority: 0 for priority in PRIORITY_NAMES}
+        self._waits: Dict[int, Deque[float]] = {priority: deque(maxlen=WAIT_SAMPLES) for priority in PRIORITY_NAMES}
+        self.stats = {
+            PRIORITY_NAMES[priority]: {"granted": 0, "queued": 0, "timeouts": 0}
+            for priority in PRIORITY_NAMES
+        }
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, priority: int, timeout: float) -> float:
+        """
+        Wait for a token.
+
+        Args:
+            priority: One of the PRIORITY_* classes
+            timeout: Seconds the request may wait in the queue
+
+        Returns:
+            float: Seconds spent waiting
+
+        Raises:
+            RateLimitTimeout: No token was granted before the deadline
+        """
+        name = PRIORITY_NAMES[priority]
+        if self.rate <= 0:
+            self.stats[name]["granted"] += 1
+            return 0.0
+
+        self._refill()
+        if not self._queue and self.tokens >= 1:
+            self.tokens -= 1
+            self.stats[name]["granted"] += 1
+            self._waits[priority].append(0.0)
+            return 0.0
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        enqueued_at = time.monotonic()
+        heapq.heappush(self._queue, [priority, next(self._counter), waiter])
+        self._depth[priority] += 1
+        self.stats[name]["queued"] += 1
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            waited = time.monotonic() - enqueued_at
+            self.stats[name]["timeouts"] += 1
+            raise RateLimitTimeout(priority, waited)
+        finally:
+            # Granted or given up, the request is no longer queued
+            self._depth[priority] -= 1
+
+        waited = time.monotonic() - enqueued_at
+        self.stats[name]["granted"] += 1
+        self._waits[priority].append(waited)
+        return waited
+
+    def _dispatch(self) -> None:
+        """Hand free tokens to queued waiters in priority order and re-arm the timer."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._refill()
+        while self._queue and self.tokens >= 1:
+            _, _, waiter = heapq.heappop(self._queue)
+            if waiter.done():
+                continue  # timed out or cancelled while queued
+            self.tokens -= 1
+            waiter.set_result(None)
+
+        # Drop abandoned waiters at the head so they do not keep the timer alive
+        while self._queue and self._queue[0][2].done():
+            heapq.heappop(self._queue)
+
+        if self._queue:
+            delay = (1 - self.tokens) / self.rate
+            self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def snapshot(self) -> Dict:
+        """Return tokens, queue depth and wait-time statistics per priority."""
+        self._refill()
+        priorities = {}
+        for priority, name in PRIORITY_NAMES.items():
+            waits = sorted(self._waits[priority])
+            priorities[name] = {
+                **self.stats[name],
+                "queue_depth": self._depth[priority],
+                "wait_ms": {
+                    "mean": round(sum(waits) / len(waits) * 1000, 3) if waits else 0.0,
+                    "p95": round(waits[int(0.95 * (len(waits) - 1))] * 1000, 3) if waits else 0.0,
+                    "max": round(waits[-1] * 1000, 3) if waits else 0.0
+                }
+            }
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self.tokens, 3),
+            "queue_depth": sum(self._depth.values()),
+            "priorities": priorities
+        }
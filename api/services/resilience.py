@@ -0,0 +1,157 @@
+"""
+Resilience helpers for Phorest upstream calls.
+Circuit breakers fail fast while an endpoint is down, and a shared retry
+budget bounds how much extra load retries may add during an outage.
+"""
+
+import logging
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class UpstreamUnavailableError(Exception):
+    """Base for calls rejected locally before reaching Phorest."""
+
+
+class CircuitOpenError(UpstreamUnavailableError):
+    """Raised when a call is rejected because the endpoint's circuit is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Circuit '{name}' is open, retry in {retry_in:.1f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Three-state circuit breaker for one upstream endpoint.
+
+    closed:    calls pass; ``failure_threshold`` consecutive failures open it
+    open:      calls are rejected until ``reset_timeout`` has passed
+    half_open: a single probe call is let through; success closes the
+               circuit, failure opens it again
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self.stats = {"calls": 0, "successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def before_call(self) -> None:
+        """Admit a call or raise CircuitOpenError."""
+        if self.state == OPEN:
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed < self.reset_timeout:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.name, self.reset_timeout - elapsed)
+            self.state = HALF_OPEN
+            logger.info(f"Circuit '{self.name}' half-open, sending probe")
+
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.name, 0.0)
+            self._probe_in_flight = True
+
+        self.stats["calls"] += 1
+
+    def record_success(self) -> None:
+        self.stats["successes"] += 1
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        if self.state != CLOSED:
+            logger.info(f"Circuit '{self.name}' closed")
+        self.state = CLOSED
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.stats["failures"] += 1
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.stats["opened"] += 1
+                logger.warning(f"Circuit '{self.name}' opened after {self.consecutive_failures} failures")
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Forget an admitted call without an outcome (e.g. the caller was cancelled)."""
+        self._probe_in_flight = False
+
+    def snapshot(self) -> Dict:
+        retry_in = None
+        if self.state == OPEN:
+            retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 3)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in": retry_in,
+            **self.stats
+        }
+
+
+class RetryBudget:
+    """
+    Global cap on retries within a sliding time window.
+
+    A retry is allowed while retries in the window stay below
+    ``min_retries + ratio * requests``, so retries can add at most ``ratio``
+    extra load (plus a small floor for low traffic).
+    """
+
+    def __init__(self, ratio: float, min_retries: int, window: float):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+        self.stats = {"retries": 0, "exhausted": 0}
+
+    def _trim(self, now: float) -> None:
+        cutoff = now - self.window
+        for events in (self._requests, self._retries):
+            while events and events[0] < cutoff:
+                events.popleft()
+
+    def record_request(self) -> None:
+        self._requests.append(time.monotonic())
+
+    def try_acquire(self) -> bool:
+        """Take one retry from the budget; False if it is exhausted."""
+        now = time.monotonic()
+        self._trim(now)
+        if len(self._retries) >= self.min_retries + self.ratio * len(self._requests):
+            self.stats["exhausted"] += 1
+            return False
+        self._retries.append(now)
+        self.stats["retries"] += 1
+        return True
+
+    def snapshot(self) -> Dict:
+        self._trim(time.monotonic())
+        return {
+            "window_requests": len(self._requests),
+            "window_retries": len(self._retries),
+            "available": max(0, int(self.min_retries + self.ratio * len(self._requests)) - len(self._retries)),
+            **self.stats
+        }
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter: uniform(0, min(cap, base * 2^attempt))."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
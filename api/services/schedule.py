@@ -0,0 +1,142 @@
+"""
+Schedule Engine
+Per-stylist, per-day appointment schedules for conflict detection.
+Each day is a sorted list of non-overlapping [start, end) intervals in
+minutes since midnight, so appointments of any duration can be checked,
+inserted and cancelled with a binary search instead of comparing
+"HH:MM" strings in lists.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Opening hours as (start, end) minute ranges, lunch break 12:00-13:00
+DEFAULT_OPENING_BLOCKS = [(9 * 60, 12 * 60), (13 * 60, 18 * 60)]
+DEFAULT_SLOT_STEP = 30
+
+
+def to_minutes(hhmm: str) -> int:
+    """'14:30' -> 870"""
+    hours, minutes = hhmm.split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def format_minutes(minutes: int) -> str:
+    """870 -> '14:30'"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class DaySchedule:
+    """
+    Non-overlapping appointments of one stylist on one day.
+
+    ``starts``/``ends``/``ids`` are parallel lists sorted by start. Because
+    intervals never overlap, ends are sorted as well, so the only candidates
+    for a conflict with [start, end) are the interval just before ``start``
+    and the one just after it. Lookups are O(log n) bisections; inserts and
+    cancellations add a list shift (a memmove) on top, which stays in the
+    microsecond range even with thousands of appointments per day.
+    """
+
+    __slots__ = ("starts", "ends", "ids", "_start_by_id")
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.ids: List[str] = []
+        self._start_by_id: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def conflict(self, start: int, end: int) -> Optional[str]:
+        """Return the ID of an appointment overlapping [start, end), or None."""
+        i = bisect_right(self.starts, start)
+        if i > 0 and self.ends[i - 1] > start:
+            return self.ids[i - 1]
+        if i < len(self.starts) and self.starts[i] < end:
+            return self.ids[i]
+        return None
+
+    def is_free(self, start: int, end: int) -> bool:
+        return self.conflict(start, end) is None
+
+    def insert(self, start: int, end: int, appointment_id: str) -> bool:
+        """Add [start, end) unless it overlaps; returns False on conflict."""
+        if end <= start:
+            raise ValueError(f"Invalid interval [{start}, {end})")
+        if appointment_id in self._start_by_id:
+            raise ValueError(f"Appointment '{appointment_id}' already scheduled")
+        if self.conflict(start, end) is not None:
+            return False
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, appointment_id)
+        self._start_by_id[appointment_id] = start
+        return True
+
+    def cancel(self, appointment_id: str) -> bool:
+        """Remove an appointment; returns False if it is not scheduled."""
+        start = self._start_by_id.pop(appointment_id, None)
+        if start is None:
+            return False
+        i = bisect_left(self.starts, start)
+        del self.starts[i]
+        del self.ends[i]
+        del self.ids[i]
+        return True
+
+    def intervals(self) -> List[Tuple[int, int, str]]:
+        return list(zip(self.starts, self.ends, self.ids))
+
+    def free_starts(self, duration: int, blocks: Iterable[Tuple[int, int]] = DEFAULT_OPENING_BLOCKS,
+                    step: int = DEFAULT_SLOT_STEP) -> List[int]:
+        """Start minutes on the ``step`` grid where ``duration`` fits without overlap."""
+        free = []
+        for block_start, block_end in blocks:
+            for start in range(block_start, block_end - duration + 1, step):
+                if self.conflict(start, start + duration) is None:
+                    free.append(start)
+        return free
+
+
+class ScheduleBook:
+    """Day schedules of all stylists, keyed by (stylist_id, date)."""
+
+    def __init__(self):
+        self._days: Dict[Tuple[str, str], DaySchedule] = {}
+        self._location: Dict[str, Tuple[str, str]] = {}
+
+    def day(self, stylist_id: str, date: str) -> DaySchedule:
+        key = (stylist_id, date)
+        schedule = self._days.get(key)
+        if schedule is None:
+            schedule = self._days[key] = DaySchedule()
+        return schedule
+
+    def conflict(self, stylist_id: str, date: str, start: int, duration: int) -> Optional[str]:
+        schedule = self._days.get((stylist_id, date))
+        return schedule.conflict(start, start + duration) if schedule else None
+
+    def is_free(self, stylist_id: str, date: str, start: int, duration: int) -> bool:
+        return self.conflict(stylist_id, date, start, duration) is None
+
+    def book(self, stylist_id: str, date: str, start: int, duration: int, appointment_id: str) -> bool:
+        """Insert an appointment; returns False if it overlaps an existing one."""
+        if not self.day(stylist_id, date).insert(start, start + duration, appointment_id):
+            return False
+        self._location[appointment_id] = (stylist_id, date)
+        return True
+
+    def cancel(self, appointment_id: str) -> bool:
+        location = self._location.pop(appointment_id, None)
+        if location is None:
+            return False
+        return self._days[location].cancel(appointment_id)
+
+    def free_starts(self, stylist_id: str, date: str, duration: int,
+                    blocks: Iterable[Tuple[int, int]] = DEFAULT_OPENING_BLOCKS,
+                    step: int = DEFAULT_SLOT_STEP) -> List[int]:
+        schedule = self._days.get((stylist_id, date)) or DaySchedule()
+        return schedule.free_starts(duration, blocks, step)
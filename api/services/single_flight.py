@@ -0,0 +1,64 @@
+"""
+Single-flight request coalescing for the Phorest client layer.
+Concurrent identical calls share one in-flight upstream request and its result.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls by key.
+
+    The first caller for a key starts the call as a task; callers arriving
+    while it is still running await the same task instead of starting their
+    own. The task is shielded, so a cancelled caller (e.g. a client that
+    disconnected) does not cancel the call for everyone else.
+
+    Only use this for idempotent reads: every waiter receives the very same
+    result object and must not mutate it.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0}
+        self._coalesced_by_kind: Dict[str, int] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Dict]]) -> Dict:
+        """
+        Run ``fn`` once per key among concurrent callers.
+
+        Args:
+            key: Identifies identical calls; a tuple whose first item names the call kind
+            fn: Coroutine factory performing the upstream call
+
+        Returns:
+            Dict: The (shared) result of ``fn``
+        """
+        self.stats["calls"] += 1
+        task = self._in_flight.get(key)
+
+        if task is None:
+            self.stats["executions"] += 1
+            task = asyncio.get_running_loop().create_task(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _, key=key: self._in_flight.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+            kind = str(key[0]) if isinstance(key, tuple) and key else str(key)
+            self._coalesced_by_kind[kind] = self._coalesced_by_kind.get(kind, 0) + 1
+
+        return await asyncio.shield(task)
+
+    def snapshot(self) -> Dict:
+        """Return counters, coalesced calls per kind and the number of calls in flight."""
+        return {
+            **self.stats,
+            "coalesced_by_kind": dict(self._coalesced_by_kind),
+            "in_flight": len(self._in_flight)
+        }
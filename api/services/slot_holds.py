@@ -0,0 +1,163 @@
+"""
+Slot Holds
+Time-limited reservations of (stylist, start, duration) slots. A hold is
+placed when a customer picks a time and is confirmed (booked in Phorest) or
+released later; concurrent customers are rejected at hold time instead of
+getting a 409 from Phorest after the round trip. Holds expire on their own.
+"""
+
+import heapq
+import logging
+import os
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from api.services.schedule import ScheduleBook, format_minutes
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Hold configuration (seconds)
+SLOT_HOLD_TTL = float(os.getenv("SLOT_HOLD_TTL", "300"))
+SLOT_HOLD_MAX_TTL = float(os.getenv("SLOT_HOLD_MAX_TTL", "900"))
+# Minimum lifetime of a claimed hold, long enough for the Phorest booking call
+SLOT_HOLD_CLAIM_TTL = float(os.getenv("SLOT_HOLD_CLAIM_TTL", "120"))
+
+
+class SlotHoldStore:
+    """
+    Active holds, indexed for conflict checks and for expiry.
+
+    Held intervals live in a ScheduleBook, so overlap checks against other
+    holds are binary searches per stylist-day. Expiry times go into a min-heap
+    of (expires_at, hold_id); a sweep pops only the holds that are actually
+    due, so it costs O(expired * log n) instead of scanning all holds.
+    Released or confirmed holds stay in the heap and are skipped when popped.
+    Every public method sweeps first, so an expired hold never blocks a slot.
+    """
+
+    def __init__(self, default_ttl: float, max_ttl: float, claim_ttl: float = SLOT_HOLD_CLAIM_TTL):
+        self.default_ttl = default_ttl
+        self.max_ttl = max_ttl
+        self.claim_ttl = claim_ttl
+        self._holds: Dict[str, Dict] = {}
+        self._schedules = ScheduleBook()
+        self._expiry: List[Tuple[float, str]] = []
+        self.stats = {"created": 0, "conflicts": 0, "confirmed": 0, "released": 0, "expired": 0}
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drop all holds whose time is up; returns the number of expired holds."""
+        now = time.monotonic() if now is None else now
+        expired = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, hold_id = heapq.heappop(self._expiry)
+            hold = self._holds.get(hold_id)
+            if hold is not None and hold["_expires_at"] == expires_at:
+                self._remove(hold_id)
+                expired += 1
+        self.stats["expired"] += expired
+        return expired
+
+    def hold(self, staff_id: str, date: str, start: int, duration: int, ttl: Optional[float] = None,
+             **details) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Reserve [start, start + duration) on a stylist-day.
+
+        Args:
+            staff_id: Stylist ID
+            date: Day in YYYY-MM-DD format
+            start: Start in minutes since midnight
+            duration: Length in minutes
+            ttl: Seconds until the hold expires, > 0 (default ``default_ttl``, capped at ``max_ttl``)
+            **details: Extra fields stored with the hold (e.g. clientId, serviceId)
+
+        Returns:
+            (hold, None) on success, (None, conflicting_hold_id) if the slot is already held
+
+        Raises:
+            ValueError: If ``ttl`` is not positive
+        """
+        if ttl is not None and not ttl > 0:
+            raise ValueError(f"ttl must be positive, got {ttl}")
+        self.sweep()
+        ttl = min(self.default_ttl if ttl is None else ttl, self.max_ttl)
+        hold_id = f"hold_{uuid.uuid4().hex[:16]}"
+        if not self._schedules.book(staff_id, date, start, duration, hold_id):
+            self.stats["conflicts"] += 1
+            return None, self._schedules.conflict(staff_id, date, start, duration)
+
+        expires_at = time.monotonic() + ttl
+        self._holds[hold_id] = {
+            **details,
+            "id": hold_id,
+            "staffId": staff_id,
+            "date": date,
+            "time": format_minutes(start),
+            "start": start,
+            "duration": duration,
+            "_expires_at": expires_at
+        }
+        heapq.heappush(self._expiry, (expires_at, hold_id))
+        self.stats["created"] += 1
+        return self.public(self._holds[hold_id]), None
+
+    def get(self, hold_id: str) -> Optional[Dict]:
+        """The active hold with this ID, or None if it is unknown or expired."""
+        self.sweep()
+        hold = self._holds.get(hold_id)
+        return self.public(hold) if hold is not None else None
+
+    def claim(self, hold_id: str) -> Optional[Dict]:
+        """
+        Mark a hold as being confirmed, so a concurrent confirmation of the same
+        hold is turned away. The slot stays held until ``release``; its expiry
+        is pushed out to at least ``claim_ttl`` seconds from now, so it cannot
+        run out while the booking call is in flight.
+
+        Returns:
+            The hold, or None if it is unknown, expired or already claimed
+        """
+        self.sweep()
+        hold = self._holds.get(hold_id)
+        if hold is None or hold.get("_claimed"):
+            return None
+        hold["_claimed"] = True
+        expires_at = time.monotonic() + self.claim_ttl
+        if expires_at > hold["_expires_at"]:
+            # The old heap entry no longer matches and is skipped when popped
+            hold["_expires_at"] = expires_at
+            heapq.heappush(self._expiry, (expires_at, hold_id))
+        return self.public(hold)
+
+    def conflict(self, staff_id: str, date: str, start: int, duration: int) -> Optional[str]:
+        """ID of an active hold overlapping the interval, or None."""
+        self.sweep()
+        return self._schedules.conflict(staff_id, date, start, duration)
+
+    def release(self, hold_id: str, confirmed: bool = False) -> bool:
+        """Remove a hold (after booking it or on cancellation); False if it is gone already."""
+        self.sweep()
+        if hold_id not in self._holds:
+            return False
+        self._remove(hold_id)
+        self.stats["confirmed" if confirmed else "released"] += 1
+        return True
+
+    def _remove(self, hold_id: str) -> None:
+        del self._holds[hold_id]
+        self._schedules.cancel(hold_id)
+
+    @staticmethod
+    def public(hold: Dict) -> Dict:
+        """Hold as returned to callers, with the remaining lifetime in seconds."""
+        data = {key: value for key, value in hold.items() if not key.startswith("_")}
+        data["expiresIn"] = round(max(0.0, hold["_expires_at"] - time.monotonic()), 1)
+        return data
+
+    def snapshot(self) -> Dict:
+        self.sweep()
+        return {**self.stats, "active": len(self._holds), "heap_size": len(self._expiry)}
+
+
+slot_holds = SlotHoldStore(default_ttl=SLOT_HOLD_TTL, max_ttl=SLOT_HOLD_MAX_TTL)
@@ -0,0 +1,420 @@
+"""
+HSphere Store
+One embedded SQLite database for clients, stylists, bookings and inventory,
+shared by the agents, CoreBrain and the API. Replaces the Python literal
+modules and whole-file JSON documents in Data/, which were loaded and
+rewritten completely on every change. (CoreBrain's long-term memory is an
+append-only log, see memory_log.py.)
+
+The database runs in WAL mode, so readers never block each other or the
+writer. Every thread reuses one connection, and each entity gets a small
+repository (``store.clients``, ``store.bookings``, ...) with indexed lookups.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from api.services.client_index import is_phone_query, normalize_email, normalize_phone, tokenize
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Store configuration
+HSPHERE_DB_PATH = os.getenv("HSPHERE_DB_PATH", str(Path(__file__).resolve().parents[2] / "Data" / "hsphere.db"))
+HSPHERE_DB_BUSY_TIMEOUT = float(os.getenv("HSPHERE_DB_BUSY_TIMEOUT", "5"))
+HSPHERE_DB_CACHE_MB = int(os.getenv("HSPHERE_DB_CACHE_MB", "64"))
+# Import Data/*.py and Data/*.json into a new database on first use
+HSPHERE_DB_AUTO_MIGRATE = os.getenv("HSPHERE_DB_AUTO_MIGRATE", "true").lower() == "true"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS clients (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    email_key TEXT,
+    phone_key TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS clients_email ON clients(email_key) WHERE email_key IS NOT NULL;
+CREATE INDEX IF NOT EXISTS clients_phone ON clients(phone_key) WHERE phone_key IS NOT NULL;
+
+-- Normalized name tokens, clustered by token for prefix range scans
+CREATE TABLE IF NOT EXISTS client_tokens (
+    token TEXT NOT NULL,
+    client_id TEXT NOT NULL REFERENCES clients(id) ON DELETE CASCADE,
+    PRIMARY KEY (token, client_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS client_tokens_client ON client_tokens(client_id);
+
+CREATE TABLE IF NOT EXISTS stylists (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS stylists_name ON stylists(name COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS bookings (
+    id INTEGER PRIMARY KEY,
+    external_id TEXT UNIQUE,
+    client_id TEXT,
+    client_name TEXT,
+    staff_id TEXT,
+    stylist_name TEXT,
+    service TEXT,
+    start TEXT,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bookings_staff_start ON bookings(staff_id, start);
+CREATE INDEX IF NOT EXISTS bookings_client ON bookings(client_id, start);
+CREATE INDEX IF NOT EXISTS bookings_created ON bookings(created_at);
+
+CREATE TABLE IF NOT EXISTS inventory (
+    name TEXT PRIMARY KEY COLLATE NOCASE,
+    quantity,
+    updated TEXT NOT NULL
+);
+"""
+
+
+def _dumps(record: Dict) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+class Store:
+    """
+    Connection handling plus the repositories.
+
+    Connections are opened lazily, one per thread (sqlite3 connections must
+    not be shared between threads), and reused for every later call on that
+    thread. Writes go through ``transaction()``, which takes the write lock
+    up front (BEGIN IMMEDIATE). Two writers therefore wait for each other via
+    ``busy_timeout`` instead of failing halfway through with a lock upgrade
+    error.
+    """
+
+    def __init__(self, path: str = HSPHERE_DB_PATH, busy_timeout: float = HSPHERE_DB_BUSY_TIMEOUT,
+                 cache_mb: int = HSPHERE_DB_CACHE_MB):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.cache_mb = cache_mb
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection().executescript(SCHEMA)
+
+        self.clients = ClientRepository(self)
+        self.stylists = StylistRepository(self)
+        self.bookings = BookingRepository(self)
+        self.inventory = InventoryRepository(self)
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened and configured on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: no implicit transactions, transaction() manages them
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL: durable across application crashes, fsync only at checkpoints
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            # Page cache per connection (negative value = KiB); keeps index pages of large tables hot
+            conn.execute(f"PRAGMA cache_size=-{self.cache_mb * 1024}")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction; commits on success, rolls back on error. Nested use joins the outer one."""
+        conn = self.connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def query(self, sql: str, params: Iterable = ()) -> List[sqlite3.Row]:
+        return self.connection().execute(sql, tuple(params)).fetchall()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        rows = self.query("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0]["value"] if rows else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO meta(key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+
+    def counts(self) -> Dict[str, int]:
+        """Row count per table (for metrics and the migration report)."""
+        tables = ("clients", "stylists", "bookings", "inventory")
+        return {table: self.query(f"SELECT COUNT(*) AS n FROM {table}")[0]["n"] for table in tables}
+
+    def close(self) -> None:
+        """Close the connections of all threads."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass  # Opened by another thread that is still alive
+        self._local = threading.local()
+
+
+class ClientRepository:
+    """
+    Clients keyed by ``id``. Records without one (Data/clients_data.py)
+    get a generated ID on insert.
+
+    Search follows ClientIndex: name token prefixes in any order, or an exact
+    normalized email or phone number.
+    """
+
+    def __init__(self, store: Store):
+        self.store = store
+
+    def get(self, client_id: str) -> Optional[Dict]:
+        rows = self.store.query("SELECT data FROM clients WHERE id = ?", (client_id,))
+        return json.loads(rows[0]["data"]) if rows else None
+
+    def all(self) -> List[Dict]:
+        return [json.loads(row["data"]) for row in self.store.query("SELECT data FROM clients ORDER BY rowid")]
+
+    def count(self) -> int:
+        return self.store.query("SELECT COUNT(*) AS n FROM clients")[0]["n"]
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        Clients matching a name prefix query, an email or a phone number.
+
+        Args:
+            query: Name tokens in any order ("meier lu"), an email address or a phone number
+            limit: Maximum number of clients to return
+
+        Returns:
+            List[Dict]: Matching clients in insertion order
+        """
+        query = (query or "").strip()
+        if not query or limit <= 0:
+            return []
+        if "@" in query:
+            sql, params = "SELECT data FROM clients WHERE email_key = ?", [normalize_email(query)]
+        elif is_phone_query(query):
+            sql, params = "SELECT data FROM clients WHERE phone_key = ?", [normalize_phone(query)]
+        else:
+            tokens = sorted(set(tokenize(query)), key=len, reverse=True)
+            if not tokens:
+                return []
+            # Walk the token index range of the longest (likely rarest) prefix and
+            # probe each candidate's own tokens for the others, so the scan stops at LIMIT
+            conditions = "".join(
+                " AND EXISTS (SELECT 1 FROM client_tokens o WHERE o.client_id = t.client_id"
+                " AND o.token >= ? AND o.token < ?)" for _ in tokens[1:]
+            )
+            sql = (
+                "SELECT DISTINCT c.rowid, c.data FROM client_tokens t JOIN clients c ON c.id = t.client_id "
+                f"WHERE t.token >= ? AND t.token < ?{conditions}"
+            )
+            params = [bound for token in tokens for bound in (token, token + "\uffff")]
+        rows = self.store.query(f"{sql} LIMIT ?", params + [limit])
+        return [json.loads(row["data"]) for row in rows]
+
+    def upsert(self, client: Dict) -> str:
+        """Insert or replace a client; returns its ID."""
+        return self.upsert_many([client])[0]
+
+    def upsert_many(self, clients: Iterable[Dict]) -> List[str]:
+        """Insert or replace many clients in one transaction; returns their IDs."""
+        rows = []
+        tokens = []
+        for client in clients:
+            client = dict(client)
+            client.setdefault("id", f"local_{uuid.uuid4().hex[:12]}")
+            client_id = str(client["id"])
+            rows.append((client_id, client.get("name", ""), normalize_email(client.get("email")) or None,
+                         normalize_phone(client.get("phone")) or None, _dumps(client)))
+            tokens.extend((token, client_id) for token in set(tokenize(client.get("name", ""))))
+        with self.store.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO clients(id, name, email_key, phone_key, data) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET name = excluded.name, email_key = excluded.email_key, "
+                "phone_key = excluded.phone_key, data = excluded.data",
+                rows
+            )
+            conn.executemany("DELETE FROM client_tokens WHERE client_id = ?", [(row[0],) for row in rows])
+            # In key order, the token index is appended to instead of split all over
+            tokens.sort()
+            conn.executemany("INSERT OR IGNORE INTO client_tokens(token, client_id) VALUES (?, ?)", tokens)
+        return [row[0] for row in rows]
+
+    def remove(self, client_id: str) -> bool:
+        with self.store.transaction() as conn:
+            return conn.execute("DELETE FROM clients WHERE id = ?", (client_id,)).rowcount > 0
+
+
+
+class StylistRepository:
+    """Stylists keyed by ``id`` (Data/stylists_data.py records)."""
+
+    def __init__(self, store: Store):
+        self.store = store
+
+    def get(self, stylist_id: str) -> Optional[Dict]:
+        rows = self.store.query("SELECT data FROM stylists WHERE id = ?", (stylist_id,))
+        return json.loads(rows[0]["data"]) if rows else None
+
+    def by_name(self, name: str) -> Optional[Dict]:
+        rows = self.store.query("SELECT data FROM stylists WHERE name = ? COLLATE NOCASE LIMIT 1", (name,))
+        return json.loads(rows[0]["data"]) if rows else None
+
+    def all(self) -> List[Dict]:
+        return [json.loads(row["data"]) for row in self.store.query("SELECT data FROM stylists ORDER BY rowid")]
+
+    def upsert_many(self, stylists: Iterable[Dict]) -> int:
+        rows = [(str(s["id"]), s.get("name", ""), _dumps(s)) for s in stylists]
+        with self.store.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO stylists(id, name, data) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET name = excluded.name, data = excluded.data",
+                rows
+            )
+        return len(rows)
+
+
+class BookingRepository:
+    """
+    Bookings made by the agents or through the API. ``start`` is
+    "YYYY-MM-DD HH:MM" where known (legacy entries keep their free-text time),
+    so the per-stylist and per-client indexes also serve date range queries.
+    """
+
+    def __init__(self, store: Store):
+        self.store = store
+
+    def add(self, booking: Dict) -> int:
+        """Store a booking; a repeated ``external_id`` updates the existing row. Returns the row ID."""
+        return self.add_many([booking])[0]
+
+    def add_many(self, bookings: Iterable[Dict]) -> List[int]:
+        # A repeated external_id replaces every column derived from the booking;
+        # only created_at keeps its first value
+        ids = []
+        with self.store.transaction() as conn:
+            for booking in bookings:
+                created_at = booking.get("created_at") or datetime.now().isoformat()
+                row = conn.execute(
+                    "INSERT INTO bookings(external_id, client_id, client_name, staff_id, stylist_name, service, "
+                    "start, created_at, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(external_id) DO UPDATE SET client_id = excluded.client_id, "
+                    "client_name = excluded.client_name, staff_id = excluded.staff_id, "
+                    "stylist_name = excluded.stylist_name, service = excluded.service, "
+                    "start = excluded.start, data = excluded.data "
+                    "RETURNING id",
+                    (booking.get("external_id"), booking.get("client_id"), booking.get("client_name"),
+                     booking.get("staff_id"), booking.get("stylist_name"), booking.get("service"),
+                     booking.get("start"), created_at, _dumps(booking))
+                ).fetchone()
+                ids.append(row["id"])
+        return ids
+
+    def for_staff(self, staff_id: str, start_from: str = "", start_to: str = "\uffff") -> List[Dict]:
+        """Bookings of a stylist with start in [start_from, start_to), ordered by start."""
+        return self._fetch(
+            "SELECT id, data FROM bookings WHERE staff_id = ? AND start >= ? AND start < ? ORDER BY start",
+            (staff_id, start_from, start_to)
+        )
+
+    def for_client(self, client_id: str) -> List[Dict]:
+        return self._fetch("SELECT id, data FROM bookings WHERE client_id = ? ORDER BY start", (client_id,))
+
+    def upcoming(self, start_from: str) -> List[Dict]:
+        """Bookings with a known start on or after ``start_from`` ("YYYY-MM-DD")."""
+        return self._fetch(
+            "SELECT id, data FROM bookings WHERE staff_id IS NOT NULL AND start >= ? ORDER BY staff_id, start",
+            (start_from,)
+        )
+
+    def recent(self, limit: int = 50) -> List[Dict]:
+        return self._fetch("SELECT id, data FROM bookings ORDER BY created_at DESC LIMIT ?", (limit,))
+
+    def _fetch(self, sql: str, params: Iterable) -> List[Dict]:
+        return [{**json.loads(row["data"]), "id": row["id"]} for row in self.store.query(sql, params)]
+
+
+class InventoryRepository:
+    """Products and tools by name (case-insensitive), with their quantity."""
+
+    def __init__(self, store: Store):
+        self.store = store
+
+    def all(self) -> List[Dict]:
+        rows = self.store.query("SELECT name, quantity, updated FROM inventory ORDER BY name")
+        return [dict(row) for row in rows]
+
+    def get(self, name: str) -> Optional[Dict]:
+        rows = self.store.query("SELECT name, quantity, updated FROM inventory WHERE name = ?", (name,))
+        return dict(rows[0]) if rows else None
+
+    def set(self, name: str, quantity, updated: Optional[str] = None) -> None:
+        """Create or update an item (an existing item keeps its original spelling)."""
+        self.set_many([{"name": name, "quantity": quantity, "updated": updated}])
+
+    def set_many(self, items: Iterable[Dict]) -> int:
+        now = datetime.now().isoformat()
+        rows = [(item["name"], item.get("quantity"), item.get("updated") or now) for item in items]
+        with self.store.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO inventory(name, quantity, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET quantity = excluded.quantity, updated = excluded.updated",
+                rows
+            )
+        return len(rows)
+
+
+_default_store: Optional[Store] = None
+_default_store_lock = threading.Lock()
+
+
+def get_store() -> Store:
+    """
+    The shared store at HSPHERE_DB_PATH, opened on first use.
+
+    A database that has never been migrated is filled from the legacy files
+    in Data/ once (HSPHERE_DB_AUTO_MIGRATE).
+    """
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                store = Store(HSPHERE_DB_PATH)
+                if HSPHERE_DB_AUTO_MIGRATE and store.get_meta("migrated_at") is None:
+                    from api.services.store_migration import migrate
+                    migrate(store)
+                _default_store = store
+    return _default_store
@@ -0,0 +1,139 @@
+"""
+Store Migration
+One-shot import of the legacy data files into the SQLite store:
+Data/clients_data.py, Data/stylists_data.py, Data/bookingsystem.json and
+Data/inventory.json. Missing files are skipped. The files themselves are
+left in place. (Data/memory_long.json is converted by memory_log.py.)
+
+Usage:
+    python -m api.services.store_migration [--db Data/hsphere.db] [--data-dir Data] [--force]
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from api.services.client_index import normalize_phone
+from api.services.store import HSPHERE_DB_PATH, Store
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_DIR = str(Path(__file__).resolve().parents[2] / "Data")
+
+
+def _stable_id(prefix: str, *parts) -> str:
+    """Same record, same ID, so running the migration twice does not duplicate rows."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f"{prefix}_{digest[:12]}"
+
+
+def load_python_literal(path: str, name: str) -> Optional[list]:
+    """
+    Value of ``name = [...]`` in a Python data module, read without importing it.
+
+    Returns:
+        The literal, or None if the file or the assignment does not exist
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == name for t in node.targets):
+            return ast.literal_eval(node.value)
+    return None
+
+
+def load_json_list(path: str) -> Optional[list]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data if isinstance(data, list) else [data]
+
+
+def _legacy_booking(entry: Dict) -> Dict:
+    """bookingsystem.json entry ({client, stylist, time, timestamp}) as a store booking."""
+    booking = dict(entry)
+    booking.setdefault("external_id", _stable_id("legacy", json.dumps(entry, sort_keys=True)))
+    booking.setdefault("client_name", entry.get("client"))
+    booking.setdefault("stylist_name", entry.get("stylist"))
+    booking.setdefault("created_at", entry.get("timestamp"))
+    # Free-text times ("4pm") stay in the record; only "YYYY-MM-DD HH:MM" is indexed as start
+    when = entry.get("datetime") or entry.get("time") or ""
+    try:
+        booking.setdefault("start", datetime.fromisoformat(when).strftime("%Y-%m-%d %H:%M"))
+    except ValueError:
+        pass
+    return booking
+
+
+def migrate(store: Store, data_dir: str = DEFAULT_DATA_DIR, force: bool = False) -> Dict[str, int]:
+    """
+    Import the legacy files into ``store`` in one transaction.
+
+    Args:
+        store: Target store
+        data_dir: Directory holding the legacy files
+        force: Import again even if the store was migrated before
+
+    Returns:
+        Dict: Imported records per table (empty if the migration already ran)
+    """
+    if store.get_meta("migrated_at") is not None and not force:
+        logger.info("Store already migrated, skipping")
+        return {}
+
+    imported = {}
+    with store.transaction():
+        clients = load_python_literal(os.path.join(data_dir, "clients_data.py"), "clients")
+        if clients is not None:
+            store.clients.upsert_many(
+                {**client, "id": client.get("id") or _stable_id("local", client.get("name"), normalize_phone(client.get("phone")))}
+                for client in clients
+            )
+            imported["clients"] = len(clients)
+
+        stylists = load_python_literal(os.path.join(data_dir, "stylists_data.py"), "stylists")
+        if stylists is not None:
+            imported["stylists"] = store.stylists.upsert_many(stylists)
+
+        bookings = load_json_list(os.path.join(data_dir, "bookingsystem.json"))
+        if bookings is not None:
+            imported["bookings"] = len(store.bookings.add_many(_legacy_booking(entry) for entry in bookings))
+
+        inventory = load_json_list(os.path.join(data_dir, "inventory.json"))
+        if inventory is not None:
+            imported["inventory"] = store.inventory.set_many(inventory)
+
+        store.set_meta("migrated_at", str(time.time()))
+        store.set_meta("migrated_from", data_dir)
+
+    logger.info(f"Migrated legacy data files into {store.path}: {imported}")
+    return imported
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Import the legacy Data/ files into the SQLite store")
+    parser.add_argument("--db", default=HSPHERE_DB_PATH)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--force", action="store_true", help="Import again although the store was migrated")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    store = Store(args.db)
+    imported = migrate(store, args.data_dir, args.force)
+    print(json.dumps({"imported": imported, "rows": store.counts()}, indent=2))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Local Phorest Simulator
+Stateful stand-in for the Phorest API, served as its own ASGI app.
+Keeps clients, staff, services and appointments in memory so the real-mode
+code path of api/services/phorest_api_client.py can be exercised end to end
+without the network. Booked slots disappear from availability, and latency
+and error rates can be injected.
+
+Run:
+    uvicorn api.simulator.phorest_simulator:app --port 8001
+
+Point the API at it:
+    USE_FAKE_API=false PHOREST_API_BASE_URL=http://127.0.0.1:8001 uvicorn api.main:app
+"""
+
+import asyncio
+import os
+import random
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from api.services.client_index import ClientIndex
+from api.services.phorest_api_client import FAKE_SERVICES, FAKE_STAFF, FAKE_CLIENT_NAMES
+from api.services.schedule import ScheduleBook, format_minutes
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Simulator configuration (latency in milliseconds, error rate as fraction 0..1)
+SIM_LATENCY_MS = float(os.getenv("PHOREST_SIM_LATENCY_MS", "0"))
+SIM_JITTER_MS = float(os.getenv("PHOREST_SIM_JITTER_MS", "0"))
+SIM_ERROR_RATE = float(os.getenv("PHOREST_SIM_ERROR_RATE", "0"))
+SIM_NUM_CLIENTS = int(os.getenv("PHOREST_SIM_NUM_CLIENTS", "0"))
+SIM_SEED = int(os.getenv("PHOREST_SIM_SEED", "42"))
+
+SYNTHETIC_FIRST_NAMES = ["Lena", "Noah", "Mia", "Luca", "Emma", "Elias", "Lina", "Leon", "Sofia", "Finn"]
+SYNTHETIC_LAST_NAMES = ["Meier", "Keller", "Huber", "Baumann", "Frei", "Graf", "Brunner", "Moser", "Roth", "Vogel"]
+
+
+class AppointmentRequest(BaseModel):
+    clientId: Optional[str] = None
+    staffId: str
+    serviceId: str
+    startTime: str
+    notes: Optional[str] = None
+
+
+class SimulatorConfig(BaseModel):
+    latency_ms: Optional[float] = None
+    jitter_ms: Optional[float] = None
+    error_rate: Optional[float] = None
+
+
+class SimulatorState:
+    """In-memory Phorest data; all access happens on the event loop thread."""
+
+    def __init__(self, num_clients: int = 0, seed: int = SIM_SEED):
+        self.rng = random.Random(seed)
+        self.services: Dict[str, Dict] = {s["id"]: dict(s) for s in FAKE_SERVICES}
+        self.staff: Dict[str, Dict] = {s["id"]: dict(s) for s in FAKE_STAFF}
+        self.clients: Dict[str, Dict] = {}
+        self.appointments: Dict[str, Dict] = {}
+        self.schedules = ScheduleBook()
+        self._next_appointment = 1
+        self.client_index: Optional[ClientIndex] = None
+
+        for i, name in enumerate(FAKE_CLIENT_NAMES):
+            self.add_client(f"cli_{i + 1:03d}", name)
+        for i in range(num_clients):
+            name = f"{self.rng.choice(SYNTHETIC_FIRST_NAMES)} {self.rng.choice(SYNTHETIC_LAST_NAMES)}"
+            self.add_client(f"cli_{i + 1000:06d}", name)
+        # Built in one go; clients added later are indexed incrementally
+        self.client_index = ClientIndex(self.clients.values())
+
+    def add_client(self, client_id: str, name: str) -> Dict:
+        client = {
+            "id": client_id,
+            "name": name,
+            "email": f"{name.lower().replace(' ', '.')}.{client_id}@email.com",
+            "phone": f"+49 {self.rng.randint(100, 999)} {self.rng.randint(10000, 99999)}",
+            "created_at": "2024-01-15T10:30:00Z"
+        }
+        self.clients[client_id] = client
+        if self.client_index is not None:
+            self.client_index.add(client)
+        return client
+
+    def free_slots(self, staff_id: str, service_id: str, date: str) -> List[str]:
+        """Start times on a 30-minute grid where the whole service fits and nothing overlaps."""
+        duration = self.services[service_id]["duration"]
+        return [format_minutes(start) for start in self.schedules.free_starts(staff_id, date, duration)]
+
+    def book(self, req: AppointmentRequest, start: datetime) -> Tuple[int, Dict]:
+        """Create an appointment; returns (status_code, body)."""
+        if req.staffId not in self.staff:
+            return 404, {"message": f"Staff '{req.staffId}' not found"}
+        if req.serviceId not in self.services:
+            return 404, {"message": f"Service '{req.serviceId}' not found"}
+        if req.clientId is not None and req.clientId not in self.clients:
+            return 404, {"message": f"Client '{req.clientId}' not found"}
+
+        date = start.strftime("%Y-%m-%d")
+        start_minute = start.hour * 60 + start.minute
+        duration = self.services[req.serviceId]["duration"]
+        if format_minutes(start_minute) not in self.free_slots(req.staffId, req.serviceId, date):
+            return 409, {"message": "Time slot is no longer available"}
+
+        appointment_id = f"apt_{self._next_appointment:06d}"
+        self._next_appointment += 1
+        self.schedules.book(req.staffId, date, start_minute, duration, appointment_id)
+        appointment = {
+            "id": appointment_id,
+            "clientId": req.clientId,
+            "staffId": req.staffId,
+            "serviceId": req.serviceId,
+            "startTime": start.isoformat(),
+            "duration": duration,
+            "notes": req.notes,
+            "status": "confirmed",
+            "createdAt": datetime.now().isoformat() + "Z"
+        }
+        self.appointments[appointment_id] = appointment
+        return 201, appointment
+
+
+state = SimulatorState(num_clients=SIM_NUM_CLIENTS)
+config = {"latency_ms": SIM_LATENCY_MS, "jitter_ms": SIM_JITTER_MS, "error_rate": SIM_ERROR_RATE}
+stats = {"requests": 0, "injected_errors": 0}
+_fault_rng = random.Random(SIM_SEED)
+
+app = FastAPI(title="Phorest Simulator")
+
+
+@app.middleware("http")
+async def inject_faults(request: Request, call_next):
+    """Add configured latency and random 503 errors to all Phorest routes."""
+    if request.url.path.startswith("/_sim"):
+        return await call_next(request)
+
+    stats["requests"] += 1
+    delay_ms = config["latency_ms"] + _fault_rng.uniform(0, config["jitter_ms"])
+    if delay_ms > 0:
+        await asyncio.sleep(delay_ms / 1000)
+    if config["error_rate"] > 0 and _fault_rng.random() < config["error_rate"]:
+        stats["injected_errors"] += 1
+        return JSONResponse(status_code=503, content={"message": "Injected simulator error"})
+    return await call_next(request)
+
+
+@app.get("/business/{business_id}/services")
+async def list_services(business_id: str):
+    return {"services": list(state.services.values())}
+
+
+@app.get("/business/{business_id}/staff")
+async def list_staff(business_id: str):
+    return {"staff": list(state.staff.values())}
+
+
+@app.get("/business/{business_id}/clients/search")
+async def search_clients(business_id: str, query: str = Query(...), limit: int = Query(10, ge=0),
+                         offset: int = Query(0, ge=0)):
+    return {"clients": state.client_index.search(query, offset + limit)[offset:]}
+
+
+@app.get("/business/{business_id}/clients/{client_id}")
+async def get_client(business_id: str, client_id: str):
+    client = state.clients.get(client_id)
+    if client is None:
+        return JSONResponse(status_code=404, content={"message": f"Client '{client_id}' not found"})
+    return client
+
+
+@app.get("/business/{business_id}/availability")
+async def availability(business_id: str, staff_id: str = Query(...), service_id: str = Query(...),
+                       date: str = Query(...)):
+    if staff_id not in state.staff or service_id not in state.services:
+        return JSONResponse(status_code=404, content={"message": "Unknown staff or service"})
+    return {"availableSlots": state.free_slots(staff_id, service_id, date)}
+
+
+@app.post("/business/{business_id}/appointments")
+async def create_appointment(business_id: str, req: AppointmentRequest):
+    try:
+        start = datetime.fromisoformat(req.startTime.replace("Z", ""))
+    except ValueError:
+        return JSONResponse(status_code=400, content={"message": f"Invalid startTime '{req.startTime}'"})
+    status_code, body = state.book(req, start)
+    return JSONResponse(status_code=status_code, content=body)
+
+
+@app.get("/_sim/state")
+async def sim_state():
+    """Counts of simulated data plus fault injection settings and stats."""
+    return {
+        "clients": len(state.clients),
+        "staff": len(state.staff),
+        "services": len(state.services),
+        "appointments": len(state.appointments),
+        "config": config,
+        "stats": stats
+    }
+
+
+@app.post("/_sim/config")
+async def sim_config(update: SimulatorConfig):
+    """Change latency/error injection at runtime (e.g. between load test phases)."""
+    for key, value in update.model_dump().items():
+        if value is not None:
+            config[key] = value
+    return config
+
+
+@app.post("/_sim/reset")
+async def sim_reset(num_clients: int = Query(SIM_NUM_CLIENTS)):
+    """Drop all appointments and rebuild the client list."""
+    global state
+    state = SimulatorState(num_clients=num_clients)
+    stats.update({"requests": 0, "injected_errors": 0})
+    return {"clients": len(state.clients), "appointments": 0}
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=int(os.getenv("PHOREST_SIM_PORT", "8001")))
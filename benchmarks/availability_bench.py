@@ -0,0 +1,85 @@
+"""
+Availability Engine Benchmark
+Computes free start times for a whole stylist x date grid with
+api/services/availability_engine.AvailabilityEngine (one vectorized pass)
+and with a per-cell loop over api/services/schedule.ScheduleBook, and checks
+that both return the same slots.
+
+Usage:
+    python -m benchmarks.availability_bench --staff 50 --days 31 --bookings 12
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+from typing import Dict, List
+
+from api.services.availability_engine import AvailabilityEngine
+from api.services.schedule import DEFAULT_OPENING_BLOCKS, ScheduleBook, format_minutes
+
+DURATIONS = [20, 30, 45, 60, 90]
+
+
+def populate(staff_ids: List[str], dates: List[str], bookings: int, seed: int):
+    """Fill both engines with the same random non-overlapping appointments."""
+    rng = random.Random(seed)
+    engine = AvailabilityEngine(max_dates=max(len(dates), 1))
+    book = ScheduleBook()
+    counter = 0
+    for staff_id in staff_ids:
+        for date in dates:
+            for _ in range(bookings):
+                block_start, block_end = rng.choice(DEFAULT_OPENING_BLOCKS)
+                duration = rng.choice(DURATIONS)
+                start = rng.randrange(block_start, block_end - duration + 1, 5)
+                counter += 1
+                if book.book(staff_id, date, start, duration, f"apt_{counter}"):
+                    engine.mark_busy(staff_id, date, start, duration)
+    return engine, book
+
+
+def run(num_staff: int, num_days: int, bookings: int, duration: int, seed: int, repeat: int) -> Dict:
+    staff_ids = [f"stf_{i:03d}" for i in range(num_staff)]
+    dates = [(date(2025, 7, 1) + timedelta(days=d)).isoformat() for d in range(num_days)]
+    engine, book = populate(staff_ids, dates, bookings, seed)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        vectorized = engine.free_slots(staff_ids, dates, duration)
+    vectorized_time = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        looped = {
+            (staff_id, date): [format_minutes(m) for m in book.free_starts(staff_id, date, duration)]
+            for staff_id in staff_ids for date in dates
+        }
+    looped_time = (time.perf_counter() - start) / repeat
+
+    return {
+        "cells": num_staff * num_days,
+        "vectorized_ms": round(vectorized_time * 1000, 3),
+        "per_cell_loop_ms": round(looped_time * 1000, 3),
+        "speedup": round(looped_time / vectorized_time, 2) if vectorized_time else None,
+        "identical": vectorized == looped
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark grid availability computation")
+    parser.add_argument("--staff", type=int, default=50)
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--bookings", type=int, default=12, help="Booking attempts per stylist-day")
+    parser.add_argument("--duration", type=int, default=45, help="Service duration in minutes")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = run(args.staff, args.days, args.bookings, args.duration, args.seed, args.repeat)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
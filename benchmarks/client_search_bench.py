@@ -0,0 +1,193 @@
+"""
+Client Search Benchmark
+Builds api/services/client_index.ClientIndex over synthetic clients and
+compares search latency with a linear scan over the same list (the previous
+fake-mode/simulator approach). Also measures the bulk build, incremental
+inserts and fuzzy search on misspelled names (latency and how often the
+intended name tokens are among the results).
+
+Usage:
+    python -m benchmarks.client_search_bench --clients 100000
+"""
+
+import argparse
+import json
+import random
+import string
+import time
+from typing import Dict, List, Tuple
+
+from api.services.client_index import ClientIndex, normalize_phone, tokenize
+
+FIRST_NAMES = ["Lena", "Noah", "Mia", "Luca", "Emma", "Elias", "Lina", "Leon", "Sofia", "Finn",
+               "Pascal", "Miriam", "Valentina", "Dario", "Sara", "Luis", "Jasmin", "Lukas", "Nina", "Jonas"]
+LAST_SYLLABLES = ["mei", "kel", "hu", "bau", "frei", "graf", "brun", "mo", "roth", "vo",
+                  "ler", "ber", "mann", "ser", "gel", "ner", "li", "tan", "kov", "ni"]
+
+
+def make_clients(n: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    clients = []
+    for i in range(n):
+        last = "".join(rng.choice(LAST_SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+        first = rng.choice(FIRST_NAMES)
+        clients.append({
+            "id": f"cli_{i:07d}",
+            "name": f"{first} {last}",
+            "email": f"{first.lower()}.{last.lower()}.{i}@email.com",
+            "phone": f"+41 7{rng.randint(5, 9)} {rng.randint(100, 999)} {rng.randint(1000, 9999)}"
+        })
+    return clients
+
+
+def linear_search(clients: List[Dict], query: str, limit: int) -> List[Dict]:
+    """Baseline: check every client (same matching rules as the index)."""
+    if "@" in query:
+        return [c for c in clients if c["email"] == query.lower()][:limit]
+    if query.replace(" ", "").lstrip("+").isdigit():
+        key = normalize_phone(query)
+        return [c for c in clients if normalize_phone(c["phone"]) == key][:limit]
+    query_tokens = tokenize(query)
+    results = []
+    for client in clients:
+        tokens = tokenize(client["name"])
+        if all(any(t.startswith(q) for t in tokens) for q in query_tokens):
+            results.append(client)
+            if len(results) >= limit:
+                break
+    return results
+
+
+def make_queries(clients: List[Dict], count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        client = rng.choice(clients)
+        first, last = client["name"].split(" ", 1)
+        kind = rng.randrange(5)
+        if kind == 0:
+            queries.append(first[:rng.randint(1, len(first))])
+        elif kind == 1:
+            queries.append(f"{last[:rng.randint(2, len(last))]} {first[:2]}")
+        elif kind == 2:
+            queries.append(client["name"])
+        elif kind == 3:
+            queries.append(client["email"].upper())
+        else:
+            queries.append("0" + client["phone"][4:])
+    queries.append("".join(rng.choice(string.ascii_lowercase) for _ in range(6)))
+    return queries
+
+
+def misspell(word: str, rng: random.Random) -> str:
+    """One random deletion, substitution or vowel insertion."""
+    i = rng.randrange(len(word))
+    kind = rng.randrange(3)
+    if kind == 0 and len(word) > 2:
+        return word[:i] + word[i + 1:]
+    if kind == 1:
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+    return word[:i] + rng.choice("aeiou") + word[i:]
+
+
+def make_fuzzy_queries(clients: List[Dict], count: int, seed: int) -> List[Tuple[str, List[str]]]:
+    """(misspelled query, intended name tokens) pairs."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        first, last = rng.choice(clients)["name"].split(" ", 1)
+        kind = rng.randrange(4)
+        if kind == 0:
+            queries.append((f"{misspell(first, rng)} {misspell(last, rng)}", [first, last]))
+        elif kind == 1:
+            queries.append((f"{first} {misspell(last, rng)}", [first, last]))
+        elif kind == 2:
+            queries.append((misspell(last, rng), [last]))
+        else:
+            queries.append((misspell(first, rng), [first]))
+    return queries
+
+
+def percentile(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def run(num_clients: int, num_queries: int, limit: int, seed: int, baseline_queries: int) -> Dict:
+    clients = make_clients(num_clients, seed)
+    queries = make_queries(clients, num_queries, seed + 1)
+
+    start = time.perf_counter()
+    index = ClientIndex(clients)
+    build_seconds = time.perf_counter() - start
+
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, limit)
+        timings.append(time.perf_counter() - start)
+
+    baseline = []
+    mismatches = 0
+    for query in queries[:baseline_queries]:
+        start = time.perf_counter()
+        expected = linear_search(clients, query, limit)
+        baseline.append(time.perf_counter() - start)
+        expected_ids = {c["id"] for c in linear_search(clients, query, num_clients)}
+        found = index.search(query, limit)
+        if len(found) != len(expected) or any(c["id"] not in expected_ids for c in found):
+            mismatches += 1
+
+    fuzzy_timings = []
+    found = 0
+    for query, intended in make_fuzzy_queries(clients, num_queries, seed + 3):
+        start = time.perf_counter()
+        results = index.fuzzy_search(query, limit)
+        fuzzy_timings.append(time.perf_counter() - start)
+        if any(all(token in result["name"].split() for token in intended) for result in results):
+            found += 1
+
+    extra = make_clients(1000, seed + 2)
+    start = time.perf_counter()
+    for i, client in enumerate(extra):
+        index.add(dict(client, id=f"new_{i}"))
+    insert_seconds = time.perf_counter() - start
+
+    return {
+        "clients": num_clients,
+        "build_s": round(build_seconds, 3),
+        "insert_us": round(insert_seconds / len(extra) * 1e6, 1),
+        "index_search_ms": {
+            "p50": round(percentile(timings, 50) * 1000, 4),
+            "p99": round(percentile(timings, 99) * 1000, 4),
+            "max": round(max(timings) * 1000, 4)
+        },
+        "linear_search_ms": {
+            "p50": round(percentile(baseline, 50) * 1000, 3),
+            "p99": round(percentile(baseline, 99) * 1000, 3)
+        } if baseline else None,
+        "mismatches": mismatches,
+        "fuzzy_search_ms": {
+            "p50": round(percentile(fuzzy_timings, 50) * 1000, 4),
+            "p99": round(percentile(fuzzy_timings, 99) * 1000, 4),
+            "max": round(max(fuzzy_timings) * 1000, 4)
+        },
+        "fuzzy_recall_at_limit": round(found / len(fuzzy_timings), 3)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the client search index")
+    parser.add_argument("--clients", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline-queries", type=int, default=50,
+                        help="Queries also run as a linear scan (slow) and checked against the index")
+    args = parser.parse_args(argv)
+
+    print(json.dumps(run(args.clients, args.queries, args.limit, args.seed, args.baseline_queries), indent=2))
+
+
+if __name__ == "__main__":
+    main()
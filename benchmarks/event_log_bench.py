@@ -0,0 +1,97 @@
+"""
+Event Log Benchmark
+Writes synthetic improvement events through EventLogWriter (Logs/event_log.py)
+and measures "category X in a time window" queries using the sparse time
+index against a scan of the whole JSONL file, checking both return the same
+events.
+
+Usage:
+    python -m benchmarks.event_log_bench --events 2000000 --dir /tmp/event_log_bench
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from typing import Dict
+
+from Logs.event_log import EventLogWriter, query_events, read_index
+from benchmarks.client_search_bench import percentile
+
+CATEGORIES = ["Booking", "Supervisor", "Inventory", "PromptForge", "SelfImprove", "CoreBrain", "Heartbeat"]
+CATEGORY_WEIGHTS = [10, 5, 3, 2, 1, 2, 40]
+WINDOWS = {"5m": 300, "1h": 3600, "1d": 86400}
+
+
+def run(directory: str, num_events: int, span_days: float, repeat: int, seed: int) -> Dict:
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "improvement_events.jsonl")
+    for suffix in ("", ".idx"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    rng = random.Random(seed)
+    now = time.time()
+    step = span_days * 86400 / num_events
+    # One segment for the whole run; rotation is measured elsewhere
+    writer = EventLogWriter(path, max_bytes=0, max_age=0)
+    start = time.perf_counter()
+    for first in range(0, num_events, 256):
+        writer.write([(now - (num_events - i) * step, rng.choices(CATEGORIES, CATEGORY_WEIGHTS)[0], f"event {i}")
+                      for i in range(first, min(first + 256, num_events))])
+    write_seconds = time.perf_counter() - start
+    writer.close()
+
+    results = {}
+    mismatches = 0
+    for name, width in WINDOWS.items():
+        timings = []
+        found = 0
+        for _ in range(repeat):
+            since = rng.uniform(now - span_days * 86400, now - width)
+            begin = time.perf_counter()
+            events = list(query_events("Booking", since, since + width, path))
+            timings.append(time.perf_counter() - begin)
+            found += len(events)
+        results[name] = {
+            "p50_ms": round(percentile(timings, 50) * 1000, 3),
+            "p99_ms": round(percentile(timings, 99) * 1000, 3),
+            "avg_events": round(found / repeat, 1)
+        }
+
+    # The same question answered by reading every line
+    since = now - span_days * 86400 / 2
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        expected = [e for e in map(json.loads, f)
+                    if e["category"] == "Booking" and since <= e["timestamp"] <= since + 3600]
+    scan_seconds = time.perf_counter() - start
+    mismatches += int(list(query_events("Booking", since, since + 3600, path)) != expected)
+
+    return {
+        "events": num_events,
+        "log_mb": round(os.path.getsize(path) / 1e6, 1),
+        "index_kb": round(os.path.getsize(f"{path}.idx") / 1024, 1),
+        "index_records": len(read_index(f"{path}.idx")[1]),
+        "write_us_per_event": round(write_seconds / num_events * 1e6, 2),
+        "booking_query": results,
+        "full_scan_1h_ms": round(scan_seconds * 1000, 1),
+        "mismatches": mismatches
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark time-window queries on the JSONL event log")
+    parser.add_argument("--dir", default="/tmp/event_log_bench")
+    parser.add_argument("--events", type=int, default=2000000)
+    parser.add_argument("--span-days", type=float, default=30, help="Time covered by the synthetic events")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(run(args.dir, args.events, args.span_days, args.repeat, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
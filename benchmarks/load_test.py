@@ -0,0 +1,349 @@
+"""
+HSphere API Load Test
+Offline load-test harness for api/main.py with scripted scenarios.
+Drives the API with concurrent virtual users and reports RPS, latency
+percentiles and error rates as JSON so runs can be compared between commits.
+
+Scenarios:
+    catalog       GET /services + GET /staff (cold Streamlit session)
+    search        GET /clients/search
+    availability  GET /availability/
+    booking       Full chat flow of Frontend/salon_app.py process_chat_input:
+                  fuzzy name search -> service -> stylist -> date -> time
+                  (POST /holds) -> confirm (POST /holds/{id}/confirm with an
+                  Idempotency-Key) or, for BOOKING_RELEASE_RATE of the
+                  sessions, release (DELETE /holds/{id})
+
+Usage:
+    # Spawn API + Phorest simulator locally and run all scenarios
+    python -m benchmarks.load_test --spawn simulator --duration 20 --output run.json
+
+    # Against an already running API, compare to an earlier run
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000 --compare run.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+SCENARIOS = ["catalog", "search", "availability", "booking"]
+SEARCH_TERMS = ["Max", "Pascal", "Erika", "Schmidt", "Weber", "Anna", "Lisa", "Meyer", "xyz"]
+BOOKING_RELEASE_RATE = 0.2  # Booking sessions that release their hold instead of confirming
+READY_TIMEOUT = 20
+
+
+class Recorder:
+    """Collects per-request latencies and errors, grouped by endpoint."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.status_codes: Dict[str, Dict[str, int]] = {}
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str, label: str,
+                      **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        response = None
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = str(response.status_code)
+            failed = response.status_code >= 400
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+            failed = True
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.samples.setdefault(label, []).append(elapsed_ms)
+        codes = self.status_codes.setdefault(label, {})
+        codes[status] = codes.get(status, 0) + 1
+        if failed:
+            self.errors[label] = self.errors.get(label, 0) + 1
+        return response if not failed else None
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "rps": round(count / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "mean": round(sum(values) / count, 3) if count else 0.0,
+            "p50": round(percentile(values, 50), 3),
+            "p95": round(percentile(values, 95), 3),
+            "p99": round(percentile(values, 99), 3),
+            "max": round(values[-1], 3) if count else 0.0
+        }
+    }
+
+
+# --- Scenarios -------------------------------------------------------------
+
+async def scenario_catalog(client, rec, rng, catalog):
+    await rec.request(client, "GET", "/services", "GET /services")
+    await rec.request(client, "GET", "/staff", "GET /staff")
+
+
+async def scenario_search(client, rec, rng, catalog):
+    await rec.request(client, "GET", "/clients/search", "GET /clients/search",
+                      params={"query": rng.choice(SEARCH_TERMS)})
+
+
+def random_cell(rng, catalog):
+    staff = rng.choice(catalog["staff"])
+    service = rng.choice(catalog["services"])
+    date = (datetime.now() + timedelta(days=rng.randint(0, 6))).strftime("%Y-%m-%d")
+    return staff["id"], service["id"], date
+
+
+async def scenario_availability(client, rec, rng, catalog):
+    staff_id, service_id, date = random_cell(rng, catalog)
+    await rec.request(client, "GET", "/availability/", "GET /availability/",
+                      params={"staff_id": staff_id, "service_id": service_id, "date": date})
+
+
+async def scenario_booking(client, rec, rng, catalog):
+    # Stage "name": typo-tolerant client search, take the best match
+    response = await rec.request(client, "GET", "/clients/search", "GET /clients/search?fuzzy=true",
+                                 params={"query": rng.choice(SEARCH_TERMS[:-1]), "fuzzy": "true"})
+    clients = response.json().get("data", {}).get("clients", []) if response is not None else []
+    if not clients:
+        return
+    client_id = clients[0]["id"]
+
+    # Stages "service" and "stylist" use the catalog loaded at session start
+    staff_id, service_id, _ = random_cell(rng, catalog)
+    # Spread dates over a year so concurrent users rarely fight for one slot
+    date = (datetime.now() + timedelta(days=rng.randint(0, 365))).strftime("%Y-%m-%d")
+    params = {"staff_id": staff_id, "service_id": service_id, "date": date}
+
+    # Stage "date": first availability lookup
+    response = await rec.request(client, "GET", "/availability/", "GET /availability/", params=params)
+    slots = response.json().get("data", {}).get("availableSlots", []) if response is not None else []
+    if not slots:
+        return
+    slot = rng.choice(slots)
+
+    # Stage "time": the frontend validates against availability again, then holds the slot
+    response = await rec.request(client, "GET", "/availability/", "GET /availability/", params=params)
+    if response is None or slot not in response.json().get("data", {}).get("availableSlots", []):
+        return
+    response = await rec.request(client, "POST", "/holds", "POST /holds", json={
+        "client_id": client_id,
+        "stylist_id": staff_id,
+        "datetime_str": f"{date} {slot}",
+        "service_id": service_id
+    })
+    if response is None:
+        return
+    hold_id = response.json()["data"]["id"]
+
+    # Stage "confirm": some customers answer "Nein" and give the slot back
+    if rng.random() < BOOKING_RELEASE_RATE:
+        await rec.request(client, "DELETE", f"/holds/{hold_id}", "DELETE /holds/{id}")
+        return
+    await rec.request(client, "POST", f"/holds/{hold_id}/confirm", "POST /holds/{id}/confirm",
+                      headers={"Idempotency-Key": f"load-test-{rng.getrandbits(64):016x}"})
+
+
+SCENARIO_FUNCS = {
+    "catalog": scenario_catalog,
+    "search": scenario_search,
+    "availability": scenario_availability,
+    "booking": scenario_booking
+}
+
+
+async def run_scenario(base_url: str, name: str, concurrency: int, duration: float,
+                       seed: int, catalog: Dict) -> Dict:
+    """Run one scenario with ``concurrency`` virtual users for ``duration`` seconds."""
+    rec = Recorder()
+    func = SCENARIO_FUNCS[name]
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as client:
+        async def user(user_id: int):
+            rng = random.Random(seed * 1000 + user_id)
+            iterations = 0
+            while time.perf_counter() < deadline:
+                await func(client, rec, rng, catalog)
+                iterations += 1
+            return iterations
+
+        start = time.perf_counter()
+        iterations = await asyncio.gather(*(user(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    all_latencies = [ms for samples in rec.samples.values() for ms in samples]
+    result = summarize(all_latencies, sum(rec.errors.values()), elapsed)
+    result["iterations"] = sum(iterations)
+    result["duration_s"] = round(elapsed, 3)
+    result["endpoints"] = {
+        label: {**summarize(samples, rec.errors.get(label, 0), elapsed), "status_codes": rec.status_codes[label]}
+        for label, samples in sorted(rec.samples.items())
+    }
+    return result
+
+
+async def load_catalog(base_url: str) -> Dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        services = (await client.get("/services")).json()["data"]["services"]
+        staff = (await client.get("/staff")).json()["data"]["staff"]
+    return {"services": services, "staff": staff}
+
+
+# --- Local servers ----------------------------------------------------------
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url: str) -> None:
+    deadline = time.time() + READY_TIMEOUT
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready within {READY_TIMEOUT}s")
+
+
+def spawn_servers(backend: str, db_path: str) -> Tuple[str, List[subprocess.Popen]]:
+    """
+    Start uvicorn for the API, backed by fake mode or the Phorest simulator.
+
+    Args:
+        backend: "fake" or "simulator"
+        db_path: SQLite store for the API, so test bookings stay out of Data/hsphere.db
+
+    Returns:
+        (base_url, processes)
+    """
+    env = dict(os.environ, HSPHERE_DB_PATH=db_path)
+    processes = []
+    uvicorn = [sys.executable, "-m", "uvicorn", "--log-level", "warning", "--host", "127.0.0.1"]
+
+    if backend == "simulator":
+        sim_port = free_port()
+        processes.append(subprocess.Popen(uvicorn + ["--port", str(sim_port), "api.simulator.phorest_simulator:app"], env=env))
+        wait_until_ready(f"http://127.0.0.1:{sim_port}/_sim/state")
+        env.update({"USE_FAKE_API": "false", "PHOREST_API_BASE_URL": f"http://127.0.0.1:{sim_port}"})
+    else:
+        env["USE_FAKE_API"] = "true"
+
+    api_port = free_port()
+    processes.append(subprocess.Popen(uvicorn + ["--port", str(api_port), "api.main:app"], env=env))
+    base_url = f"http://127.0.0.1:{api_port}"
+    wait_until_ready(f"{base_url}/test")
+    return base_url, processes
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(current: Dict, previous: Dict) -> None:
+    print(f"\nComparison with {previous['meta'].get('commit')} -> {current['meta'].get('commit')}", file=sys.stderr)
+    for name, result in current["scenarios"].items():
+        before = previous.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        print(f"  {name:<13} rps {before['rps']:>9} -> {result['rps']:<9} "
+              f"p95 {before['latency_ms']['p95']:>8}ms -> {result['latency_ms']['p95']:<8}ms "
+              f"p99 {before['latency_ms']['p99']:>8}ms -> {result['latency_ms']['p99']}ms", file=sys.stderr)
+
+
+async def run(args) -> Dict:
+    processes = []
+    base_url = args.base_url
+    db_dir = None
+    try:
+        if args.spawn != "none":
+            db_dir = tempfile.mkdtemp(prefix="hsphere_load_test_")
+            base_url, processes = spawn_servers(args.spawn, os.path.join(db_dir, "hsphere.db"))
+        catalog = await load_catalog(base_url)
+
+        scenarios = SCENARIOS if args.scenario == "all" else [args.scenario]
+        results = {}
+        for name in scenarios:
+            print(f"[LoadTest] Running '{name}' with {args.concurrency} users for {args.duration}s ...", file=sys.stderr)
+            results[name] = await run_scenario(base_url, name, args.concurrency, args.duration, args.seed, catalog)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+        if db_dir is not None:
+            shutil.rmtree(db_dir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "base_url": base_url if args.spawn == "none" else f"spawned:{args.spawn}",
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "seed": args.seed
+        },
+        "scenarios": results
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the HSphere API")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="API to test when not spawning")
+    parser.add_argument("--spawn", choices=["none", "fake", "simulator"], default="none",
+                        help="Start a local uvicorn API backed by fake mode or the Phorest simulator")
+    parser.add_argument("--scenario", choices=["all"] + SCENARIOS, default="all")
+    parser.add_argument("--concurrency", type=int, default=20, help="Number of virtual users")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per scenario")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Earlier JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            print_comparison(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
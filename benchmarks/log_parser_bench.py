@@ -0,0 +1,159 @@
+"""
+Log Parser Benchmark
+Writes a synthetic improvement log of the requested size and measures the
+keyword summary of Logs/log_parser.py in MB/s, with the default keywords and
+with an extended list, against the former line-by-line parser (run on a
+prefix of the file only, it is slow). Counts are checked against the former
+parser on that prefix. Some lines hold umlauts, so most blocks take the
+UTF-8 check; non-ASCII keywords would add one Unicode lowercase per block.
+With --workers the file is also summarized by parse_log_files with each
+worker count, checked against the serial result.
+
+Usage:
+    python -m benchmarks.log_parser_bench --size-mb 2048 --file /tmp/hsphere_bench.log --workers 2,4,8
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from typing import Dict, List
+
+from Logs import log_parser
+
+CATEGORIES = ["Booking", "Supervisor", "Inventory", "PromptForge", "SelfImprove", "CoreBrain", "Client"]
+MESSAGES = [
+    "Confirmed: {name} with Elijah at 4pm",
+    "Routing to booking agent",
+    "Stock low for {product}",
+    "Client search for '{name}' took {ms}ms",
+    "Heartbeat ok",
+    "Improvement applied to main_booking.py",
+    "Prompt triggered for Selfimprove",
+    "Färbung für {name} verschoben",
+]
+NAMES = ["Lucas Meier", "Anna Schmidt", "Jonas Weber", "Lea Fischer", "Müller Sophie"]
+PRODUCTS = ["shampoo", "conditioner", "hair dye", "styling gel"]
+EXTRA_KEYWORDS = [
+    "Heartbeat", "Stylist", "Shampoo", "Refund", "Cancel", "NoShow", "Voucher", "Invoice", "Payment",
+    "Timeout", "Error", "Warning", "Retry", "Schedule", "Calendar", "Reminder", "SMS", "Email", "Phorest",
+    "SQLite", "Memory", "Snapshot", "Rotation", "Archive", "Perceive", "Spawn", "Refactor", "Startup",
+    "Shutdown", "Latency", "Discount", "Loyalty", "Colour", "Haircut", "Treatment", "Blowdry",
+    "Supervisor", "CoreBrain", "Routing", "Confirmed", "Elijah", "Stock",
+]
+
+
+def write_log(path: str, size_mb: int, seed: int):
+    """Synthetic log of at least ``size_mb`` MB; an existing file of that size is reused."""
+    target = size_mb * 1024 * 1024
+    if os.path.exists(path) and os.path.getsize(path) >= target:
+        return
+    rng = random.Random(seed)
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            lines = []
+            for _ in range(10000):
+                message = rng.choice(MESSAGES).format(name=rng.choice(NAMES), product=rng.choice(PRODUCTS),
+                                                      ms=rng.randint(1, 40))
+                lines.append(f"[2026-10-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00] "
+                             f"[{rng.choice(CATEGORIES)}] {message}\n")
+            chunk = "".join(lines)
+            f.write(chunk)
+            written += len(chunk.encode("utf-8"))
+
+
+def legacy_parse(path: str, limit: int, keywords: List[str]) -> Dict:
+    """The former parse_log_file: lowercases every line once per keyword."""
+    summary = {"lines": 0, "matches": {key: 0 for key in keywords}}
+    read = 0
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            read += len(line.encode("utf-8"))
+            if read > limit:
+                break
+            summary["lines"] += 1
+            for key in keywords:
+                if key.lower() in line.lower():
+                    summary["matches"][key] += 1
+    return summary
+
+
+def head(path: str, limit: int, out_path: str) -> int:
+    """First complete lines of ``path`` up to ``limit`` bytes, copied to ``out_path``."""
+    with open(path, "rb") as f:
+        data = f.read(limit)
+    data = data[:data.rfind(b"\n") + 1]
+    with open(out_path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def throughput(path: str, keywords: List[str]) -> Dict:
+    log_parser.KEYWORDS = keywords
+    start = time.perf_counter()
+    summary = log_parser.parse_log_file(path)
+    seconds = time.perf_counter() - start
+    return {"seconds": round(seconds, 2), "mb_per_s": round(os.path.getsize(path) / 1e6 / seconds, 1), "summary": summary}
+
+
+def parallel(path: str, workers: List[int], serial: Dict) -> Dict:
+    results = {}
+    for count in workers:
+        start = time.perf_counter()
+        summary = log_parser.parse_log_files([path], count)[path]
+        seconds = time.perf_counter() - start
+        results[str(count)] = {
+            "seconds": round(seconds, 2),
+            "mb_per_s": round(os.path.getsize(path) / 1e6 / seconds, 1),
+            "matches_serial": summary == serial,
+        }
+    return results
+
+
+def run(path: str, size_mb: int, legacy_mb: int, seed: int, workers: List[int]) -> Dict:
+    write_log(path, size_mb, seed)
+    default_keywords = list(log_parser.KEYWORDS)
+    extended_keywords = default_keywords + EXTRA_KEYWORDS
+    results = {"file_mb": round(os.path.getsize(path) / 1e6, 1)}
+    try:
+        for name, keywords in (("default", default_keywords), ("extended", extended_keywords)):
+            full = throughput(path, keywords)
+            prefix_path = f"{path}.prefix"
+            prefix_size = head(path, legacy_mb * 1024 * 1024, prefix_path)
+            prefix = log_parser.parse_log_file(prefix_path)
+            start = time.perf_counter()
+            legacy = legacy_parse(prefix_path, prefix_size, keywords)
+            legacy_seconds = time.perf_counter() - start
+            os.remove(prefix_path)
+            results[name] = {
+                "keywords": len(keywords),
+                "seconds": full["seconds"],
+                "mb_per_s": full["mb_per_s"],
+                "lines": full["summary"]["lines"],
+                "legacy_mb_per_s": round(prefix_size / 1e6 / legacy_seconds, 1),
+                "matches_legacy": legacy == {"lines": prefix["lines"], "matches": prefix["matches"]},
+            }
+            if workers:
+                results[name]["workers"] = parallel(path, workers, full["summary"])
+    finally:
+        log_parser.KEYWORDS = default_keywords
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the log_parser keyword summary")
+    parser.add_argument("--file", default="/tmp/hsphere_bench.log")
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--legacy-mb", type=int, default=100, help="Prefix parsed with the former parser")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", default="", help="Comma-separated worker counts for the parallel mode")
+    args = parser.parse_args(argv)
+
+    workers = [int(count) for count in args.workers.split(",") if count]
+    print(json.dumps(run(args.file, args.size_mb, args.legacy_mb, args.seed, workers), indent=2))
+
+
+if __name__ == "__main__":
+    main()
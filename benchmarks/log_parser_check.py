@@ -0,0 +1,198 @@
+"""
+Log Parser Check
+Randomized checks of Logs/log_parser.py against a line-by-line reference
+counter (split on "\\n", decode with errors="ignore", lowercase, count each
+keyword once per line):
+
+- incremental: random append (also of half-written lines), truncate, rotate
+  and rewrite steps on a few files; after each step parse_log_file_incremental,
+  with its state saved and loaded again, must give what parse_log_file and the
+  reference give.
+- blocks: random blocks with umlauts, invalid UTF-8, U+0130 and U+212A counted
+  by _count and by the reference.
+- parallel: parse_log_files with several workers against one worker, plain and
+  incremental (summaries and stored state), with READ_BLOCK and CHUNK_BYTES
+  from 1 byte to 1 MB over growing, truncated and half-written files.
+
+Prints the number of cases and mismatches per check; exits with 1 on any mismatch.
+
+Usage:
+    python -m benchmarks.log_parser_check --steps 1000 --dir /tmp/log_parser_check
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+from typing import Dict, List
+
+from Logs import log_parser
+
+KEYWORDS = ["Improvement", "Booking", "Prompt", "Client", "SelfImprove", "Inventory", "Färbung", "İnventory"]
+WORDS = ["Booking", "booking", "BOOKING", "Client", "Prompt", "SelfImprove", "improvement", "Inventory",
+         "Färbung", "FÄRBUNG", "Müller", "heartbeat", "Elijah", "ok", " ", " ", ":", "[", "]"]
+# Letters that lowercase unlike ASCII bytes, and bytes that are not UTF-8
+ODD = ["İ", "K", "ß", "ä", "Ä", "é"]
+INVALID = [b"\xff", b"\xc3", b"\xe2\x82", b"\x80", b"\xf0\x9f"]
+BLOCK_SIZES = [1, 7, 64, 4096, 1024 * 1024]
+
+
+def reference_count(data: bytes, keywords: List[str]) -> Dict:
+    """Lines and keyword lines of ``data``; a last line without newline counts as well."""
+    lines = data.split(b"\n")
+    if lines[-1] == b"":
+        lines.pop()
+    summary = {"lines": len(lines), "matches": {key: 0 for key in keywords}}
+    for line in lines:
+        lowered = line.decode("utf-8", errors="ignore").lower()
+        for key in keywords:
+            if key.lower() in lowered:
+                summary["matches"][key] += 1
+    return summary
+
+
+def random_line(rng: random.Random, odd: bool) -> bytes:
+    parts = []
+    for _ in range(rng.randint(0, 12)):
+        roll = rng.random()
+        if odd and roll < 0.1:
+            parts.append(rng.choice(ODD).encode("utf-8"))
+        elif odd and roll < 0.2:
+            parts.append(rng.choice(INVALID))
+        elif odd and roll < 0.3:
+            # A keyword split by an odd letter or an invalid byte
+            word = rng.choice(WORDS).encode("utf-8")
+            cut = rng.randint(0, len(word))
+            parts.append(word[:cut] + rng.choice(INVALID + [c.encode("utf-8") for c in ODD]) + word[cut:])
+        else:
+            parts.append(rng.choice(WORDS).encode("utf-8"))
+    return b"".join(parts)
+
+
+def random_data(rng: random.Random, lines: int, odd: bool = True) -> bytes:
+    data = b"".join(random_line(rng, odd) + b"\n" for _ in range(lines))
+    if rng.random() < 0.3:
+        data += random_line(rng, odd)  # Half-written last line
+    return data
+
+
+def counts(summary: Dict) -> Dict:
+    return {"lines": summary["lines"], "matches": summary["matches"]}
+
+
+def check_incremental(directory: str, steps: int, rng: random.Random) -> Dict:
+    paths = [os.path.join(directory, f"incremental_{i}.log") for i in range(3)]
+    state_path = os.path.join(directory, "state.json")
+    for path in paths:
+        with open(path, "wb") as f:
+            f.write(random_data(rng, rng.randint(0, 50)))
+    operations = {"append": 0, "truncate": 0, "rotate": 0, "rewrite": 0}
+    mismatches = 0
+    for step in range(steps):
+        path = rng.choice(paths)
+        operation = rng.choices(list(operations), [70, 10, 10, 10])[0]
+        operations[operation] += 1
+        if operation == "append":
+            with open(path, "ab") as f:
+                f.write(random_data(rng, rng.randint(0, 20)))
+        elif operation == "truncate":
+            with open(path, "r+b") as f:
+                f.truncate(rng.randint(0, os.path.getsize(path)))
+        elif operation == "rotate":
+            os.replace(path, f"{path}.1")
+            with open(path, "wb") as f:
+                f.write(random_data(rng, rng.randint(0, 50)))
+        else:
+            # Same inode, new content from a start that differs from the old one
+            with open(path, "wb") as f:
+                f.write(f"rewrite {step}\n".encode("ascii") + random_data(rng, rng.randint(0, 50)))
+
+        state = log_parser.load_state(state_path)
+        for checked in paths:
+            incremental = log_parser.parse_log_file_incremental(checked, state)
+            with open(checked, "rb") as f:
+                expected = reference_count(f.read(), KEYWORDS)
+            if incremental != log_parser.parse_log_file(checked) or counts(incremental) != expected:
+                mismatches += 1
+        log_parser.save_state(state, state_path)
+    return {"steps": steps, "operations": operations, "mismatches": mismatches}
+
+
+def check_blocks(cases: int, rng: random.Random) -> Dict:
+    mismatches = 0
+    for _ in range(cases):
+        data = random_data(rng, rng.randint(1, 40))
+        if not data.endswith(b"\n"):
+            data += b"\n"
+        summary = {"lines": 0, "matches": {key: 0 for key in KEYWORDS}}
+        log_parser._count(data, summary)
+        mismatches += int(summary != reference_count(data, KEYWORDS))
+    return {"cases": cases, "mismatches": mismatches}
+
+
+def check_parallel(directory: str, rounds: int, workers: int, rng: random.Random) -> Dict:
+    paths = [os.path.join(directory, f"parallel_{i}.log") for i in range(3)]
+    for path in paths:
+        with open(path, "wb") as f:
+            f.write(random_data(rng, rng.randint(0, 200)))
+    serial_state = log_parser.load_state(os.path.join(directory, "missing.json"))
+    parallel_state = json.loads(json.dumps(serial_state))
+    mismatches = 0
+    for _ in range(rounds):
+        for path in paths:
+            roll = rng.random()
+            if roll < 0.7:
+                with open(path, "ab") as f:
+                    f.write(random_data(rng, rng.randint(0, 200)))
+            elif roll < 0.85:
+                with open(path, "r+b") as f:
+                    f.truncate(rng.randint(0, os.path.getsize(path)))
+        log_parser.READ_BLOCK = rng.choice(BLOCK_SIZES)
+        log_parser.CHUNK_BYTES = rng.choice(BLOCK_SIZES)
+        serial = log_parser.parse_log_files(paths, 1)
+        parallel = log_parser.parse_log_files(paths, workers)
+        serial_incremental = log_parser.parse_log_files(paths, 1, serial_state)
+        parallel_incremental = log_parser.parse_log_files(paths, workers, parallel_state)
+        mismatches += int(serial != parallel)
+        mismatches += int(serial_incremental != parallel_incremental or serial_incremental != serial)
+        mismatches += int(serial_state != parallel_state)
+    return {"rounds": rounds, "workers": workers, "mismatches": mismatches}
+
+
+def run(directory: str, steps: int, cases: int, rounds: int, workers: int, seed: int) -> Dict:
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    rng = random.Random(seed)
+    defaults = (log_parser.KEYWORDS, log_parser.READ_BLOCK, log_parser.CHUNK_BYTES)
+    log_parser.KEYWORDS = KEYWORDS
+    try:
+        return {
+            "incremental": check_incremental(directory, steps, rng),
+            "blocks": check_blocks(cases, rng),
+            "parallel": check_parallel(directory, rounds, workers, rng),
+        }
+    finally:
+        log_parser.KEYWORDS, log_parser.READ_BLOCK, log_parser.CHUNK_BYTES = defaults
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check log_parser against a line-by-line reference")
+    parser.add_argument("--dir", default="/tmp/log_parser_check")
+    parser.add_argument("--steps", type=int, default=1000, help="Random file operations for the incremental check")
+    parser.add_argument("--cases", type=int, default=20000, help="Random blocks for the block check")
+    parser.add_argument("--rounds", type=int, default=50, help="Rounds of the parallel check")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    results = run(args.dir, args.steps, args.cases, args.rounds, args.workers, args.seed)
+    print(json.dumps(results, indent=2))
+    if any(check["mismatches"] for check in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
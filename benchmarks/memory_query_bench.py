@@ -0,0 +1,119 @@
+"""
+Memory Query Benchmark
+Appends synthetic events to a fresh MemoryLog (api/services/memory_log.py)
+and measures indexed queries ("BookingTest* in the last hour", "last N of
+type X", counts) against a linear scan of the JSONL file, plus reopening
+the log from its snapshot and index versus a full replay.
+
+Usage:
+    python -m benchmarks.memory_query_bench --events 1000000 --dir /tmp/memory_bench
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from typing import Dict, List
+
+from api.services.memory_log import MemoryLog, event_timestamp
+from benchmarks.client_search_bench import percentile
+
+EVENT_TYPES = ["Startup", "BookingTestStart", "BookingTestEnd", "BookingTestRetry", "Perceive",
+               "SpawnAgent", "RefactorLogic", "InventoryUpdate", "Heartbeat", "Error"]
+# Heartbeats dominate, bookings and errors are rare (like a long-running CoreBrain)
+EVENT_WEIGHTS = [1, 5, 5, 1, 20, 1, 1, 5, 60, 1]
+
+
+def timed(fn, repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summary(timings: List[float]) -> Dict:
+    return {"p50": round(percentile(timings, 50) * 1000, 3), "p99": round(percentile(timings, 99) * 1000, 3)}
+
+
+def linear_scan(path: str, match) -> List[Dict]:
+    with open(path, "rb") as f:
+        return [event for event in map(json.loads, f) if match(event)]
+
+
+def run(directory: str, num_events: int, span_days: float, repeat: int, seed: int) -> Dict:
+    os.makedirs(directory, exist_ok=True)
+    log_path = os.path.join(directory, "memory.jsonl")
+    snapshot_path = os.path.join(directory, "memory_snapshot.json")
+    for path in (log_path, snapshot_path, f"{snapshot_path}.index"):
+        if os.path.exists(path):
+            os.remove(path)
+
+    rng = random.Random(seed)
+    now = time.time()
+    step = span_days * 86400 / num_events
+    types = rng.choices(EVENT_TYPES, EVENT_WEIGHTS, k=num_events)
+    memory_log = MemoryLog(log_path, snapshot_path, fsync_batch=4096)
+    start = time.perf_counter()
+    for i, event_type in enumerate(types):
+        memory_log.append({"event": event_type, "timestamp": now - (num_events - i) * step, "seq": i})
+    append_seconds = time.perf_counter() - start
+
+    hour_ago = now - 3600
+    queries = {
+        "booking_tests_last_hour": lambda: memory_log.query("BookingTest*", since=hour_ago),
+        "last_100_errors": lambda: memory_log.last(100, "Error"),
+        "last_20_any": lambda: memory_log.last(20),
+        "count_heartbeats_last_day": lambda: memory_log.count("Heartbeat", since=now - 86400),
+    }
+    results = {name: summary(timed(query, repeat)) for name, query in queries.items()}
+
+    # Same questions answered by reading the whole file
+    start = time.perf_counter()
+    expected = linear_scan(log_path, lambda e: e["event"].startswith("BookingTest") and e["timestamp"] >= hour_ago)
+    scan_seconds = time.perf_counter() - start
+    found = queries["booking_tests_last_hour"]()
+    errors = linear_scan(log_path, lambda e: e["event"] == "Error")[-100:][::-1]
+    mismatches = int([e["seq"] for e in found] != [e["seq"] for e in expected])
+    mismatches += int([e["seq"] for e in memory_log.last(100, "Error")] != [e["seq"] for e in errors])
+
+    memory_log.close()
+    start = time.perf_counter()
+    reopened = MemoryLog(log_path, snapshot_path)
+    reopen_seconds = time.perf_counter() - start
+    mismatches += int(len(reopened.query("BookingTest*", since=hour_ago)) != len(expected))
+    reopened.close()
+    start = time.perf_counter()
+    MemoryLog(log_path, None).close()
+    replay_seconds = time.perf_counter() - start
+
+    return {
+        "events": num_events,
+        "log_mb": round(os.path.getsize(log_path) / 1e6, 1),
+        "append_us": round(append_seconds / num_events * 1e6, 2),
+        "query_ms": results,
+        "booking_tests_last_hour": len(expected),
+        "linear_scan_ms": round(scan_seconds * 1000, 1),
+        "mismatches": mismatches,
+        "reopen_with_snapshot_ms": round(reopen_seconds * 1000, 1),
+        "reopen_full_replay_ms": round(replay_seconds * 1000, 1),
+        "oldest_event_age_days": round((now - event_timestamp(next(reopened.events()))) / 86400, 1)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark indexed memory queries")
+    parser.add_argument("--dir", default="/tmp/memory_bench")
+    parser.add_argument("--events", type=int, default=1000000)
+    parser.add_argument("--span-days", type=float, default=30, help="Time covered by the synthetic events")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(run(args.dir, args.events, args.span_days, args.repeat, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Schedule Engine Micro-Benchmark
+Measures conflict checks, inserts and cancellations of
+api/services/schedule.DaySchedule against a linear scan over an interval
+list (the previous "HH:MM in list" approach), for growing numbers of
+appointments per stylist-day.
+
+Intervals use second granularity so that thousands of non-overlapping
+appointments fit into one day.
+
+Usage:
+    python -m benchmarks.schedule_bench --sizes 100 1000 5000 20000
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import Dict, List, Tuple
+
+from api.services.schedule import DaySchedule
+
+DAY_SECONDS = 24 * 60 * 60
+QUERIES = 20000
+
+
+class LinearSchedule:
+    """Baseline: unsorted interval list, every check scans all appointments."""
+
+    def __init__(self):
+        self.intervals: List[Tuple[int, int, str]] = []
+
+    def conflict(self, start: int, end: int):
+        for b_start, b_end, appointment_id in self.intervals:
+            if start < b_end and b_start < end:
+                return appointment_id
+        return None
+
+    def insert(self, start: int, end: int, appointment_id: str) -> bool:
+        if self.conflict(start, end) is not None:
+            return False
+        self.intervals.append((start, end, appointment_id))
+        return True
+
+    def cancel(self, appointment_id: str) -> bool:
+        for i, (_, _, existing_id) in enumerate(self.intervals):
+            if existing_id == appointment_id:
+                del self.intervals[i]
+                return True
+        return False
+
+
+def make_intervals(n: int, rng: random.Random) -> List[Tuple[int, int, str]]:
+    """n non-overlapping intervals of random length, in random order."""
+    slot = DAY_SECONDS // n
+    intervals = []
+    for i in range(n):
+        start = i * slot + rng.randint(0, slot // 4)
+        length = rng.randint(max(1, slot // 4), max(1, slot // 2))
+        intervals.append((start, start + length, f"apt_{i}"))
+    rng.shuffle(intervals)
+    return intervals
+
+
+def per_op_us(total_seconds: float, ops: int) -> float:
+    return round(total_seconds / ops * 1e6, 3)
+
+
+def bench(schedule_cls, intervals, queries) -> Dict:
+    schedule = schedule_cls()
+
+    start = time.perf_counter()
+    for interval_start, interval_end, appointment_id in intervals:
+        schedule.insert(interval_start, interval_end, appointment_id)
+    insert_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for query_start, query_end in queries:
+        schedule.conflict(query_start, query_end)
+    conflict_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _, _, appointment_id in intervals:
+        schedule.cancel(appointment_id)
+    cancel_time = time.perf_counter() - start
+
+    return {
+        "insert_us": per_op_us(insert_time, len(intervals)),
+        "conflict_us": per_op_us(conflict_time, len(queries)),
+        "cancel_us": per_op_us(cancel_time, len(intervals))
+    }
+
+
+def run(sizes: List[int], seed: int, baseline_limit: int) -> Dict:
+    results = {}
+    for n in sizes:
+        rng = random.Random(seed)
+        intervals = make_intervals(n, rng)
+        queries = []
+        for _ in range(QUERIES):
+            query_start = rng.randint(0, DAY_SECONDS - 1)
+            queries.append((query_start, query_start + rng.randint(60, 5400)))
+
+        results[n] = {"sorted": bench(DaySchedule, intervals, queries)}
+        if n <= baseline_limit:
+            results[n]["linear"] = bench(LinearSchedule, intervals, queries)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the per-stylist schedule engine")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000, 20000])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline-limit", type=int, default=5000,
+                        help="Skip the linear baseline above this many appointments")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.seed, args.baseline_limit)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'appointments':>12} {'impl':>7} {'insert us':>10} {'conflict us':>12} {'cancel us':>10}")
+    for n, impls in results.items():
+        for name, timings in impls.items():
+            print(f"{n:>12} {name:>7} {timings['insert_us']:>10} {timings['conflict_us']:>12} {timings['cancel_us']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Store Benchmark
+Loads synthetic clients and bookings into a fresh SQLite store
+(api/services/store.py) and measures bulk load time, client search and
+booking lookup latency, and read throughput while a writer keeps inserting
+bookings (WAL: readers are not blocked by the writer).
+
+Usage:
+    python -m benchmarks.store_bench --clients 300000 --db /tmp/hsphere_bench.db
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, List
+
+from api.services.store import Store
+from benchmarks.client_search_bench import make_clients, percentile
+
+
+def make_queries(clients: List[Dict], count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        client = rng.choice(clients)
+        first, last = client["name"].split(" ", 1)
+        kind = rng.randrange(4)
+        if kind == 0:
+            queries.append(first[:3])
+        elif kind == 1:
+            queries.append(f"{last[:4]} {first[:2]}")
+        elif kind == 2:
+            queries.append(client["email"])
+        else:
+            queries.append("0" + client["phone"][4:])
+    return queries
+
+
+def make_bookings(clients: List[Dict], count: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    return [{
+        "external_id": f"apt_{i}",
+        "client_id": rng.choice(clients)["id"],
+        "staff_id": f"stf_{rng.randint(1, 30):03d}",
+        "service": "srv_001",
+        "start": f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(9, 17):02d}:{rng.choice(['00', '30'])}",
+        "duration": 30
+    } for i in range(count)]
+
+
+def timed(calls) -> List[float]:
+    timings = []
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summary(timings: List[float]) -> Dict:
+    return {
+        "p50": round(percentile(timings, 50) * 1000, 4),
+        "p99": round(percentile(timings, 99) * 1000, 4)
+    }
+
+
+def run(db_path: str, num_clients: int, num_bookings: int, num_queries: int, readers: int,
+        seconds: float, seed: int) -> Dict:
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    store = Store(db_path)
+    clients = make_clients(num_clients, seed)
+    bookings = make_bookings(clients, num_bookings, seed + 1)
+
+    start = time.perf_counter()
+    store.clients.upsert_many(clients)
+    client_load = time.perf_counter() - start
+    start = time.perf_counter()
+    store.bookings.add_many(bookings)
+    booking_load = time.perf_counter() - start
+
+    queries = make_queries(clients, num_queries, seed + 2)
+    search = timed(lambda q=q: store.clients.search(q, 10) for q in queries)
+    rng = random.Random(seed + 3)
+    staff_day = timed(
+        lambda b=rng.choice(bookings): store.bookings.for_staff(b["staff_id"], b["start"][:10], b["start"][:10] + "~")
+        for _ in range(num_queries)
+    )
+
+    # Readers search while one writer inserts bookings
+    stop = threading.Event()
+    reads = [0] * readers
+    writes = [0]
+
+    def reader(slot: int):
+        rng = random.Random(slot)
+        while not stop.is_set():
+            store.clients.search(rng.choice(queries), 10)
+            reads[slot] += 1
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            store.bookings.add(dict(bookings[i % len(bookings)], external_id=f"live_{i}"))
+            i += 1
+        writes[0] = i
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    store.close()
+
+    return {
+        "clients": num_clients,
+        "bookings": num_bookings,
+        "client_load_s": round(client_load, 2),
+        "booking_load_s": round(booking_load, 2),
+        "client_search_ms": summary(search),
+        "staff_day_bookings_ms": summary(staff_day),
+        "concurrent_reads_per_s": round(sum(reads) / seconds),
+        "concurrent_writes_per_s": round(writes[0] / seconds)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the SQLite store")
+    parser.add_argument("--db", default="/tmp/hsphere_bench.db")
+    parser.add_argument("--clients", type=int, default=300000)
+    parser.add_argument("--bookings", type=int, default=300000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(run(args.db, args.clients, args.bookings, args.queries, args.readers,
+                         args.seconds, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
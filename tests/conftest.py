@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Fake Phorest API and a throwaway database, set before any api module is imported
+os.environ.setdefault("USE_FAKE_API", "true")
+os.environ.setdefault("HSPHERE_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="hsphere_tests_"), "hsphere.db"))
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def run_python(code, db_path):
+    env = dict(os.environ, HSPHERE_DB_PATH=str(db_path), PYTHONPATH=str(ROOT))
+    return subprocess.run([sys.executable, "-c", code], env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def test_importing_local_booking_leaves_the_database_alone(tmp_path):
+    db_path = tmp_path / "hsphere.db"
+    run_python("import Agents.local_booking", db_path)
+    assert not db_path.exists()
+
+
+def test_local_booking_loads_the_store_on_first_use(tmp_path):
+    db_path = tmp_path / "hsphere.db"
+    result = run_python(
+        "from Agents import local_booking\n"
+        "print(len(local_booking.find_client('a')), len(local_booking.stylists) > 0)\n"
+        "print(local_booking.handle_user_input('book a haircut with Elijah tomorrow at 14'))",
+        db_path
+    )
+    assert db_path.exists()
+    found, has_stylists = result.stdout.splitlines()[0].split()
+    assert int(found) > 0 and has_stylists == "True"
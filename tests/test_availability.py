@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+
+from api.services import phorest_api_client
+from api.services.availability_engine import AvailabilityEngine
+
+
+@pytest.mark.parametrize("date", ["2025-7-15", "2025-07-5", "2025-07-15 ", "15.07.2025", "2025-02-30", None])
+def test_validate_rejects_non_canonical_dates(date):
+    engine = AvailabilityEngine(staff_ids=["stf_001"])
+    with pytest.raises(ValueError):
+        engine.validate("stf_001", date)
+
+
+def test_unpadded_date_gets_no_second_column():
+    engine = AvailabilityEngine(staff_ids=["stf_001"])
+    engine.mark_busy("stf_001", "2025-07-15", 9 * 60, 30)
+    with pytest.raises(ValueError):
+        engine.free_slots(["stf_001"], ["2025-7-15"], 30)
+    assert list(engine.date_index) == ["2025-07-15"]
+
+
+def test_fake_api_rejects_unpadded_date():
+    result = asyncio.run(phorest_api_client.get_available_slots("stf_001", "srv_001", "2025-7-15"))
+    assert result["success"] is False
+    assert phorest_api_client.availability_cache.get("stf_001", "srv_001", "2025-7-15") is None
+
+    cells = asyncio.run(phorest_api_client.get_available_slots_batch(["stf_001"], ["srv_001"], ["2025-7-15", "2025-07-15"]))
+    assert [cell["success"] for cell in cells] == [False, True]
@@ -0,0 +1,49 @@
+from api.services.cache import AvailabilityCache
+
+RESPONSE = {"success": True, "data": {"availableSlots": ["09:00"]}}
+
+
+def test_invalidated_days_do_not_accumulate():
+    cache = AvailabilityCache(max_entries=10, ttl=60)
+    for day in range(1, 29):
+        date = f"2025-07-{day:02d}"
+        with cache.fetching("stf_001", date) as generation:
+            cache.put("stf_001", "srv_001", date, RESPONSE, generation=generation)
+        cache.invalidate("stf_001", date)
+    assert cache._generations == {}
+    assert cache._in_flight == {}
+
+
+def test_fetch_started_before_a_booking_is_not_stored():
+    cache = AvailabilityCache(max_entries=10, ttl=60)
+    with cache.fetching("stf_001", "2025-07-15") as generation:
+        cache.invalidate("stf_001", "2025-07-15")
+        # A second fetch after the booking does not reset the counter for the first
+        with cache.fetching("stf_001", "2025-07-15") as fresh:
+            cache.put("stf_001", "srv_002", "2025-07-15", RESPONSE, generation=fresh)
+        cache.put("stf_001", "srv_001", "2025-07-15", RESPONSE, generation=generation)
+    assert cache.get("stf_001", "srv_001", "2025-07-15") is None
+    assert cache.get("stf_001", "srv_002", "2025-07-15") == RESPONSE
+
+    cache.invalidate("stf_001", "2025-07-15")
+    assert cache._generations == {}
+
+
+def test_clear_rejects_running_fetches():
+    cache = AvailabilityCache(max_entries=10, ttl=60)
+    with cache.fetching("stf_001", "2025-07-15") as generation:
+        cache.clear()
+        cache.put("stf_001", "srv_001", "2025-07-15", RESPONSE, generation=generation)
+    assert cache.get("stf_001", "srv_001", "2025-07-15") is None
+    assert cache._generations == {}
+
+
+def test_lru_eviction_forgets_the_counter():
+    cache = AvailabilityCache(max_entries=2, ttl=60)
+    for day in range(1, 6):
+        date = f"2025-07-{day:02d}"
+        with cache.fetching("stf_001", date):
+            cache.invalidate("stf_001", date)  # Kept: a fetch is running
+            with cache.fetching("stf_001", date) as generation:
+                cache.put("stf_001", "srv_001", date, RESPONSE, generation=generation)
+    assert cache._generations == {("stf_001", "2025-07-04"): 1, ("stf_001", "2025-07-05"): 1}
@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from api.services.client_index import FUZZY_MAX_TERMS, ClientIndex, similarity, tokenize
+
+FIRST_NAMES = ["Anna", "Lena", "Lina", "Leon", "Lucas", "Lukas", "Max", "Marta", "Sophie", "Sofia", "Jonas", "Jana"]
+LAST_NAMES = ["Meier", "Maier", "Mayer", "Schmidt", "Schmid", "Schulz", "Roth", "Rot", "Weber", "Wagner", "Müller"]
+
+
+def brute_force_scores(clients, query, min_score):
+    """Summed scores as documented on ClientIndex, by comparing every query token with every name token."""
+    query_tokens = list(dict.fromkeys(tokenize(query)))
+    scores = {}
+    for client in clients:
+        total = 0.0
+        for query_token in query_tokens:
+            best = max((similarity(query_token, token) for token in tokenize(client["name"])), default=0.0)
+            total += best if best >= min_score else 0.0
+        if total >= min_score * len(query_tokens):
+            scores[client["id"]] = total
+    return scores
+
+
+def misspell(rng, token):
+    i = rng.randrange(len(token))
+    return rng.choice([token[:i] + token[i + 1:], token[:i] + rng.choice("aeilnrst") + token[i:], token])
+
+
+@pytest.fixture(scope="module")
+def clients():
+    rng = random.Random(7)
+    return [{"id": f"cli_{i:04d}", "name": " ".join(rng.sample(FIRST_NAMES + LAST_NAMES, rng.randint(1, 4)))}
+            for i in range(600)]
+
+
+def test_vocabulary_stays_below_the_term_cap():
+    # Otherwise the brute-force scorer would also have to keep only the closest terms
+    assert len({token for name in FIRST_NAMES + LAST_NAMES for token in tokenize(name)}) <= FUZZY_MAX_TERMS
+
+
+@pytest.mark.parametrize("tokens", [1, 2, 3, 4])
+@pytest.mark.parametrize("min_score", [0.2, 0.3, 0.5])
+def test_fuzzy_search_matches_brute_force(clients, tokens, min_score):
+    index = ClientIndex(clients)
+    rng = random.Random(tokens * 100 + int(min_score * 10))
+    for _ in range(40):
+        query = " ".join(misspell(rng, token.lower()) for token in rng.sample(FIRST_NAMES + LAST_NAMES, tokens))
+        totals = brute_force_scores(clients, query, min_score)
+        count = len(set(tokenize(query)))
+        expected = {client_id: total / count for client_id, total in totals.items()}
+        found = {client["id"]: client["score"] for client in index.fuzzy_search(query, len(clients), min_score)}
+        assert found.keys() == expected.keys(), query
+        for client_id, score in found.items():
+            assert score == pytest.approx(expected[client_id], abs=1e-3), (query, client_id)
+
+        # Top results of a small limit, and pages in (score, ID) order
+        ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+        top = index.fuzzy_search(query, 5, min_score)
+        assert [c["score"] for c in top] == pytest.approx([total / count for _, total in ranked[:5]], abs=1e-3), query
+        pages, after = [], None
+        while True:
+            page, after = index.fuzzy_search_page(query, 7, min_score, after)
+            pages.extend(client["id"] for client in page)
+            if after is None:
+                break
+        assert pages == [client_id for client_id, _ in ranked], query
@@ -0,0 +1,24 @@
+import asyncio
+
+import pytest
+
+from api.services.phorest_api_client import search_clients
+
+
+def _search(query, **kwargs):
+    result = asyncio.run(search_clients(query, **kwargs))
+    assert result["success"], result
+    return result["data"]["clients"]
+
+
+@pytest.mark.parametrize("query", ["+49 234 56789", "0049 234 56789", "max.mustermann@email.com", "MAX.Mustermann@email.com"])
+def test_fuzzy_phone_and_email_lookups_are_exact(query):
+    clients = _search(query, fuzzy=True)
+    assert clients == _search(query)
+    assert "cli_002" in [client["id"] for client in clients]
+
+
+def test_fuzzy_name_lookup_tolerates_typos():
+    clients = _search("Max Musterman", fuzzy=True)
+    assert clients[0]["id"] == "cli_002"
+    assert 0 < clients[0]["score"] < 1
@@ -0,0 +1,27 @@
+import asyncio
+import importlib
+
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.services.store import get_store
+
+metrics = importlib.import_module("api.endpoints.metrics")
+
+
+def test_metrics_reads_the_store_off_the_event_loop(monkeypatch):
+    on_loop = []
+
+    def recording_get_store():
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return get_store()
+
+    monkeypatch.setattr(metrics, "get_store", recording_get_store)
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert response.json()["data"]["store"] == get_store().counts()
+    assert on_loop == [False]